@@ -0,0 +1,154 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from src.pascal.server import CACHE_SIZE, DEFAULT_SOCKET, CompileClient, ServerError, remove_stale_socket
+
+
+def serve(args):
+    from src.pascal.server import CompileServer
+    server = CompileServer(args.socket, args.workers, args.cache_size)
+    print(f"Сервер слушает {args.socket}, процессов: {server.workers}", file=sys.stderr)
+    try:
+        asyncio.run(server.serve_forever())
+    except ServerError as error:
+        sys.exit(str(error))
+
+
+def request(args):
+    with open(args.source, encoding="utf-8") as fp:
+        text = fp.read()
+    options = {}
+    for flag in ("optimize", "memoize", "dump"):
+        if getattr(args, flag, False):
+            options[flag] = True
+    if getattr(args, "input", None) is not None:
+        options["input"] = sys.stdin.read() if args.input == "-" else open(args.input, encoding="utf-8").read()
+    with CompileClient(args.socket) as client:
+        response = client.request(args.op, text, **options)
+    if not response["ok"]:
+        error = response["error"]
+        sys.stdout.write(error.get("output", ""))
+        print(f"{error['type']}: {error['message']}", file=sys.stderr)
+        sys.exit(1)
+    result = response["result"]
+    if args.op == "parse":
+        sys.stdout.write(result["ast"])
+    elif args.op == "check":
+        print(result.get("dump", "OK"))
+        for name, report in result["optimizations"].items():
+            print(f"{name}: {report}", file=sys.stderr)
+    else:
+        sys.stdout.write(result["output"])
+
+
+def _client_loop(path, jobs, latencies, errors):
+    with CompileClient(path) as client:
+        for op, text in jobs:
+            start = time.perf_counter()
+            response = client.request(op, text)
+            latencies.append(time.perf_counter() - start)
+            if not response["ok"]:
+                errors.append(response["error"]["message"])
+
+
+def bench(args):
+    from src.pascal.generator import GeneratorConfig, generate_program
+
+    sources = [generate_program(seed, GeneratorConfig(statements=args.statements, functions=3))
+               for seed in range(args.distinct)]
+    jobs = [(args.op, sources[index % len(sources)]) for index in range(args.requests)]
+    server = None
+    if args.workers is not None:
+        try:
+            remove_stale_socket(args.socket)
+        except ServerError as error:
+            sys.exit(str(error))
+        server = subprocess.Popen([sys.executable, __file__, "--socket", args.socket, "serve",
+                                   "--workers", str(args.workers)], stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + 30
+        while not os.path.exists(args.socket):
+            if time.monotonic() > deadline or server.poll() is not None:
+                server.kill()
+                sys.exit("Сервер не запустился")
+            time.sleep(0.05)
+    try:
+        latencies, errors = [], []
+        threads = [threading.Thread(target=_client_loop, args=(args.socket, jobs[index::args.clients], latencies, errors))
+                   for index in range(args.clients)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        with CompileClient(args.socket) as client:
+            stats = client.request("stats")["result"]
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    latencies.sort()
+    report = {
+        "op": args.op,
+        "requests": len(latencies),
+        "distinct": args.distinct,
+        "clients": args.clients,
+        "errors": len(errors),
+        "seconds": round(elapsed, 4),
+        "rps": round(len(latencies) / elapsed, 1),
+        "latency": {"median": round(statistics.median(latencies), 6),
+                    "p95": round(latencies[int(len(latencies) * 0.95) - 1], 6)},
+        "server": stats,
+    }
+    print(json.dumps(report, indent=2, sort_keys=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сервер компиляции Pascal и клиент к нему")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="запустить сервер")
+    serve_parser.add_argument("--workers", type=int, default=None, help="число процессов (0 — в текущем)")
+    serve_parser.add_argument("--cache-size", type=int, default=CACHE_SIZE)
+
+    for op, title in (("parse", "разобрать программу"), ("check", "проверить программу"),
+                      ("run", "выполнить программу")):
+        op_parser = commands.add_parser(op, help=title)
+        op_parser.add_argument("source")
+        if op != "parse":
+            op_parser.add_argument("--optimize", action="store_true")
+            op_parser.add_argument("--memoize", action="store_true")
+        if op == "check":
+            op_parser.add_argument("--dump", action="store_true", help="вывести AST после проверки")
+        if op == "run":
+            op_parser.add_argument("--input", default=None, help="файл с входными данными или '-'")
+
+    bench_parser = commands.add_parser("bench", help="замер запросов в секунду")
+    bench_parser.add_argument("--op", choices=("parse", "check", "run"), default="check")
+    bench_parser.add_argument("--requests", type=int, default=1000)
+    bench_parser.add_argument("--distinct", type=int, default=50, help="число разных программ")
+    bench_parser.add_argument("--clients", type=int, default=8)
+    bench_parser.add_argument("--statements", type=int, default=20)
+    bench_parser.add_argument("--workers", type=int, default=None,
+                              help="запустить свой сервер с этим числом процессов")
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args)
+    elif args.command == "bench":
+        bench(args)
+    else:
+        args.op = args.command
+        request(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import argparse
+import sys
+
+from src.pascal.parser import PascalParserError
+from src.pascal.semantic import SemanticException
+from src.pascal.units import UnitLoader
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Предварительная компиляция модулей в файлы .pasu")
+    parser.add_argument("sources", nargs="+", help="файлы модулей .pas")
+    parser.add_argument("--path", action="append", default=[], help="каталог поиска подключаемых модулей")
+    parser.add_argument("--output-dir", default=None, help="каталог для .pasu (по умолчанию — рядом с исходником)")
+    args = parser.parse_args()
+
+    loader = UnitLoader(args.path or ["."], args.output_dir)
+    for source in args.sources:
+        try:
+            unit = loader.compile_file(source)
+        except (PascalParserError, SemanticException) as error:
+            print(f"{source}: {error}", file=sys.stderr)
+            sys.exit(1)
+        print(f"{unit.name}: функций {len(unit.functions)}, экспорт {len(unit.exports)}, {len(unit.data)} байт")
+    stats = loader.stats()
+    print(f"скомпилировано: {stats['compiled']}, загружено: {stats['loaded']}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import argparse
+import sys
+
+from src.pascal.semantic import SemanticChecker, IdentScope
+from src.pascal.stream import parse_file
+from src.ast.serialize import dump_binary, dump_jsonl
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Экспорт AST в JSON lines или двоичный формат")
+    parser.add_argument("source")
+    parser.add_argument("output")
+    parser.add_argument("--binary", action="store_true")
+    parser.add_argument("--no-check", action="store_true")
+    parser.add_argument("--dce", action="store_true", help="удалить мёртвый код перед экспортом")
+    args = parser.parse_args()
+
+    program = parse_file(args.source)
+    if not args.no_check:
+        SemanticChecker().check(program, IdentScope())
+        if args.dce:
+            from src.pascal.deadcode import eliminate_dead_code
+            print(f"Удалено: {eliminate_dead_code(program)}", file=sys.stderr)
+
+    if args.binary:
+        with open(args.output, "wb") as fp:
+            dump_binary(program, fp)
+    else:
+        with open(args.output, "w", encoding="utf-8") as fp:
+            dump_jsonl(program, fp)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,26 @@
-from pathlib import Path
+import os
+import sys
 
-from src.pascal.parser import PascalParser
 from src.pascal.semantic import SemanticChecker, IdentScope
+from src.pascal.stream import parse_file
 from src.ast.printer import dump_ast
 
 
 def main():
-    path = Path("samples/function_demo.pas")
-    if not path.exists():
-        path = Path("samples/minimal.pas")
+    if len(sys.argv) > 1:
+        path = sys.argv[1]
+    else:
+        path = "samples/function_demo.pas"
+        if not os.path.exists(path):
+            path = "samples/minimal.pas"
 
-    text = path.read_text(encoding="utf-8")
-    parser = PascalParser(text)
-    program = parser.parse_program()
+    program = parse_file(path)
 
     scope = IdentScope()
     checker = SemanticChecker()
+    if program.uses:
+        from src.pascal.units import UnitLoader
+        checker.units = UnitLoader([os.path.dirname(path) or "."])
 
     checker.check(program, scope)
     print(dump_ast(program))
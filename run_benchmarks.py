@@ -0,0 +1,197 @@
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+from src.ast.printer import dump_ast
+from src.pascal.generator import GeneratorConfig, generate_program
+from src.ast.positions import SourceMap
+from src.pascal.parser import ASTBuilder, PascalParser, load_parser
+from src.pascal.semantic import IdentDesc, IdentScope, SemanticChecker
+
+
+FORMAT = "pascal-bench"
+VERSION = 1
+
+CASES = {
+    "small": GeneratorConfig(statements=20, functions=3),
+    "medium": GeneratorConfig(statements=200, functions=10),
+    "large": GeneratorConfig(statements=1000, functions=30),
+    "deep_expr": GeneratorConfig(statements=100, functions=5, expr_depth=8),
+    "nested_loops": GeneratorConfig(statements=50, functions=5, loop_depth=4, loop_iterations=6),
+    "library": GeneratorConfig(statements=10, functions=300),
+}
+
+STAGES = ("parser_init", "parse", "build_ast", "check", "dump_ast", "execute")
+
+STARTUP_COMMAND = ("main.py", "samples/minimal.pas")
+STARTUP_TOP = 10
+
+
+def run_pipeline(text: str, engine: str, lazy: bool = False) -> dict[str, float]:
+    timings = {}
+    IdentDesc.reset_counters()
+
+    start = time.perf_counter()
+    load_parser(reuse=False)
+    parser = PascalParser(text)
+    timings["parser_init"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tree = parser.parser.parse(text, start="program")
+    timings["parse"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    program = ASTBuilder(SourceMap(text)).transform(tree)
+    timings["build_ast"] = time.perf_counter() - start
+
+    checker = SemanticChecker(lazy=lazy)
+    start = time.perf_counter()
+    checker.check(program, IdentScope())
+    timings["check"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    dump_ast(program)
+    timings["dump_ast"] = time.perf_counter() - start
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        checker.execute(program, engine=engine)
+        timings["execute"] = time.perf_counter() - start
+    return timings
+
+
+def run_case(name: str, config: GeneratorConfig, seed: int, repeat: int, engine: str, lazy: bool = False) -> dict:
+    text = generate_program(seed, config)
+    samples = {stage: [] for stage in STAGES}
+    for _ in range(repeat):
+        for stage, elapsed in run_pipeline(text, engine, lazy).items():
+            samples[stage].append(elapsed)
+    return {
+        "config": asdict(config),
+        "source_bytes": len(text.encode("utf-8")),
+        "stages": {stage: _timing(values) for stage, values in samples.items()},
+    }
+
+
+def _timing(values: list[float]) -> dict:
+    return {"min": round(min(values), 6), "median": round(statistics.median(values), 6)}
+
+
+def parse_importtime(stderr: str) -> dict[str, int]:
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit() or name[:2] == "  ":
+            continue
+        imports[name.strip()] = int(cumulative)
+    return imports
+
+
+def measure_startup(repeat: int) -> dict:
+    root = Path(__file__).resolve().parent
+    walls = {"interpreter": [], "cli": []}
+    imports = {}
+    commands = {"interpreter": [sys.executable, "-c", "pass"],
+                "cli": [sys.executable, "-X", "importtime", *STARTUP_COMMAND]}
+    for _ in range(repeat):
+        for name, command in commands.items():
+            start = time.perf_counter()
+            completed = subprocess.run(command, cwd=root, capture_output=True, text=True, check=True)
+            walls[name].append(time.perf_counter() - start)
+            if name == "cli":
+                for module, cumulative in parse_importtime(completed.stderr).items():
+                    imports.setdefault(module, []).append(cumulative)
+    top = sorted(imports.items(), key=lambda item: -min(item[1]))[:STARTUP_TOP]
+    return {
+        "command": " ".join(STARTUP_COMMAND),
+        "wall": {name: _timing(values) for name, values in walls.items()},
+        "imports": {module: round(min(values) / 1e6, 6) for module, values in top},
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_time: float) -> list[str]:
+    regressions = []
+    old_startup = baseline.get("startup", {}).get("wall", {}).get("cli")
+    new_startup = results.get("startup", {}).get("wall", {}).get("cli")
+    if old_startup and new_startup and old_startup["min"] >= min_time:
+        ratio = new_startup["min"] / old_startup["min"]
+        if ratio > 1 + threshold:
+            regressions.append(f"startup: {old_startup['min']:.6f}s -> {new_startup['min']:.6f}s (x{ratio:.2f})")
+    for name, case in results["cases"].items():
+        old_case = baseline.get("cases", {}).get(name)
+        if old_case is None:
+            continue
+        for stage, timing in case["stages"].items():
+            old = old_case["stages"].get(stage)
+            if old is None or old["min"] < min_time:
+                continue
+            ratio = timing["min"] / old["min"]
+            if ratio > 1 + threshold:
+                regressions.append(f"{name}.{stage}: {old['min']:.6f}s -> {timing['min']:.6f}s (x{ratio:.2f})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры производительности этапов компилятора")
+    parser.add_argument("--cases", nargs="*", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--engine", choices=("machine", "tree"), default="machine")
+    parser.add_argument("--lazy", action="store_true")
+    parser.add_argument("--startup", action="store_true", help="замерить запуск main.py с -X importtime")
+    parser.add_argument("--output", default="")
+    parser.add_argument("--baseline", default="")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--min-time", type=float, default=0.001)
+    args = parser.parse_args()
+
+    results = {
+        "format": FORMAT,
+        "version": VERSION,
+        "python": platform.python_version(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "engine": args.engine,
+        "lazy": args.lazy,
+        "cases": {},
+    }
+    for name in args.cases:
+        case = run_case(name, CASES[name], args.seed, args.repeat, args.engine, args.lazy)
+        results["cases"][name] = case
+        timings = "  ".join(f"{stage}={timing['min']:.4f}" for stage, timing in case["stages"].items())
+        print(f"{name:<14}{timings}")
+    if args.startup:
+        startup = results["startup"] = measure_startup(args.repeat)
+        wall = startup["wall"]
+        print(f"{'startup':<14}cli={wall['cli']['min']:.4f}  interpreter={wall['interpreter']['min']:.4f}")
+        for module, cumulative in startup["imports"].items():
+            print(f"{'':<14}{cumulative:.4f}  {module}")
+
+    text = json.dumps(results, indent=2, sort_keys=True) + "\n"
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+    else:
+        print(text, end="")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.threshold, args.min_time)
+        for line in regressions:
+            print(f"[REGRESSION] {line}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import argparse
+import json
+import sys
+
+from src.ast.printer import dump_ast
+from src.pascal.coverage import Coverage
+from src.pascal.semantic import SemanticChecker, IdentScope
+from src.pascal.stream import parse_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Покрытие операторов и ветвей при выполнении программы")
+    parser.add_argument("source")
+    parser.add_argument("--input", default=None, help="файл с входными данными или '-'")
+    parser.add_argument("--lcov", default=None, help="записать отчёт lcov в файл")
+    parser.add_argument("--json", default=None, help="записать отчёт JSON в файл ('-' — в stdout)")
+    parser.add_argument("--dump", action="store_true", help="вывести AST со счётчиками")
+    parser.add_argument("--profile", default=None, help="добавить счётчики в файл профиля")
+    args = parser.parse_args()
+
+    program = parse_file(args.source)
+    checker = SemanticChecker()
+    checker.check(program, IdentScope())
+    input_text = ""
+    if args.input is not None:
+        input_text = sys.stdin.read() if args.input == "-" else open(args.input, encoding="utf-8").read()
+
+    coverage = Coverage()
+    try:
+        checker.execute(program, input_text=input_text, coverage=coverage)
+        if args.profile is not None:
+            from src.pascal.compiled import source_hash
+            from src.pascal.profile import Profile
+            with open(args.source, encoding="utf-8") as fp:
+                digest = source_hash(fp.read())
+            Profile.from_coverage(coverage, digest).accumulate(args.profile)
+    finally:
+        if args.dump:
+            print(dump_ast(program, annotate=coverage.annotate))
+        if args.lcov is not None:
+            with open(args.lcov, "w", encoding="utf-8") as fp:
+                coverage.write_lcov(fp, args.source)
+        if args.json == "-":
+            coverage.write_json(sys.stdout)
+        elif args.json is not None:
+            with open(args.json, "w", encoding="utf-8") as fp:
+                coverage.write_json(fp)
+        summary = coverage.summary()
+        print(", ".join(f"{name}: {part['covered']}/{part['total']}" for name, part in summary.items()),
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import os
+import sys
+
+from src.pascal.fuzz import PATHS, REFERENCE, fuzz
+from src.pascal.generator import GeneratorConfig
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сверка движков выполнения на случайных программах")
+    parser.add_argument("--seeds", type=int, default=1000, help="число программ")
+    parser.add_argument("--start", type=int, default=0, help="первое зерно")
+    parser.add_argument("--workers", type=int, default=None, help="число процессов (по умолчанию — число ядер)")
+    parser.add_argument("--paths", default=None,
+                        help=f"пути выполнения через запятую из {', '.join(PATHS)}")
+    parser.add_argument("--statements", type=int, default=8, help="операторов в теле программы")
+    parser.add_argument("--functions", type=int, default=2, help="число функций")
+    parser.add_argument("--no-shrink", action="store_true", help="не уменьшать найденные программы")
+    parser.add_argument("--output", default=None, help="каталог для программ с расхождениями")
+    args = parser.parse_args()
+
+    paths = None
+    if args.paths is not None:
+        paths = [REFERENCE, *(name for name in args.paths.split(",") if name and name != REFERENCE)]
+        unknown = [name for name in paths if name not in PATHS]
+        if unknown:
+            parser.error(f"неизвестные пути: {', '.join(unknown)}")
+    if args.output is not None:
+        os.makedirs(args.output, exist_ok=True)
+
+    def report(divergence):
+        print(divergence, file=sys.stderr)
+        if args.output is None:
+            return
+        stem = os.path.join(args.output, f"seed{divergence.seed}")
+        with open(stem + ".pas", "w", encoding="utf-8") as fp:
+            fp.write(divergence.minimized or divergence.source)
+        with open(stem + ".in", "w", encoding="utf-8") as fp:
+            fp.write(divergence.input_text)
+
+    config = GeneratorConfig(statements=args.statements, functions=args.functions, block_statements=2,
+                             extended=True)
+    result = fuzz(range(args.start, args.start + args.seeds), config, args.workers, paths,
+                  not args.no_shrink, report)
+    print(result)
+    sys.exit(1 if result.divergences else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import argparse
+import sys
+
+from src.pascal.checkpoint import Checkpointing
+from src.pascal.semantic import SemanticChecker, IdentScope
+from src.pascal.stream import parse_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Выполнение долгой программы с контрольными точками")
+    parser.add_argument("source")
+    parser.add_argument("--input", default=None, help="файл с входными данными или '-'")
+    parser.add_argument("--checkpoint", default=None, help="файл контрольной точки (по умолчанию — source.ckpt)")
+    parser.add_argument("--interval", type=float, default=60.0, help="секунд между контрольными точками")
+    parser.add_argument("--no-resume", action="store_true", help="начать заново, не читая контрольную точку")
+    parser.add_argument("--memoize", action="store_true", help="запоминать результаты чистых функций")
+    args = parser.parse_args()
+
+    program = parse_file(args.source)
+    checker = SemanticChecker(memoize=args.memoize)
+    checker.check(program, IdentScope())
+    input_text = ""
+    if args.input is not None:
+        input_text = sys.stdin.read() if args.input == "-" else open(args.input, encoding="utf-8").read()
+
+    policy = Checkpointing(args.checkpoint or args.source + ".ckpt", args.interval, not args.no_resume)
+    try:
+        checker.execute(program, input_text=input_text, checkpoint=policy)
+    finally:
+        stats = checker.exec_stats
+        if stats is not None:
+            resumed = "продолжено с контрольной точки, " if stats.get("resumed") else ""
+            print(f"{resumed}шагов: {stats['steps']}, контрольных точек: {stats.get('checkpoints', 0)}",
+                  file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
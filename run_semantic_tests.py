@@ -1,7 +1,8 @@
 from pathlib import Path
 
-from src.pascal.parser import PascalParser, PascalParserError
+from src.pascal.parser import PascalParserError
 from src.pascal.semantic import SemanticChecker, IdentScope, SemanticException
+from src.pascal.stream import parse_file
 
 
 def main():
@@ -16,10 +17,8 @@ def main():
     bad = 0
 
     for path in files:
-        text = path.read_text(encoding="utf-8")
-
         try:
-            program = PascalParser(text).parse_program()
+            program = parse_file(str(path))
 
             scope = IdentScope()
             checker = SemanticChecker()
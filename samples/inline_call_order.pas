@@ -0,0 +1,22 @@
+program InlineCallOrder;
+var
+  g, r: integer;
+
+function h(): integer;
+begin
+  g := 100;
+  return 1;
+end;
+
+function f(): integer;
+var t: integer;
+begin
+  t := g;
+  return h() + t;
+end;
+
+begin
+  g := 5;
+  r := f();
+  writeln(r)
+end.
@@ -0,0 +1,24 @@
+program NestedTailCall;
+var
+  r: integer;
+
+function outer(n: integer): integer;
+var acc: integer;
+
+  function inner(k: integer): integer;
+  begin
+    acc := acc + k;
+    if k <= 0 then
+      return acc;
+    return inner(k - 1);
+  end;
+
+begin
+  acc := n;
+  return inner(3);
+end;
+
+begin
+  r := outer(10);
+  writeln(r)
+end.
@@ -0,0 +1,19 @@
+unit Fractions;
+interface
+uses MathLib;
+function reduce_num(num, den: integer): integer;
+function reduce_den(num, den: integer): integer;
+
+implementation
+
+function reduce_num(num, den: integer): integer;
+begin
+  return num div gcd(num, den);
+end;
+
+function reduce_den(num, den: integer): integer;
+begin
+  return den div gcd(num, den);
+end;
+
+end.
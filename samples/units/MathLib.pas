@@ -0,0 +1,41 @@
+unit MathLib;
+interface
+function gcd(a, b: integer): integer;
+function power(base, exp: integer): integer;
+
+implementation
+
+function absolute(x: integer): integer;
+begin
+  if x < 0 then
+    return -x;
+  return x;
+end;
+
+function gcd(a, b: integer): integer;
+var t: integer;
+begin
+  a := absolute(a);
+  b := absolute(b);
+  while b <> 0 do
+  begin
+    t := a mod b;
+    a := b;
+    b := t;
+  end;
+  return a;
+end;
+
+function power(base, exp: integer): integer;
+var result: integer;
+begin
+  result := 1;
+  while exp > 0 do
+  begin
+    result := result * base;
+    exp := exp - 1;
+  end;
+  return result;
+end;
+
+end.
@@ -0,0 +1,17 @@
+program UnitsDemo;
+uses MathLib, Fractions;
+var
+  num, den: integer;
+
+function absolute(x: integer): integer;
+begin
+  return x + 1000;
+end;
+
+begin
+  num := power(2, 10);
+  den := 96;
+  writeln(reduce_num(num, den), '/', reduce_den(num, den));
+  writeln(gcd(-12, 18));
+  writeln(absolute(1))
+end.
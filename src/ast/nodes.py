@@ -5,10 +5,45 @@ from enum import Enum
 
 
 class ASTNode:
-    row: int | None = None
-    col: int | None = None
     node_type = None
     node_ident = None
+    _source = None
+    _offset = 0
+    _row = None
+    _col = None
+
+    def _locate(self):
+        source = self._source
+        if source is not None:
+            self._row, self._col = source.position(self._offset)
+            self._source = None
+
+    @property
+    def row(self) -> int | None:
+        if self._source is not None:
+            self._locate()
+        return self._row
+
+    @row.setter
+    def row(self, value):
+        self._locate()
+        self._row = value
+
+    @property
+    def col(self) -> int | None:
+        if self._source is not None:
+            self._locate()
+        return self._col
+
+    @col.setter
+    def col(self, value):
+        self._locate()
+        self._col = value
+
+    def copy_position(self, other: "ASTNode"):
+        self._source, self._offset = other._source, other._offset
+        self._row, self._col = other._row, other._col
+        return self
 
 
 class Stmt(ASTNode):
@@ -73,6 +108,7 @@ class Cast(Expr):
 class VarDecl(ASTNode):
     ident: Ident
     type_name: str
+    temporary = False
 
 
 @dataclass
@@ -95,12 +131,14 @@ class If(Stmt):
     cond: Expr
     then_branch: CompoundStmt
     else_branch: Optional[CompoundStmt]
+    likely_then = False
 
 
 @dataclass
 class While(Stmt):
     cond: Expr
     body: CompoundStmt
+    hot = False
 
 
 @dataclass
@@ -110,6 +148,7 @@ class For(Stmt):
     direction: str
     end: Expr
     body: CompoundStmt
+    hot = False
 
 
 @dataclass
@@ -132,6 +171,15 @@ class Block(ASTNode):
 class Program(ASTNode):
     name: str
     block: Block
+    uses: List[Ident] = field(default_factory=list)
+
+
+@dataclass
+class Unit(ASTNode):
+    name: str
+    uses: List[Ident]
+    interface: List["Func"]
+    block: Block
 
 @dataclass
 class TypeConvertNode(Expr):
@@ -144,7 +192,9 @@ class Func(ASTNode):
     name: Ident
     params: List[VarDecl]
     return_type: str
-    block: Block
+    block: Optional[Block]
+    is_pure = False
+    deferred = False
 
 
 @dataclass
@@ -0,0 +1,56 @@
+from __future__ import annotations
+import re
+from array import array
+from bisect import bisect_right
+
+
+NEWLINE = re.compile(r"\n")
+NEWLINE_BYTES = re.compile(rb"\n")
+MULTIBYTE = re.compile(rb"[\x80-\xff]+")
+
+
+class SourceMap:
+    def __init__(self, text: str | bytes = ""):
+        self.text = text
+        self.wide = None
+        self._line_starts = None
+
+    def line_starts(self) -> array:
+        starts = self._line_starts
+        if starts is None:
+            pattern = NEWLINE if isinstance(self.text, str) else NEWLINE_BYTES
+            starts = self._line_starts = array("q", [0])
+            starts.extend(match.end() for match in pattern.finditer(self.text))
+        return starts
+
+    def position(self, offset: int) -> tuple[int, int]:
+        starts = self.line_starts()
+        line = bisect_right(starts, offset)
+        start = starts[line - 1]
+        text = self.text
+        if isinstance(text, str):
+            return line, offset - start + 1
+        if text is not None:
+            return line, len(text[start:offset].decode("utf-8", "replace")) + 1
+        wide = self.wide.get(line)
+        if wide is None:
+            return line, offset - start + 1
+        return line, len(wide[:offset - start].decode("utf-8", "replace")) + 1
+
+    def detach(self):
+        if self.text is None or isinstance(self.text, str):
+            return
+        starts = self.line_starts()
+        wide = self.wide = {}
+        for match in MULTIBYTE.finditer(self.text):
+            line = bisect_right(starts, match.start())
+            if line not in wide:
+                end = starts[line] - 1 if line < len(starts) else len(self.text)
+                wide[line] = bytes(self.text[starts[line - 1]:end])
+        self.text = None
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
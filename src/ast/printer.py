@@ -1,6 +1,9 @@
 from __future__ import annotations
+import io
+import sys
 from typing import Any
 from src.ast import nodes as ast
+from src.ast.walk import iter_tree
 
 
 def _type_info(node: Any) -> str:
@@ -31,6 +34,8 @@ def _label(node: Any) -> str:
         return "None"
     if isinstance(node, ast.Program):
         return f"Program {node.name}"
+    if isinstance(node, ast.Unit):
+        return f"Unit {node.name}"
     if isinstance(node, ast.Block):
         return "Block"
     if isinstance(node, ast.CompoundStmt):
@@ -42,7 +47,8 @@ def _label(node: Any) -> str:
         return f"VarDecl {node.ident.name}: {node.type_name}"
     if isinstance(node, ast.Func):
         params = ", ".join(f"{p.ident.name}: {p.type_name}" for p in node.params)
-        return f"Func {node.name.name}({params}): {node.return_type}"
+        kind = "Func" if node.block is not None else "Interface"
+        return f"{kind} {node.name.name}({params}): {node.return_type}"
     if isinstance(node, ast.Return):
         return "Return"
     if isinstance(node, ast.Assign):
@@ -76,56 +82,22 @@ def _label(node: Any) -> str:
     return type(node).__name__
 
 
-def _children(node: Any) -> list[Any]:
-    if node is None:
-        return []
-    if isinstance(node, ast.Program):
-        return [node.block]
-    if isinstance(node, ast.Block):
-        return [*node.var_decls, *node.func_decls, node.body]
-    if isinstance(node, ast.CompoundStmt):
-        return node.statements
-    if isinstance(node, ast.VarDecl):
-        return []
-    if isinstance(node, ast.Func):
-        return [*node.params, node.block]
-    if isinstance(node, ast.Return):
-        return [node.expr] if node.expr is not None else []
-    if isinstance(node, ast.Assign):
-        return [node.expr]
-    if isinstance(node, ast.If):
-        result = [node.cond, node.then_branch]
-        if node.else_branch is not None:
-            result.append(node.else_branch)
-        return result
-    if isinstance(node, ast.While):
-        return [node.cond, node.body]
-    if isinstance(node, ast.For):
-        return [node.start, node.end, node.body]
-    if isinstance(node, ast.Call):
-        return node.args
-    if isinstance(node, ast.BinOp):
-        return [node.left, node.right]
-    if isinstance(node, ast.UnOp):
-        return [node.expr]
-    if isinstance(node, ast.Cast):
-        return [node.expr]
-    if isinstance(node, ast.TypeConvertNode):
-        return [node.expr]
-    if isinstance(node, list):
-        return list(node)
-    return []
+def write_ast(node: Any, out, indent: str = "", is_last: bool = True, annotate=None):
+    parts = [indent]
+    for current, level, last in iter_tree(node, is_last):
+        del parts[level + 1:]
+        line = "".join(parts) + ("└─" if last else "├─") + _label(current) + _type_info(current)
+        if annotate is not None:
+            line += annotate(current)
+        out.write(line + "\n")
+        parts.append("  " if last else "│ ")
 
 
-def dump_ast(node: Any, indent: str = "", is_last: bool = True) -> str:
-    branch = "└─" if is_last else "├─"
-    line = indent + branch + _label(node) + _type_info(node) + "\n"
-    children = _children(node)
-    next_indent = indent + ("  " if is_last else "│ ")
-    for index, child in enumerate(children):
-        line += dump_ast(child, next_indent, index == len(children) - 1)
-    return line
+def dump_ast(node: Any, indent: str = "", is_last: bool = True, annotate=None) -> str:
+    out = io.StringIO()
+    write_ast(node, out, indent, is_last, annotate)
+    return out.getvalue()
 
 
 def print_ast(node: Any):
-    print(dump_ast(node), end="")
\ No newline at end of file
+    write_ast(node, sys.stdout)
\ No newline at end of file
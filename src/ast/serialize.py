@@ -0,0 +1,433 @@
+from __future__ import annotations
+import dataclasses
+import json
+import struct
+from enum import Enum
+from typing import Any, Iterator
+
+from src.ast import nodes as ast
+
+
+FORMAT = "pascal-ast"
+VERSION = 1
+BINARY_MAGIC = b"PASAST1\n"
+
+NODE_CLASSES = {cls.__name__: cls for cls in (
+    ast.Program, ast.Unit, ast.Block, ast.VarDecl, ast.Func, ast.CompoundStmt, ast.Assign, ast.If, ast.While,
+    ast.For, ast.Break, ast.Continue, ast.Return, ast.Call, ast.BinOp, ast.UnOp, ast.Cast,
+    ast.TypeConvertNode, ast.Ident, ast.Literal,
+)}
+
+CHILD_FIELDS = {
+    "Program": ("block", "uses"),
+    "Unit": ("uses", "interface", "block"),
+    "Block": ("var_decls", "func_decls", "body"),
+    "VarDecl": ("ident",),
+    "Func": ("name", "params", "block"),
+    "CompoundStmt": ("statements",),
+    "Assign": ("ident", "expr"),
+    "If": ("cond", "then_branch", "else_branch"),
+    "While": ("cond", "body"),
+    "For": ("ident", "start", "end", "body"),
+    "Return": ("expr",),
+    "Call": ("func", "args"),
+    "BinOp": ("left", "right"),
+    "UnOp": ("expr",),
+    "Cast": ("expr",),
+    "TypeConvertNode": ("expr",),
+}
+
+SCALAR_FIELDS = {
+    name: tuple(field.name for field in dataclasses.fields(cls)
+                if field.name not in CHILD_FIELDS.get(name, ()) and field.name != "node_type")
+    for name, cls in NODE_CLASSES.items()
+}
+
+NONE_SHAPE = -1
+NODE_SHAPE = -2
+
+
+class SerializeError(Exception):
+    pass
+
+
+def type_to_str(type_desc) -> str | None:
+    return None if type_desc is None else str(type_desc)
+
+
+def type_from_str(text: str | None):
+    if text is None:
+        return None
+    from src.pascal import semantic
+    if "(" in text:
+        ret, _, rest = text.partition("(")
+        params = [part.strip() for part in rest.rstrip(")").split(",") if part.strip()]
+        return semantic.TypeDesc(return_type=type_from_str(ret), params=[type_from_str(p) for p in params])
+    base = semantic.BaseType(text)
+    for known in (semantic.INT, semantic.BOOL, semantic.STR, semantic.VOID, semantic.DOUBLE):
+        if known.base_type == base:
+            return known
+    return semantic.TypeDesc(base)
+
+
+def _encode_scalar(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, str):
+        return str(value)
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return type_to_str(value)
+
+
+def _decode_scalar(kind: str, name: str, value):
+    if kind == "BinOp" and name == "op":
+        return ast.BinaryOpKind(value)
+    if kind == "UnOp" and name == "op":
+        return ast.UnaryOpKind(value)
+    if kind == "TypeConvertNode" and name == "target_type":
+        return type_from_str(value)
+    return value
+
+
+def iter_records(root: Any) -> Iterator[list]:
+    yield ["H", FORMAT, VERSION]
+    desc_ids = {}
+    func_keys = {}
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        kind = type(node).__name__
+        if kind not in NODE_CLASSES:
+            raise SerializeError(f"Неизвестный узел {kind}")
+        desc = getattr(node, "node_ident", None)
+        desc_id = None
+        if desc is not None:
+            desc_id = desc_ids.get(id(desc))
+            if desc_id is None:
+                desc_id = desc_ids[id(desc)] = len(desc_ids)
+                func_node = getattr(desc, "func_node", None)
+                func_key = None
+                if func_node is not None:
+                    func_key = func_keys.setdefault(id(func_node), len(func_keys))
+                yield ["D", desc_id, desc.name, type_to_str(desc.type), desc.scope_type, desc.num,
+                       desc.built_in, func_key]
+        shapes = []
+        pending = []
+        for name in CHILD_FIELDS.get(kind, ()):
+            value = getattr(node, name)
+            if value is None:
+                shapes.append(NONE_SHAPE)
+            elif isinstance(value, list):
+                shapes.append(len(value))
+                pending.extend(value)
+            else:
+                shapes.append(NODE_SHAPE)
+                pending.append(value)
+        extra = func_key = None
+        if isinstance(node, ast.Func):
+            extra = node.is_pure
+            func_key = func_keys.setdefault(id(node), len(func_keys))
+        yield ["N", kind, node.row, node.col, type_to_str(node.node_type), desc_id,
+               [_encode_scalar(getattr(node, name)) for name in SCALAR_FIELDS[kind]], shapes, extra, func_key]
+        stack.extend(reversed(pending))
+
+
+class _Pending:
+    __slots__ = ("kind", "record", "slots", "values", "current")
+
+    def __init__(self, kind, record, shapes):
+        self.kind = kind
+        self.record = record
+        self.slots = list(shapes)
+        self.values = []
+        self.current = None
+
+    def next_slot(self):
+        while self.slots:
+            shape = self.slots[0]
+            if shape == NONE_SHAPE:
+                self.values.append(None)
+                self.slots.pop(0)
+            elif shape == NODE_SHAPE:
+                return True
+            elif self.current is None:
+                if shape == 0:
+                    self.values.append([])
+                    self.slots.pop(0)
+                    continue
+                self.current = []
+                return True
+            else:
+                return True
+        return False
+
+    def deliver(self, node):
+        shape = self.slots[0]
+        if shape == NODE_SHAPE:
+            self.values.append(node)
+            self.slots.pop(0)
+            return
+        self.current.append(node)
+        if len(self.current) == shape:
+            self.values.append(self.current)
+            self.current = None
+            self.slots.pop(0)
+
+
+def build_tree(records, resolve=None) -> Any:
+    from src.pascal.semantic import IdentDesc
+    descs = {}
+    func_links = []
+    funcs = {}
+    stack = []
+    root = None
+    seen_header = False
+
+    def finish(item: _Pending):
+        kind = item.kind
+        record = item.record
+        cls = NODE_CLASSES[kind]
+        kwargs = dict(zip(CHILD_FIELDS.get(kind, ()), item.values))
+        for name, value in zip(SCALAR_FIELDS[kind], record[6]):
+            kwargs[name] = _decode_scalar(kind, name, value)
+        node = cls(**kwargs)
+        node._row, node._col = record[2], record[3]
+        node.node_type = type_from_str(record[4])
+        if record[5] is not None:
+            node.node_ident = descs[record[5]]
+        if kind == "Func":
+            node.is_pure = bool(record[8])
+            funcs[record[9]] = node
+        return node
+
+    for record in records:
+        tag = record[0]
+        if tag == "H":
+            if record[1] != FORMAT or record[2] != VERSION:
+                raise SerializeError(f"Неподдерживаемый формат {record[1]} v{record[2]}")
+            seen_header = True
+            continue
+        if not seen_header:
+            raise SerializeError("Нет заголовка")
+        if tag == "D":
+            desc = IdentDesc(record[2], type_from_str(record[3]), record[4], record[5])
+            desc.built_in = record[6]
+            replacement = resolve(desc) if resolve is not None and desc.scope_type == "func" else None
+            if replacement is not None:
+                desc = replacement
+            elif record[7] is not None:
+                func_links.append((desc, record[7]))
+            descs[record[1]] = desc
+            continue
+        if tag != "N":
+            raise SerializeError(f"Неизвестная запись {tag}")
+        if record[1] not in NODE_CLASSES:
+            raise SerializeError(f"Неизвестный узел {record[1]}")
+        item = _Pending(record[1], record, record[7])
+        while True:
+            if item.next_slot():
+                stack.append(item)
+                break
+            node = finish(item)
+            if not stack:
+                root = node
+                break
+            parent = stack[-1]
+            parent.deliver(node)
+            stack.pop()
+            item = parent
+    if stack or root is None:
+        raise SerializeError("Неожиданный конец потока")
+    for desc, func_key in func_links:
+        desc.func_node = funcs.get(func_key)
+    return root
+
+
+def dump_jsonl(root: Any, fp):
+    for record in iter_records(root):
+        fp.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+        fp.write("\n")
+
+
+def iter_jsonl(fp) -> Iterator[list]:
+    for line in fp:
+        if line.strip():
+            yield json.loads(line)
+
+
+def load_jsonl(fp) -> Any:
+    return build_tree(iter_jsonl(fp))
+
+
+_DOUBLE = struct.Struct("<d")
+(T_NONE, T_FALSE, T_TRUE, T_INT, T_FLOAT, T_STR, T_STR_REF, T_LIST) = range(8)
+
+
+class _BinaryWriter:
+    def __init__(self, fp):
+        self.fp = fp
+        self.strings = {}
+        self.buffer = bytearray()
+
+    def varint(self, value: int):
+        buffer = self.buffer
+        while value > 0x7F:
+            buffer.append((value & 0x7F) | 0x80)
+            value >>= 7
+        buffer.append(value)
+
+    def value(self, value):
+        buffer = self.buffer
+        if value is None:
+            buffer.append(T_NONE)
+        elif value is True:
+            buffer.append(T_TRUE)
+        elif value is False:
+            buffer.append(T_FALSE)
+        elif isinstance(value, int):
+            buffer.append(T_INT)
+            self.varint(value * 2 if value >= 0 else -value * 2 - 1)
+        elif isinstance(value, float):
+            buffer.append(T_FLOAT)
+            buffer += _DOUBLE.pack(value)
+        elif isinstance(value, str):
+            index = self.strings.get(value)
+            if index is None:
+                self.strings[value] = len(self.strings)
+                data = value.encode("utf-8")
+                buffer.append(T_STR)
+                self.varint(len(data))
+                buffer += data
+            else:
+                buffer.append(T_STR_REF)
+                self.varint(index)
+        elif isinstance(value, list):
+            buffer.append(T_LIST)
+            self.varint(len(value))
+            for item in value:
+                self.value(item)
+        else:
+            raise SerializeError(f"Нельзя сериализовать {type(value).__name__}")
+
+    def record(self, record):
+        self.value(record)
+        if len(self.buffer) >= 1 << 16:
+            self.flush()
+
+    def flush(self):
+        self.fp.write(bytes(self.buffer))
+        self.buffer.clear()
+
+
+def _decode(data: bytes, pos: int, strings: list):
+    tag = data[pos]
+    pos += 1
+    if tag == T_LIST or tag == T_INT or tag == T_STR or tag == T_STR_REF:
+        raw = data[pos]
+        pos += 1
+        if raw > 0x7F:
+            raw &= 0x7F
+            shift = 7
+            while True:
+                byte = data[pos]
+                pos += 1
+                raw |= (byte & 0x7F) << shift
+                if byte < 0x80:
+                    break
+                shift += 7
+        if tag == T_LIST:
+            items = []
+            for _ in range(raw):
+                item, pos = _decode(data, pos, strings)
+                items.append(item)
+            return items, pos
+        if tag == T_INT:
+            return (raw >> 1 if not raw & 1 else -((raw + 1) >> 1)), pos
+        if tag == T_STR_REF:
+            return strings[raw], pos
+        end = pos + raw
+        if end > len(data):
+            raise IndexError(end)
+        text = data[pos:end].decode("utf-8")
+        strings.append(text)
+        return text, end
+    if tag == T_NONE:
+        return None, pos
+    if tag == T_TRUE:
+        return True, pos
+    if tag == T_FALSE:
+        return False, pos
+    if tag == T_FLOAT:
+        if pos + 8 > len(data):
+            raise IndexError(pos)
+        return _DOUBLE.unpack_from(data, pos)[0], pos + 8
+    raise SerializeError(f"Неизвестный тег {tag}")
+
+
+class _BinaryReader:
+    def __init__(self, fp, chunk_size: int = 1 << 16):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.data = b""
+        self.pos = 0
+        self.eof = False
+        self.strings = []
+
+    def _fill(self, size: int) -> bool:
+        while len(self.data) - self.pos < size and not self.eof:
+            chunk = self.fp.read(max(self.chunk_size, size))
+            if not chunk:
+                self.eof = True
+                break
+            self.data = self.data[self.pos:] + chunk
+            self.pos = 0
+        return len(self.data) - self.pos >= size
+
+    def raw(self, size: int) -> bytes:
+        if not self._fill(size):
+            raise SerializeError("Неожиданный конец потока")
+        data = self.data[self.pos:self.pos + size]
+        self.pos += size
+        return data
+
+    def records(self) -> Iterator[list]:
+        strings = self.strings
+        want = self.chunk_size
+        while self._fill(1):
+            self._fill(want)
+            data = self.data
+            pos = self.pos
+            end = len(data)
+            while pos < end:
+                mark = len(strings)
+                try:
+                    record, next_pos = _decode(data, pos, strings)
+                except IndexError:
+                    del strings[mark:]
+                    if self.eof:
+                        raise SerializeError("Неожиданный конец потока")
+                    want = max(want, (end - pos) * 2)
+                    break
+                pos = next_pos
+                yield record
+            self.pos = pos
+
+
+def dump_binary(root: Any, fp):
+    fp.write(BINARY_MAGIC)
+    writer = _BinaryWriter(fp)
+    for record in iter_records(root):
+        writer.record(record)
+    writer.flush()
+
+
+def iter_binary(fp) -> Iterator[list]:
+    reader = _BinaryReader(fp)
+    if reader.raw(len(BINARY_MAGIC)) != BINARY_MAGIC:
+        raise SerializeError("Неверная сигнатура файла")
+    yield from reader.records()
+
+
+def load_binary(fp) -> Any:
+    return build_tree(iter_binary(fp))
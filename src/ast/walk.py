@@ -0,0 +1,147 @@
+from __future__ import annotations
+from types import GeneratorType
+from typing import Any, Iterator
+
+from src.ast import nodes as ast
+
+
+def children(node: Any) -> list[Any]:
+    if node is None:
+        return []
+    if isinstance(node, ast.Program):
+        return [*node.uses, node.block]
+    if isinstance(node, ast.Unit):
+        return [*node.uses, *node.interface, node.block]
+    if isinstance(node, ast.Block):
+        return [*node.var_decls, *node.func_decls, node.body]
+    if isinstance(node, ast.CompoundStmt):
+        return node.statements
+    if isinstance(node, ast.VarDecl):
+        return []
+    if isinstance(node, ast.Func):
+        return [*node.params, node.block] if node.block is not None else list(node.params)
+    if isinstance(node, ast.Return):
+        return [node.expr] if node.expr is not None else []
+    if isinstance(node, ast.Assign):
+        return [node.expr]
+    if isinstance(node, ast.If):
+        result = [node.cond, node.then_branch]
+        if node.else_branch is not None:
+            result.append(node.else_branch)
+        return result
+    if isinstance(node, ast.While):
+        return [node.cond, node.body]
+    if isinstance(node, ast.For):
+        return [node.start, node.end, node.body]
+    if isinstance(node, ast.Call):
+        return node.args
+    if isinstance(node, ast.BinOp):
+        return [node.left, node.right]
+    if isinstance(node, ast.UnOp):
+        return [node.expr]
+    if isinstance(node, ast.Cast):
+        return [node.expr]
+    if isinstance(node, ast.TypeConvertNode):
+        return [node.expr]
+    if isinstance(node, list):
+        return list(node)
+    return []
+
+
+def iter_tree(root: Any, is_last: bool = True) -> Iterator[tuple[Any, int, bool]]:
+    stack = [(root, 0, is_last)]
+    while stack:
+        node, level, is_last = stack.pop()
+        yield node, level, is_last
+        items = children(node)
+        last = len(items) - 1
+        for index in range(last, -1, -1):
+            stack.append((items[index], level + 1, index == last))
+
+
+def iter_nodes(body: ast.CompoundStmt):
+    for node, _, _ in iter_tree(body):
+        yield node
+        if isinstance(node, (ast.Assign, ast.For)):
+            yield node.ident
+
+
+def iter_expressions(root):
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node is None:
+            continue
+        yield node
+        if isinstance(node, ast.BinOp):
+            stack.extend((node.left, node.right))
+        elif isinstance(node, (ast.UnOp, ast.Cast, ast.TypeConvertNode)):
+            stack.append(node.expr)
+        elif isinstance(node, ast.Call):
+            stack.extend(node.args)
+
+
+def statement_exprs(stmt):
+    if isinstance(stmt, ast.Assign):
+        return [stmt.expr]
+    if isinstance(stmt, (ast.If, ast.While)):
+        return [stmt.cond]
+    if isinstance(stmt, ast.For):
+        return [stmt.start, stmt.end]
+    if isinstance(stmt, ast.Return):
+        return [stmt.expr]
+    if isinstance(stmt, ast.Call):
+        return [stmt]
+    return []
+
+
+def _nested_compounds(stmt):
+    if isinstance(stmt, ast.CompoundStmt):
+        return [stmt]
+    if isinstance(stmt, ast.If):
+        return [stmt.then_branch] if stmt.else_branch is None else [stmt.then_branch, stmt.else_branch]
+    if isinstance(stmt, (ast.While, ast.For)):
+        return [stmt.body]
+    return []
+
+
+def iter_compounds(body: ast.CompoundStmt):
+    stack = [body]
+    while stack:
+        compound = stack.pop()
+        yield compound
+        for stmt in compound.statements:
+            stack.extend(_nested_compounds(stmt))
+
+
+def iter_statements(body: ast.CompoundStmt):
+    for compound in iter_compounds(body):
+        yield from compound.statements
+
+
+def iter_blocks(program: ast.Program):
+    stack = [(program.block, None)]
+    while stack:
+        block, func = stack.pop()
+        yield block, func
+        stack.extend((nested.block, nested) for nested in reversed(block.func_decls))
+
+
+def trampoline(task: Any) -> Any:
+    if not isinstance(task, GeneratorType):
+        return task
+    stack = [task]
+    value = None
+    while stack:
+        try:
+            sub = stack[-1].send(value)
+        except StopIteration as stop:
+            stack.pop()
+            value = stop.value
+            continue
+        if isinstance(sub, GeneratorType):
+            stack.append(sub)
+            value = None
+        else:
+            value = sub
+    return value
@@ -0,0 +1,144 @@
+from __future__ import annotations
+import json
+import os
+import zlib
+from dataclasses import dataclass, field
+
+from src.ast.serialize import SerializeError
+from src.pascal.semantic import MemoCache, SemanticException, memo_label
+
+
+FORMAT = "pascal-checkpoint"
+VERSION = 2
+
+
+@dataclass
+class Checkpointing:
+    path: str
+    interval: float = 60.0
+    resume: bool = True
+
+
+@dataclass
+class Checkpoint:
+    fingerprint: str
+    steps: int = 0
+    state: dict = field(default_factory=dict)
+
+    def __str__(self):
+        return (f"контрольная точка: шагов {self.steps}, кадров {len(self.state.get('frames', ()))}, "
+                f"вывод {len(self.state.get('output', ''))} символов")
+
+    @classmethod
+    def capture(cls, machine) -> "Checkpoint":
+        code = machine.program_code
+        unit_index = {id(unit): index for index, unit in enumerate(code.units)}
+        func_index = {id(unit.func): index for index, unit in enumerate(code.units) if unit.func is not None}
+        frames = [*machine.frames, machine.frame]
+        frame_index = {id(frame): index for index, frame in enumerate(frames)}
+        for frame in frames:
+            link = frame.link
+            while link is not None and id(link) not in frame_index:
+                frame_index[id(link)] = len(frames)
+                frames.append(link)
+                link = link.link
+        cache_index = {id(cache): func_index[func_id] for func_id, cache in machine.memo_caches.items()
+                       if func_id in func_index}
+        records = []
+        for frame in frames:
+            memo = None
+            if frame.memo is not None:
+                memo = [[cache_index[id(cache)], list(key)] for cache, key in frame.memo]
+            link = frame_index[id(frame.link)] if frame.link is not None else None
+            records.append([unit_index[id(frame.unit)], frame.pc, list(frame.slots), list(frame.stack), link, memo])
+        caches = [[func_index[func_id], cache.maxsize, cache.hits, cache.misses,
+                   [[list(key), value] for key, value in cache.entries.items()]]
+                  for func_id, cache in machine.memo_caches.items() if func_id in func_index]
+        state = {
+            "frames": records,
+            "active": len(machine.frames) + 1,
+            "max_depth": machine.max_depth,
+            "output": ''.join(machine.output),
+            "output_bytes": machine.output_bytes,
+            "input": [machine.input.data[machine.input.pos:], machine.input.eof],
+            "memo": caches,
+        }
+        if code.coverage is not None:
+            state["coverage"] = list(code.coverage.counts)
+        return cls(code.fingerprint(), machine.steps, state)
+
+    def restore(self, machine):
+        from src.pascal.machine import _Frame
+        code = machine.program_code
+        if self.fingerprint != code.fingerprint():
+            raise SemanticException("Контрольная точка записана для другой программы")
+        state = self.state
+        if ("coverage" in state) != (code.coverage is not None):
+            raise SemanticException("Контрольная точка и программа расходятся в сборе покрытия")
+        units = code.units
+        caches = {}
+        for index, maxsize, hits, misses, entries in state["memo"]:
+            cache = MemoCache(maxsize, memo_label(units[index].func))
+            cache.hits = hits
+            cache.misses = misses
+            for key, value in entries:
+                cache.entries[tuple(key)] = value
+            caches[id(units[index].func)] = cache
+        frames = [_Frame(units[record[0]], record[2], None) for record in state["frames"]]
+        for frame, (_, pc, _, stack, link, memo) in zip(frames, state["frames"]):
+            frame.pc = pc
+            frame.stack = stack
+            frame.link = frames[link] if link is not None else None
+            if memo is not None and machine.memoize:
+                frame.memo = []
+                for index, key in memo:
+                    func = units[index].func
+                    cache = caches.get(id(func))
+                    if cache is None:
+                        cache = caches[id(func)] = MemoCache(machine.memo_size, memo_label(func))
+                    frame.memo.append((cache, tuple(key)))
+        active = state["active"]
+        machine.frames[:] = frames[:active - 1]
+        machine.frame = frames[active - 1]
+        machine.max_depth = state["max_depth"]
+        machine.steps = self.steps
+        machine.output[:] = [state["output"]] if state["output"] else []
+        machine.output_bytes = state["output_bytes"]
+        machine.input.data, machine.input.eof = state["input"]
+        machine.input.pos = 0
+        if machine.memoize:
+            machine.memo_caches.update(caches)
+        if code.coverage is not None:
+            code.coverage.counts[:] = state["coverage"]
+
+    def write(self, fp):
+        header = {"format": FORMAT, "version": VERSION, "fingerprint": self.fingerprint, "steps": self.steps}
+        fp.write(json.dumps(header, sort_keys=True).encode("utf-8") + b"\n")
+        fp.write(zlib.compress(json.dumps(self.state, ensure_ascii=False, separators=(",", ":")).encode("utf-8")))
+
+    @classmethod
+    def read(cls, fp) -> "Checkpoint":
+        try:
+            header = json.loads(fp.readline())
+        except ValueError as error:
+            raise SerializeError("Повреждённый заголовок контрольной точки") from error
+        if not isinstance(header, dict) or header.get("format") != FORMAT or header.get("version") != VERSION:
+            raise SerializeError("Неподдерживаемый формат контрольной точки")
+        try:
+            state = json.loads(zlib.decompress(fp.read()))
+        except (ValueError, zlib.error) as error:
+            raise SerializeError("Повреждённая контрольная точка") from error
+        return cls(header["fingerprint"], header["steps"], state)
+
+    def save(self, path: str):
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as fp:
+            self.write(fp)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> "Checkpoint":
+        with open(path, "rb") as fp:
+            return cls.read(fp)
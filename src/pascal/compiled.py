@@ -0,0 +1,117 @@
+from __future__ import annotations
+import hashlib
+from dataclasses import dataclass
+
+from src.ast import nodes as ast
+from src.pascal.parser import PascalParser
+from src.pascal.purity import mark_pure_functions
+from src.pascal.semantic import IdentScope, InputBuffer, SemanticChecker
+
+
+@dataclass(frozen=True)
+class RunResult:
+    output: str
+    globals: dict
+    stats: dict
+
+
+def source_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CompiledProgram:
+    __slots__ = ("source_hash", "program", "memoize", "optimizations", "_code")
+
+    def __init__(self, program: ast.Program, source_hash: str = "", memoize: bool = False,
+                 optimizations: dict | None = None):
+        object.__setattr__(self, "source_hash", source_hash)
+        object.__setattr__(self, "program", program)
+        object.__setattr__(self, "memoize", memoize)
+        object.__setattr__(self, "optimizations", dict(optimizations or {}))
+        object.__setattr__(self, "_code", None)
+
+    @classmethod
+    def from_source(cls, text: str, memoize: bool = False, optimize: bool = False,
+                    profile=None, units=None) -> "CompiledProgram":
+        program = PascalParser(text).parse_program()
+        return cls.from_program(program, source_hash(text), memoize, optimize, profile, units)
+
+    @classmethod
+    def from_program(cls, program: ast.Program, digest: str = "", memoize: bool = False, optimize: bool = False,
+                     profile=None, units=None) -> "CompiledProgram":
+        SemanticChecker(units=units).check(program, IdentScope())
+        optimizations = {}
+        heat = None
+        if profile is not None:
+            from src.pascal.profile import apply_profile
+            heat, optimizations["profile"] = apply_profile(program, profile, digest)
+            if optimizations["profile"].stale:
+                heat = None
+        if optimize:
+            from src.pascal.cse import eliminate_common_subexpressions
+            from src.pascal.deadcode import eliminate_dead_code
+            from src.pascal.inline import inline_functions
+            optimizations["inline"] = inline_functions(program, heat=heat)
+            optimizations["dead_code"] = eliminate_dead_code(program)
+            optimizations["cse"] = eliminate_common_subexpressions(program, heat)
+        mark_pure_functions(program)
+        compiled = cls(program, digest, memoize, optimizations)
+        compiled._build()
+        return compiled
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledProgram неизменяем")
+
+    def __delattr__(self, name):
+        raise AttributeError("CompiledProgram неизменяем")
+
+    def __getstate__(self):
+        return {"source_hash": self.source_hash, "program": self.program, "memoize": self.memoize,
+                "optimizations": self.optimizations}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "_code", None)
+
+    def _build(self):
+        from src.pascal.machine import ProgramCode
+        code = ProgramCode(self.program)
+        object.__setattr__(self, "_code", code)
+        return code
+
+    @property
+    def code(self):
+        code = self._code
+        if code is None:
+            code = self._build()
+        return code
+
+    def machine(self, input_text: str = "", limits=None, echo: bool = False, input_buffer=None, coverage=None,
+                checkpoint=None):
+        from src.pascal.machine import Machine, ProgramCode
+        buffer = input_buffer if input_buffer is not None else InputBuffer(input_text)
+        code = self.code if coverage is None else ProgramCode(self.program, coverage)
+        return Machine(code, memoize=self.memoize, limits=limits, input_buffer=buffer, echo=echo,
+                       checkpoint=checkpoint)
+
+    @staticmethod
+    def _result(machine, env) -> RunResult:
+        values = {str(name): value for name, value in env.items()
+                  if name != "__parent__" and not isinstance(value, ast.Func)}
+        return RunResult(''.join(machine.output), values, machine.stats())
+
+    def run(self, input_text: str = "", limits=None, echo: bool = False, coverage=None,
+            checkpoint=None) -> RunResult:
+        machine = self.machine(input_text, limits, echo, coverage=coverage, checkpoint=checkpoint)
+        return self._result(machine, machine.run())
+
+    async def run_async(self, reader=None, writer=None, yield_every: int = 1000, limits=None) -> RunResult:
+        machine = self.machine(limits=limits, input_buffer=InputBuffer(eof=reader is None))
+        env = await machine.run_async(reader, writer, yield_every)
+        return self._result(machine, env)
+
+
+def compile_program(text: str, memoize: bool = False, optimize: bool = False, profile=None,
+                    units=None) -> CompiledProgram:
+    return CompiledProgram.from_source(text, memoize, optimize, profile, units)
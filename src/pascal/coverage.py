@@ -0,0 +1,136 @@
+from __future__ import annotations
+import json
+from dataclasses import dataclass
+
+from src.ast import nodes as ast
+
+
+BRANCH_KINDS = (ast.If, ast.While, ast.For)
+BRANCH_LABELS = {"If": ("then", "else"), "While": ("тело", "выход"), "For": ("тело", "выход")}
+
+
+@dataclass
+class CoverageSite:
+    kind: str
+    node: object
+    row: int | None
+    col: int | None
+    counter: int
+    branch: int | None = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.row}:{self.col}"
+
+
+class Coverage:
+    def __init__(self):
+        self.counts = []
+        self.statements = []
+        self.branches = []
+        self.functions = []
+        self._sites = {}
+
+    def _counter(self) -> int:
+        self.counts.append(0)
+        return len(self.counts) - 1
+
+    def statement(self, node) -> int:
+        site = CoverageSite(type(node).__name__, node, node.row, node.col, self._counter())
+        if isinstance(node, BRANCH_KINDS):
+            site.branch = self._counter()
+            self._counter()
+            self.branches.append(site)
+        self.statements.append(site)
+        self._sites[id(node)] = site
+        return site.counter
+
+    def function(self, func: ast.Func) -> int:
+        site = CoverageSite(str(func.name.name), func, func.row, func.col, self._counter())
+        self.functions.append(site)
+        self._sites[id(func)] = site
+        return site.counter
+
+    def branch_counters(self, node) -> tuple[int, int]:
+        site = self._sites[id(node)]
+        return site.branch, site.branch + 1
+
+    def hits(self, node) -> int | None:
+        site = self._sites.get(id(node))
+        return self.counts[site.counter] if site is not None else None
+
+    def taken(self, node) -> tuple[int, int] | None:
+        site = self._sites.get(id(node))
+        if site is None or site.branch is None:
+            return None
+        return self.counts[site.branch], self.counts[site.branch + 1]
+
+    def reset(self):
+        self.counts[:] = [0] * len(self.counts)
+
+    def summary(self) -> dict:
+        executed = sum(1 for site in self.statements if self.counts[site.counter])
+        edges = sum(1 for site in self.branches for index in (0, 1) if self.counts[site.branch + index])
+        called = sum(1 for site in self.functions if self.counts[site.counter])
+        return {
+            "statements": {"total": len(self.statements), "covered": executed},
+            "branches": {"total": 2 * len(self.branches), "covered": edges},
+            "functions": {"total": len(self.functions), "covered": called},
+        }
+
+    def to_json(self) -> dict:
+        counts = self.counts
+        return {
+            "statements": [{"pos": site.key, "kind": site.kind, "hits": counts[site.counter]}
+                           for site in self.statements],
+            "branches": [{"pos": site.key, "kind": site.kind,
+                          "taken": [counts[site.branch], counts[site.branch + 1]]}
+                         for site in self.branches],
+            "functions": [{"pos": site.key, "name": site.kind, "calls": counts[site.counter]}
+                          for site in self.functions],
+            "summary": self.summary(),
+        }
+
+    def write_json(self, fp):
+        json.dump(self.to_json(), fp, ensure_ascii=False, indent=2)
+        fp.write("\n")
+
+    def write_lcov(self, fp, source: str = "program.pas"):
+        counts = self.counts
+        fp.write(f"SF:{source}\n")
+        for site in self.functions:
+            fp.write(f"FN:{site.row or 0},{site.kind}\n")
+        for site in self.functions:
+            fp.write(f"FNDA:{counts[site.counter]},{site.kind}\n")
+        fp.write(f"FNF:{len(self.functions)}\n")
+        fp.write(f"FNH:{sum(1 for site in self.functions if counts[site.counter])}\n")
+        blocks = {}
+        for site in self.branches:
+            block = blocks[site.row] = blocks.get(site.row, -1) + 1
+            reached = counts[site.counter]
+            for index in (0, 1):
+                taken = counts[site.branch + index] if reached else "-"
+                fp.write(f"BRDA:{site.row or 0},{block},{index},{taken}\n")
+        fp.write(f"BRF:{2 * len(self.branches)}\n")
+        fp.write(f"BRH:{sum(1 for site in self.branches for index in (0, 1) if counts[site.branch + index])}\n")
+        lines = {}
+        for site in self.statements:
+            if site.row is not None:
+                lines[site.row] = max(lines.get(site.row, 0), counts[site.counter])
+        for row in sorted(lines):
+            fp.write(f"DA:{row},{lines[row]}\n")
+        fp.write(f"LF:{len(lines)}\n")
+        fp.write(f"LH:{sum(1 for hits in lines.values() if hits)}\n")
+        fp.write("end_of_record\n")
+
+    def annotate(self, node) -> str:
+        site = self._sites.get(id(node))
+        if site is None:
+            return ""
+        hits = self.counts[site.counter]
+        if site.branch is None:
+            label = "вызовов" if isinstance(node, ast.Func) else "выполнено"
+            return f" {{{label}: {hits}}}"
+        first, second = BRANCH_LABELS[site.kind]
+        return (f" {{выполнено: {hits}, {first}: {self.counts[site.branch]}, "
+                f"{second}: {self.counts[site.branch + 1]}}}")
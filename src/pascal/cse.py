@@ -0,0 +1,272 @@
+from __future__ import annotations
+from dataclasses import dataclass
+
+from src.ast import nodes as ast
+from src.ast.walk import iter_blocks, iter_expressions, iter_statements, trampoline
+from src.pascal.deadcode import cannot_fail
+from src.pascal.semantic import BOOL, DOUBLE, INT, STR, IdentDesc
+
+
+TYPE_NAMES = ((INT, "integer"), (DOUBLE, "double"), (BOOL, "boolean"), (STR, "char"))
+CANDIDATES = (ast.BinOp, ast.UnOp, ast.Cast, ast.TypeConvertNode)
+READS = ("read", "readln")
+
+
+@dataclass
+class CSEReport:
+    temporaries: int = 0
+    reuses: int = 0
+    nodes: int = 0
+
+    def __str__(self):
+        return f"временных: {self.temporaries}, повторов: {self.reuses}, узлов: {self.nodes}"
+
+
+def _type_name(type_) -> str | None:
+    for known, name in TYPE_NAMES:
+        if type_ == known:
+            return name
+    return None
+
+
+def _has_effects(stmt) -> bool:
+    for expr in _roots(stmt):
+        for node in iter_expressions(expr):
+            if isinstance(node, ast.Call):
+                desc = node.func.node_ident
+                if desc is None or not desc.built_in or node.func.name in READS:
+                    return True
+    return False
+
+
+def _roots(stmt) -> list:
+    if isinstance(stmt, ast.Assign):
+        return [stmt.expr]
+    if isinstance(stmt, ast.Return):
+        return [stmt.expr] if stmt.expr is not None else []
+    if isinstance(stmt, ast.Call):
+        return list(stmt.args)
+    if isinstance(stmt, ast.If):
+        return [stmt.cond]
+    if isinstance(stmt, ast.For):
+        return [stmt.start, stmt.end]
+    return []
+
+
+def _writes(stmt) -> list:
+    if isinstance(stmt, ast.Assign):
+        return [stmt.ident.node_ident]
+    if isinstance(stmt, ast.Call) and stmt.func.name in READS:
+        return [arg.node_ident for arg in stmt.args if isinstance(arg, ast.Ident)]
+    return []
+
+
+class _Run:
+    def __init__(self):
+        self.versions = {}
+        self.epoch = 0
+        self.keys = {}
+        self.counts = {}
+
+    def key(self, node):
+        if isinstance(node, ast.Literal):
+            return ("lit", type(node.value), node.value)
+        if isinstance(node, ast.Ident):
+            desc = node.node_ident
+            return ("var", id(desc), self.versions.get(id(desc), 0), self.epoch)
+        if isinstance(node, ast.BinOp):
+            return ("bin", node.op, self.keys.get(id(node.left)), self.keys.get(id(node.right)))
+        if isinstance(node, ast.UnOp):
+            return ("un", node.op, self.keys.get(id(node.expr)))
+        if isinstance(node, ast.Cast):
+            return ("cast", node.type_name, self.keys.get(id(node.expr)))
+        if isinstance(node, ast.TypeConvertNode):
+            return ("conv", str(node.target_type), self.keys.get(id(node.expr)))
+        return None
+
+    def number(self, root):
+        stack = [(root, False)]
+        while stack:
+            node, ready = stack.pop()
+            if node is None:
+                continue
+            if not ready and isinstance(node, CANDIDATES):
+                stack.append((node, True))
+                stack.extend((child, False) for child in _children(node))
+                continue
+            key = self.key(node)
+            if key is not None and None in key[2:]:
+                key = None
+            self.keys[id(node)] = key
+
+
+def _children(node) -> list:
+    if isinstance(node, ast.BinOp):
+        return [node.left, node.right]
+    if isinstance(node, (ast.UnOp, ast.Cast, ast.TypeConvertNode)):
+        return [node.expr]
+    if isinstance(node, ast.Call):
+        return list(node.args)
+    return []
+
+
+def _eligible(node) -> bool:
+    return isinstance(node, CANDIDATES) and _type_name(node.node_type) is not None and cannot_fail(node)
+
+
+class _BlockCSE:
+    def __init__(self, block: ast.Block, scope_type: str, names: set[str], report: CSEReport, heat=None):
+        self.block = block
+        self.scope_type = scope_type
+        self.names = names
+        self.report = report
+        self.heat = heat
+
+    def run(self):
+        stack = [self.block.body]
+        while stack:
+            compound = stack.pop()
+            statements = []
+            pending = []
+            for stmt in compound.statements:
+                pending.append(stmt)
+                if isinstance(stmt, (ast.If, ast.While, ast.For, ast.CompoundStmt)):
+                    statements.extend(self.rewrite(pending))
+                    pending = []
+                    if isinstance(stmt, ast.If):
+                        stack.append(stmt.then_branch)
+                        if stmt.else_branch is not None:
+                            stack.append(stmt.else_branch)
+                    elif isinstance(stmt, (ast.While, ast.For)):
+                        stack.append(stmt.body)
+                    else:
+                        stack.append(stmt)
+            statements.extend(self.rewrite(pending))
+            compound.statements = statements
+
+    def rewrite(self, statements: list) -> list:
+        if self.heat is not None and all(self.heat.cold(stmt) for stmt in statements):
+            return statements
+        run = _Run()
+        eligible = []
+        for stmt in statements:
+            effects = _has_effects(stmt)
+            roots = [] if effects or isinstance(stmt, ast.While) else _roots(stmt)
+            for root in roots:
+                run.number(root)
+            eligible.append(not effects)
+            for root in roots:
+                self.count(run, root)
+            for desc in _writes(stmt):
+                run.versions[id(desc)] = run.versions.get(id(desc), 0) + 1
+            if effects:
+                run.epoch += 1
+        shared = {key for key, count in run.counts.items() if count > 1}
+        if not shared:
+            return statements
+        temps = {}
+        result = []
+        for stmt, ok in zip(statements, eligible):
+            prelude = []
+            if ok and not isinstance(stmt, ast.While):
+                self.replace_roots(stmt, run, shared, temps, prelude)
+            result.extend(prelude)
+            result.append(stmt)
+        return result
+
+    @staticmethod
+    def count(run: _Run, root):
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            key = run.keys.get(id(node))
+            if key is not None and _eligible(node):
+                run.counts[key] = run.counts.get(key, 0) + 1
+                if run.counts[key] > 1:
+                    continue
+            stack.extend(_children(node))
+
+    def replace_roots(self, stmt, run, shared, temps, prelude):
+        if isinstance(stmt, ast.Assign):
+            stmt.expr = trampoline(self.replace(stmt.expr, run, shared, temps, prelude))
+        elif isinstance(stmt, ast.Return) and stmt.expr is not None:
+            stmt.expr = trampoline(self.replace(stmt.expr, run, shared, temps, prelude))
+        elif isinstance(stmt, ast.Call):
+            args = []
+            for arg in stmt.args:
+                args.append(trampoline(self.replace(arg, run, shared, temps, prelude)))
+            stmt.args = args
+        elif isinstance(stmt, ast.If):
+            stmt.cond = trampoline(self.replace(stmt.cond, run, shared, temps, prelude))
+        elif isinstance(stmt, ast.For):
+            stmt.start = trampoline(self.replace(stmt.start, run, shared, temps, prelude))
+            stmt.end = trampoline(self.replace(stmt.end, run, shared, temps, prelude))
+
+    def replace(self, node, run, shared, temps, prelude):
+        key = run.keys.get(id(node))
+        if key in shared and _eligible(node):
+            desc = temps.get(key)
+            if desc is not None:
+                self.report.reuses += 1
+                self.report.nodes += sum(1 for _ in iter_expressions(node)) - 1
+                return self.load(desc, node)
+        if isinstance(node, ast.BinOp):
+            node.left = yield self.replace(node.left, run, shared, temps, prelude)
+            node.right = yield self.replace(node.right, run, shared, temps, prelude)
+        elif isinstance(node, (ast.UnOp, ast.Cast, ast.TypeConvertNode)):
+            node.expr = yield self.replace(node.expr, run, shared, temps, prelude)
+        if key in shared and _eligible(node):
+            desc = temps[key] = self.declare(node)
+            assign = ast.Assign(ident=self.load(desc, node), expr=node)
+            assign.copy_position(node)
+            assign.node_type = node.node_type
+            prelude.append(assign)
+            return self.load(desc, node)
+        return node
+
+    def declare(self, node) -> IdentDesc:
+        index = self.report.temporaries + 1
+        name = f"cse{index}"
+        while name in self.names:
+            name = "_" + name
+        self.names.add(name)
+        self.report.temporaries += 1
+        type_name = _type_name(node.node_type)
+        desc = IdentDesc(name, node.node_type, self.scope_type)
+        ident = ast.Ident(name=name)
+        ident.node_type, ident.node_ident = node.node_type, desc
+        decl = ast.VarDecl(ident=ident, type_name=type_name)
+        decl.node_type, decl.node_ident = node.node_type, desc
+        decl.temporary = True
+        self.block.var_decls.append(decl)
+        return desc
+
+    @staticmethod
+    def load(desc: IdentDesc, node) -> ast.Ident:
+        ident = ast.Ident(name=desc.name)
+        ident.copy_position(node)
+        ident.node_type, ident.node_ident = desc.type, desc
+        return ident
+
+
+def _all_names(program: ast.Program) -> set[str]:
+    names = set()
+    for block, func in iter_blocks(program):
+        names.update(str(decl.ident.name) for decl in block.var_decls)
+        if func is not None:
+            names.add(str(func.name.name))
+            names.update(str(param.ident.name) for param in func.params)
+        names.update(str(stmt.ident.name) for stmt in iter_statements(block.body) if isinstance(stmt, ast.For))
+    return names
+
+
+def eliminate_common_subexpressions(program: ast.Program, heat=None) -> CSEReport:
+    report = CSEReport()
+    names = _all_names(program)
+    stack = [(program.block, "global")]
+    while stack:
+        block, scope_type = stack.pop()
+        _BlockCSE(block, scope_type, names, report, heat).run()
+        stack.extend((func.block, "local") for func in block.func_decls
+                     if heat is None or not heat.cold_function(func))
+    return report
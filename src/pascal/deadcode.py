@@ -0,0 +1,189 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+
+from src.ast import nodes as ast
+from src.ast.walk import iter_blocks, iter_compounds, iter_expressions, iter_statements, statement_exprs
+from src.pascal.semantic import BOOL, DOUBLE, INT, STR
+
+
+TERMINATORS = (ast.Return, ast.Break, ast.Continue)
+DIVISIONS = (ast.BinaryOpKind.FLOAT_DIV, ast.BinaryOpKind.INT_DIV, ast.BinaryOpKind.MOD)
+
+
+@dataclass
+class DeadCodeReport:
+    statements: int = 0
+    branches: int = 0
+    stores: int = 0
+    variables: list[str] = field(default_factory=list)
+    functions: list[str] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return self.statements + self.branches + self.stores + len(self.variables) + len(self.functions)
+
+    def __str__(self):
+        return (f"операторов: {self.statements}, условий: {self.branches}, "
+                f"присваиваний: {self.stores}, переменных: {len(self.variables)}, "
+                f"функций: {len(self.functions)}")
+
+
+def _constant_bool(expr):
+    values = {}
+    stack = [(expr, False)]
+    while stack:
+        node, ready = stack.pop()
+        if isinstance(node, ast.Literal):
+            if not isinstance(node.value, bool):
+                return None
+            values[id(node)] = node.value
+        elif isinstance(node, ast.UnOp) and node.op == ast.UnaryOpKind.NOT:
+            if ready:
+                values[id(node)] = not values[id(node.expr)]
+            else:
+                stack.extend(((node, True), (node.expr, False)))
+        elif isinstance(node, ast.BinOp) and node.op in (ast.BinaryOpKind.AND, ast.BinaryOpKind.OR):
+            if ready:
+                left, right = values[id(node.left)], values[id(node.right)]
+                values[id(node)] = (left and right) if node.op == ast.BinaryOpKind.AND else (left or right)
+            else:
+                stack.extend(((node, True), (node.left, False), (node.right, False)))
+        else:
+            return None
+    return values[id(expr)]
+
+
+def _empty_for(stmt: ast.For) -> bool:
+    start, end = stmt.start, stmt.end
+    if not (isinstance(start, ast.Literal) and isinstance(end, ast.Literal)):
+        return False
+    return start.value > end.value if stmt.direction == "to" else start.value < end.value
+
+
+def _safe_conversion(source, target) -> bool:
+    if target == BOOL or source == target:
+        return True
+    return source == BOOL or source == DOUBLE and target == STR
+
+
+def cannot_fail(expr) -> bool:
+    for node in iter_expressions(expr):
+        if isinstance(node, ast.Call):
+            return False
+        if isinstance(node, (ast.Cast, ast.TypeConvertNode)):
+            if not _safe_conversion(node.expr.node_type, node.node_type):
+                return False
+        if isinstance(node, ast.BinOp) and node.op in DIVISIONS:
+            if not isinstance(node.right, ast.Literal) or not node.right.value:
+                return False
+    return True
+
+
+def _prune_compound(compound: ast.CompoundStmt, report: DeadCodeReport):
+    pending = list(reversed(compound.statements))
+    kept = []
+    while pending:
+        stmt = pending.pop()
+        if isinstance(stmt, (ast.If, ast.While)):
+            value = _constant_bool(stmt.cond)
+            if isinstance(stmt, ast.If) and value is not None:
+                report.branches += 1
+                branch = stmt.then_branch if value else stmt.else_branch
+                if branch is not None:
+                    pending.extend(reversed(branch.statements))
+                continue
+            if isinstance(stmt, ast.While) and value is False:
+                report.statements += 1
+                continue
+        if isinstance(stmt, ast.For) and _empty_for(stmt):
+            report.statements += 1
+            continue
+        kept.append(stmt)
+        if isinstance(stmt, TERMINATORS):
+            report.statements += len(pending)
+            break
+    compound.statements = kept
+
+
+def _reachable_funcs(program: ast.Program) -> set[int]:
+    reached = set()
+    pending = [program.block.body]
+    while pending:
+        for stmt in iter_statements(pending.pop()):
+            for expr in statement_exprs(stmt):
+                for node in iter_expressions(expr):
+                    if not isinstance(node, ast.Call):
+                        continue
+                    func = node.func.node_ident.func_node if node.func.node_ident is not None else None
+                    if func is not None and id(func) not in reached:
+                        reached.add(id(func))
+                        pending.append(func.block.body)
+    return reached
+
+
+def _references(bodies) -> tuple[set[int], set[int]]:
+    reads, writes = set(), set()
+    for body in bodies:
+        for stmt in iter_statements(body):
+            if isinstance(stmt, ast.Assign):
+                writes.add(id(stmt.ident.node_ident))
+            elif isinstance(stmt, ast.For):
+                reads.add(id(stmt.ident.node_ident))
+            for expr in statement_exprs(stmt):
+                for node in iter_expressions(expr):
+                    if isinstance(node, ast.Ident):
+                        reads.add(id(node.node_ident))
+    return reads, writes
+
+
+def _remove_dead_stores(bodies, observable: set[int], report: DeadCodeReport) -> tuple[set[int], set[int]]:
+    while True:
+        reads, writes = _references(bodies)
+        reads |= observable
+        removed = 0
+        for body in bodies:
+            for compound in iter_compounds(body):
+                kept = [stmt for stmt in compound.statements
+                        if not (isinstance(stmt, ast.Assign)
+                                and id(stmt.ident.node_ident) not in reads
+                                and cannot_fail(stmt.expr))]
+                removed += len(compound.statements) - len(kept)
+                compound.statements = kept
+        if not removed:
+            return reads, writes
+        report.stores += removed
+
+
+def eliminate_dead_code(program: ast.Program) -> DeadCodeReport:
+    report = DeadCodeReport()
+    blocks = list(iter_blocks(program))
+    for block, _ in blocks:
+        for compound in iter_compounds(block.body):
+            _prune_compound(compound, report)
+
+    reached = _reachable_funcs(program)
+    live_blocks = []
+    for block, func in blocks:
+        if func is not None and id(func) not in reached:
+            continue
+        live_blocks.append(block)
+        kept = []
+        for nested in block.func_decls:
+            if id(nested) in reached:
+                kept.append(nested)
+            else:
+                report.functions.append(nested.name.name)
+        block.func_decls = kept
+
+    observable = {id(decl.node_ident) for decl in program.block.var_decls}
+    reads, writes = _remove_dead_stores([block.body for block in live_blocks], observable, report)
+    for block in live_blocks:
+        kept = []
+        for decl in block.var_decls:
+            desc = id(decl.node_ident)
+            if desc in reads or desc in writes:
+                kept.append(decl)
+            else:
+                report.variables.append(str(decl.ident.name))
+        block.var_decls = kept
+    return report
@@ -0,0 +1,319 @@
+from __future__ import annotations
+import contextlib
+import io
+import os
+import pickle
+import random
+import tempfile
+import time
+from dataclasses import dataclass, field
+
+from src.ast import nodes as ast
+from src.pascal.compiled import CompiledProgram, source_hash
+from src.pascal.generator import GeneratorConfig, generate_program
+from src.pascal.parser import PascalParser, PascalParserError
+from src.pascal.purity import mark_pure_functions
+from src.pascal.semantic import IdentScope, InputBuffer, SemanticChecker, SemanticException
+
+
+REFERENCE = "tree"
+INPUT_TOKENS = 40
+
+
+@dataclass(frozen=True)
+class Outcome:
+    output: str
+    error: str | None = None
+    globals: tuple | None = None
+
+    def __str__(self):
+        text = repr(self.output[-200:])
+        return f"{text}, ошибка: {self.error}" if self.error is not None else text
+
+
+@dataclass
+class Divergence:
+    seed: int
+    source: str
+    input_text: str
+    paths: tuple[str, ...]
+    outcomes: dict[str, Outcome]
+    minimized: str | None = None
+
+    def __str__(self):
+        lines = [f"seed {self.seed}: расходятся {', '.join(self.paths)}"]
+        for name in (REFERENCE, *self.paths):
+            if name in self.outcomes:
+                lines.append(f"  {name}: {self.outcomes[name]}")
+        return "\n".join(lines)
+
+
+@dataclass
+class FuzzReport:
+    programs: int = 0
+    rejected: int = 0
+    seconds: float = 0.0
+    divergences: list[Divergence] = field(default_factory=list)
+
+    @property
+    def per_minute(self) -> float:
+        return self.programs * 60 / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (f"программ: {self.programs}, отклонено: {self.rejected}, "
+                f"расхождений: {len(self.divergences)}, в минуту: {self.per_minute:.0f}")
+
+
+def _error(error: Exception) -> str:
+    return f"{type(error).__name__}: {error}"
+
+
+def _globals(env) -> tuple:
+    return tuple(sorted((str(name), repr(value)) for name, value in env.items()
+                        if name != "__parent__" and not isinstance(value, ast.Func)))
+
+
+class Case:
+    def __init__(self, text: str, input_text: str = ""):
+        self.text = text
+        self.input_text = input_text
+        self.digest = source_hash(text)
+        self._pickled = None
+        self._base = None
+
+    def fresh(self) -> ast.Program:
+        if self._pickled is None:
+            self._pickled = pickle.dumps(PascalParser(self.text).parse_program(), pickle.HIGHEST_PROTOCOL)
+        return pickle.loads(self._pickled)
+
+    def checked(self, lazy: bool = False):
+        program = self.fresh()
+        checker = SemanticChecker(lazy=lazy)
+        checker.check(program, IdentScope())
+        return program, checker
+
+    @property
+    def base(self):
+        if self._base is None:
+            self._base = self.checked()
+        return self._base
+
+
+def _execute(checker: SemanticChecker, program: ast.Program, input_text: str, engine: str) -> Outcome:
+    checker.output = []
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            env = checker.execute(program, engine=engine, input_text=input_text)
+    except (SemanticException, ArithmeticError, ValueError, RecursionError) as error:
+        return Outcome(''.join(checker.output), _error(error))
+    return Outcome(''.join(checker.output), None, _globals(env))
+
+
+def _run_compiled(compiled: CompiledProgram, input_text: str, coverage=None) -> Outcome:
+    machine = compiled.machine(input_text, coverage=coverage)
+    try:
+        env = machine.run()
+    except (SemanticException, ArithmeticError, ValueError) as error:
+        return Outcome(''.join(machine.output), _error(error))
+    return Outcome(''.join(machine.output), None, _globals(env))
+
+
+def run_tree(case: Case) -> Outcome:
+    program, checker = case.base
+    return _execute(checker, program, case.input_text, "tree")
+
+
+def run_machine(case: Case) -> Outcome:
+    program, _ = case.base
+    return _run_compiled(CompiledProgram(program, case.digest), case.input_text)
+
+
+def run_memoize(case: Case) -> Outcome:
+    program, _ = case.base
+    mark_pure_functions(program)
+    return _run_compiled(CompiledProgram(program, case.digest, memoize=True), case.input_text)
+
+
+def run_lazy(case: Case) -> Outcome:
+    program, checker = case.checked(lazy=True)
+    return _execute(checker, program, case.input_text, "machine")
+
+
+def run_optimized(case: Case) -> Outcome:
+    return _run_compiled(CompiledProgram.from_program(case.fresh(), case.digest, optimize=True), case.input_text)
+
+
+def run_profiled(case: Case) -> Outcome:
+    from src.pascal.coverage import Coverage
+    from src.pascal.profile import Profile
+    coverage = Coverage()
+    recorded = _run_compiled(CompiledProgram.from_program(case.fresh(), case.digest), case.input_text, coverage)
+    if recorded.error is not None:
+        return recorded
+    profile = Profile.from_coverage(coverage, case.digest)
+    compiled = CompiledProgram.from_program(case.fresh(), case.digest, optimize=True, profile=profile)
+    return _run_compiled(compiled, case.input_text)
+
+
+def _run_ir(case: Case, ssa: bool) -> Outcome:
+    from src.pascal.ir import IRInterpreter, lower_program
+    program, _ = case.base
+    interpreter = IRInterpreter(lower_program(program, ssa), InputBuffer(case.input_text))
+    try:
+        return Outcome(interpreter.run())
+    except (SemanticException, ArithmeticError, ValueError) as error:
+        return Outcome(''.join(interpreter.output), _error(error))
+
+
+def run_ir(case: Case) -> Outcome:
+    return _run_ir(case, True)
+
+
+def run_ir_plain(case: Case) -> Outcome:
+    return _run_ir(case, False)
+
+
+def run_stream(case: Case) -> Outcome:
+    from src.pascal.stream import parse_file
+    fd, path = tempfile.mkstemp(suffix=".pas")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fp:
+            fp.write(case.text)
+        program = parse_file(path)
+    finally:
+        os.unlink(path)
+    return _run_compiled(CompiledProgram.from_program(program, case.digest), case.input_text)
+
+
+PATHS = {
+    "tree": run_tree,
+    "machine": run_machine,
+    "ir": run_ir,
+    "ir_plain": run_ir_plain,
+    "memoize": run_memoize,
+    "lazy": run_lazy,
+    "optimize": run_optimized,
+    "profile": run_profiled,
+    "stream": run_stream,
+}
+
+
+def _same(reference: Outcome, outcome: Outcome) -> bool:
+    if reference.output != outcome.output or reference.error != outcome.error:
+        return False
+    if reference.globals is None or outcome.globals is None:
+        return True
+    mine = dict(outcome.globals)
+    return all(mine[name] == value for name, value in reference.globals if name in mine)
+
+
+def run_paths(case: Case, paths=None) -> dict[str, Outcome]:
+    outcomes = {}
+    for name in paths or PATHS:
+        try:
+            outcomes[name] = PATHS[name](case)
+        except (PascalParserError, SemanticException) as error:
+            outcomes[name] = Outcome("", f"компиляция: {_error(error)}")
+        except Exception as error:
+            outcomes[name] = Outcome("", f"сбой: {_error(error)}")
+    return outcomes
+
+
+def diverging(outcomes: dict[str, Outcome]) -> tuple[str, ...]:
+    reference = outcomes[REFERENCE]
+    return tuple(name for name, outcome in outcomes.items()
+                 if name != REFERENCE and not _same(reference, outcome))
+
+
+CHECK = "check"
+
+
+def classify(case: Case, paths=None):
+    try:
+        case.base
+    except (PascalParserError, SemanticException):
+        return None, {}
+    except Exception as error:
+        return (CHECK,), {CHECK: Outcome("", f"сбой проверки: {_error(error)}")}
+    outcomes = run_paths(case, paths)
+    return diverging(outcomes), outcomes
+
+
+def minimize(text: str, input_text: str, signature: tuple[str, ...], max_checks: int = 2000) -> str:
+    paths = None if CHECK in signature else (REFERENCE, *signature)
+    checks = 0
+
+    def interesting(lines: list[str]) -> bool:
+        nonlocal checks
+        checks += 1
+        return classify(Case("\n".join(lines) + "\n", input_text), paths)[0] == signature
+
+    lines = text.rstrip("\n").split("\n")
+    chunk = len(lines) // 2
+    while chunk >= 1 and checks < max_checks:
+        index = 0
+        removed = False
+        while index < len(lines) and checks < max_checks:
+            candidate = lines[:index] + lines[index + chunk:]
+            if candidate and interesting(candidate):
+                lines = candidate
+                removed = True
+            else:
+                index += chunk
+        if not removed:
+            chunk //= 2
+    return "\n".join(lines) + "\n"
+
+
+def input_for(seed: int) -> str:
+    rnd = random.Random(seed)
+    tokens = [str(rnd.randint(-50, 500)) for _ in range(INPUT_TOKENS)]
+    return "\n".join(" ".join(tokens[index:index + 5]) for index in range(0, len(tokens), 5)) + "\n"
+
+
+def check_seed(seed: int, config: GeneratorConfig, paths=None, shrink: bool = True):
+    text = generate_program(seed, config)
+    input_text = input_for(seed)
+    signature, outcomes = classify(Case(text, input_text), paths)
+    if signature is None:
+        return seed, False, None
+    if not signature:
+        return seed, True, None
+    divergence = Divergence(seed, text, input_text, signature, outcomes)
+    if shrink:
+        divergence.minimized = minimize(text, input_text, signature)
+    return seed, True, divergence
+
+
+def _check_task(task):
+    return check_seed(*task)
+
+
+def fuzz(seeds, config: GeneratorConfig | None = None, workers: int | None = None, paths=None,
+         shrink: bool = True, on_divergence=None) -> FuzzReport:
+    config = config or GeneratorConfig(statements=8, functions=2, block_statements=2, extended=True)
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    tasks = [(seed, config, paths, shrink) for seed in seeds]
+    report = FuzzReport()
+    start = time.perf_counter()
+    if workers > 1:
+        from multiprocessing import Pool
+        with Pool(workers) as pool:
+            _collect(pool.imap_unordered(_check_task, tasks, chunksize=16), report, on_divergence)
+    else:
+        _collect(map(_check_task, tasks), report, on_divergence)
+    report.seconds = time.perf_counter() - start
+    report.divergences.sort(key=lambda divergence: divergence.seed)
+    return report
+
+
+def _collect(results, report: FuzzReport, on_divergence):
+    for _, accepted, divergence in results:
+        if not accepted:
+            report.rejected += 1
+            continue
+        report.programs += 1
+        if divergence is not None:
+            report.divergences.append(divergence)
+            if on_divergence is not None:
+                on_divergence(divergence)
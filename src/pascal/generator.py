@@ -0,0 +1,277 @@
+from __future__ import annotations
+import random
+from dataclasses import dataclass
+
+
+TYPE_NAMES = ("integer", "double", "boolean", "char")
+CHARS = "abcdefghijklmnopqrstuvwxyz"
+INT_WRAP = 10007
+
+
+@dataclass
+class GeneratorConfig:
+    statements: int = 20
+    functions: int = 3
+    expr_depth: int = 3
+    loop_depth: int = 2
+    loop_iterations: int = 5
+    block_statements: int = 4
+    globals_per_type: int = 2
+    locals_per_type: int = 1
+    params: int = 2
+    call_cost: int = 500
+    io: bool = True
+    extended: bool = False
+
+
+class _Scope:
+    def __init__(self, variables: dict[str, list[str]], funcs: list[tuple[str, list[str], str, int]],
+                 counters: list[str]):
+        self.variables = variables
+        self.funcs = funcs
+        self.counters = counters
+
+    def names(self, type_name: str) -> list[str]:
+        return self.variables.get(type_name, [])
+
+
+class ProgramGenerator:
+    def __init__(self, seed: int = 0, config: GeneratorConfig | None = None):
+        self.random = random.Random(seed)
+        self.config = config or GeneratorConfig()
+        self.lines = []
+        self.counter = 0
+        self.cost = 0
+        self.multiplier = 1
+
+    def fresh(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def emit(self, level: int, text: str):
+        self.lines.append("  " * level + text)
+
+    def literal(self, type_name: str) -> str:
+        rnd = self.random
+        if type_name == "integer":
+            return str(rnd.randint(0, 99))
+        if type_name == "double":
+            return f"{rnd.randint(0, 99)}.{rnd.randint(0, 99):02d}"
+        if type_name == "boolean":
+            return rnd.choice(("true", "false"))
+        return f"'{rnd.choice(CHARS)}'"
+
+    def expr(self, type_name: str, scope: _Scope, depth: int) -> str:
+        rnd = self.random
+        names = scope.names(type_name)
+        if depth <= 0 or rnd.random() < 0.25:
+            if names and rnd.random() < 0.6:
+                return rnd.choice(names)
+            return self.literal(type_name)
+        calls = [func for func in scope.funcs
+                 if func[2] == type_name and func[3] * self.multiplier <= self.config.call_cost]
+        if calls and rnd.random() < 0.15:
+            name, params, _, cost = rnd.choice(calls)
+            self.cost += cost * self.multiplier
+            args = ", ".join(self.expr(param, scope, depth - 1) for param in params)
+            return f"{name}({args})"
+        if self.config.extended and rnd.random() < 0.3:
+            return self.extended_expr(type_name, scope, depth)
+        if type_name == "integer":
+            choice = rnd.random()
+            if choice < 0.6:
+                op = rnd.choice(("+", "-", "*"))
+                return f"({self.expr('integer', scope, depth - 1)} {op} {self.expr('integer', scope, depth - 1)})"
+            if choice < 0.85:
+                op = rnd.choice(("div", "mod"))
+                return f"({self.expr('integer', scope, depth - 1)} {op} {rnd.randint(1, 9)})"
+            return f"-{self.expr('integer', scope, depth - 1)}"
+        if type_name == "double":
+            choice = rnd.random()
+            if choice < 0.5:
+                op = rnd.choice(("+", "-", "*"))
+                return f"({self.expr('double', scope, depth - 1)} {op} {self.expr('double', scope, depth - 1)})"
+            if choice < 0.7:
+                return f"({self.expr('double', scope, depth - 1)} / {rnd.randint(1, 9)}.5)"
+            return f"double({self.expr('integer', scope, depth - 1)})"
+        if type_name == "boolean":
+            choice = rnd.random()
+            if choice < 0.5:
+                operand = rnd.choice(("integer", "integer", "double", "char"))
+                op = rnd.choice(("=", "<>", "<", "<=", ">", ">="))
+                return f"({self.expr(operand, scope, depth - 1)} {op} {self.expr(operand, scope, depth - 1)})"
+            if choice < 0.8:
+                op = rnd.choice(("and", "or"))
+                return f"({self.expr('boolean', scope, depth - 1)} {op} {self.expr('boolean', scope, depth - 1)})"
+            return f"(not {self.expr('boolean', scope, depth - 1)})"
+        return self.literal("char") if not names else rnd.choice(names)
+
+    def extended_expr(self, type_name: str, scope: _Scope, depth: int) -> str:
+        rnd = self.random
+        choice = rnd.random()
+        if type_name == "integer":
+            if choice < 0.3:
+                return f"({self.expr('integer', scope, depth - 1)} / {rnd.randint(1, 9)})"
+            if choice < 0.5:
+                return f"+{self.expr('integer', scope, depth - 1)}"
+            if choice < 0.8:
+                return f"integer({self.expr('double', scope, depth - 1)})"
+            return f"integer({self.expr('boolean', scope, depth - 1)})"
+        if type_name == "double":
+            if choice < 0.4:
+                return f"({self.expr('integer', scope, depth - 1)} / {rnd.randint(1, 9)}.25)"
+            if choice < 0.7:
+                return f"({self.expr('double', scope, depth - 1)} / {rnd.randint(1, 9)})"
+            return f"(0.0 - {self.expr('double', scope, depth - 1)})"
+        if type_name == "boolean":
+            if choice < 0.4:
+                operand = rnd.choice(("boolean", "char"))
+                op = rnd.choice(("=", "<>", "<", ">"))
+                return f"({self.expr(operand, scope, depth - 1)} {op} {self.expr(operand, scope, depth - 1)})"
+            if choice < 0.7:
+                return f"boolean({self.expr('integer', scope, depth - 1)})"
+            return f"not not {self.expr('boolean', scope, depth - 1)}"
+        return f"char({self.expr(rnd.choice(('integer', 'boolean')), scope, depth - 1)})"
+
+    def read(self, level: int, targets: list[tuple[str, str]]):
+        rnd = self.random
+        numeric = [name for name, type_name in targets if type_name in ("integer", "double")]
+        if not numeric:
+            return False
+        names = rnd.sample(numeric, rnd.randint(1, min(2, len(numeric))))
+        self.emit(level, f"{rnd.choice(('read', 'readln'))}({', '.join(names)});")
+        for name in names:
+            if (name, "integer") in targets:
+                self.emit(level, f"{name} := {name} mod {INT_WRAP};")
+        return True
+
+    def assign(self, level: int, scope: _Scope, targets: list[tuple[str, str]]):
+        name, type_name = self.random.choice(targets)
+        value = self.expr(type_name, scope, self.config.expr_depth)
+        if type_name == "integer":
+            value = f"({value}) mod {INT_WRAP}"
+        self.emit(level, f"{name} := {value};")
+
+    def statement(self, level: int, scope: _Scope, targets, loop_depth: int, in_loop: bool):
+        rnd = self.random
+        config = self.config
+        self.cost += self.multiplier
+        choice = rnd.random()
+        if choice < 0.45 or not targets:
+            if targets:
+                self.assign(level, scope, targets)
+            else:
+                self.write(level, scope)
+        elif choice < 0.6:
+            self.emit(level, f"if {self.expr('boolean', scope, config.expr_depth)} then")
+            self.compound(level, scope, targets, loop_depth, in_loop)
+            if rnd.random() < 0.5:
+                self.lines[-1] = self.lines[-1].rstrip(";")
+                self.emit(level, "else")
+                self.compound(level, scope, targets, loop_depth, in_loop)
+        elif choice < 0.72 and loop_depth < config.loop_depth:
+            var = self.fresh("i")
+            bound = rnd.randint(1, config.loop_iterations)
+            direction, start, end = ("to", 1, bound) if rnd.random() < 0.7 else ("downto", bound, 1)
+            self.emit(level, f"for {var} := {start} {direction} {end} do")
+            self.multiplier *= bound
+            inner = _Scope({**scope.variables, "integer": scope.names("integer") + [var]},
+                           scope.funcs, scope.counters)
+            self.compound(level, inner, targets, loop_depth + 1, True)
+            self.multiplier //= bound
+        elif choice < 0.82 and loop_depth < config.loop_depth and scope.counters:
+            counter = scope.counters.pop()
+            self.emit(level, f"{counter} := 0;")
+            bound = rnd.randint(1, config.loop_iterations)
+            self.emit(level, f"while {counter} < {bound} do")
+            self.multiplier *= bound
+            self.emit(level, "begin")
+            self.emit(level + 1, f"{counter} := {counter} + 1;")
+            for _ in range(rnd.randint(1, config.block_statements)):
+                self.statement(level + 1, scope, targets, loop_depth + 1, True)
+            self.emit(level, "end;")
+            self.multiplier //= bound
+            scope.counters.append(counter)
+        elif choice < 0.86 and in_loop:
+            self.emit(level, f"if {self.expr('boolean', scope, 1)} then {rnd.choice(('break', 'continue'))};")
+        elif config.io and config.extended and choice > 0.95 and self.read(level, targets):
+            pass
+        elif config.io:
+            self.write(level, scope)
+        elif targets:
+            self.assign(level, scope, targets)
+
+    def write(self, level: int, scope: _Scope):
+        rnd = self.random
+        parts = [self.expr(rnd.choice(TYPE_NAMES), scope, 1) for _ in range(rnd.randint(1, 3))]
+        self.emit(level, f"{rnd.choice(('write', 'writeln'))}({', '.join(parts)});")
+
+    def compound(self, level: int, scope: _Scope, targets, loop_depth: int, in_loop: bool):
+        self.emit(level, "begin")
+        for _ in range(self.random.randint(1, self.config.block_statements)):
+            self.statement(level + 1, scope, targets, loop_depth, in_loop)
+        self.emit(level, "end;")
+
+    def declare(self, level: int, prefix: str, per_type: int) -> dict[str, list[str]]:
+        variables = {}
+        for type_name in TYPE_NAMES:
+            names = [self.fresh(prefix) for _ in range(per_type)]
+            if names:
+                variables[type_name] = names
+                self.emit(level, f"{', '.join(names)}: {type_name};")
+        return variables
+
+    def function(self, funcs, global_vars):
+        rnd = self.random
+        config = self.config
+        name = self.fresh("f")
+        return_type = rnd.choice(("integer", "integer", "double", "boolean"))
+        params = [(self.fresh("p"), rnd.choice(("integer", "integer", "double", "boolean")))
+                  for _ in range(rnd.randint(0, config.params))]
+        header = "; ".join(f"{param}: {type_name}" for param, type_name in params)
+        self.emit(0, f"function {name}({header}): {return_type};")
+        self.emit(0, "var")
+        local_vars = self.declare(1, "l", config.locals_per_type)
+        counters = [self.fresh("w") for _ in range(config.loop_depth)]
+        if counters:
+            self.emit(1, f"{', '.join(counters)}: integer;")
+        variables = {type_name: list(names) for type_name, names in global_vars.items()}
+        for type_name, names in local_vars.items():
+            variables[type_name] = variables.get(type_name, []) + names
+        for param, type_name in params:
+            variables.setdefault(type_name, []).append(param)
+        scope = _Scope(variables, list(funcs), counters)
+        targets = [(local, type_name) for type_name, names in local_vars.items() for local in names]
+        self.cost = 0
+        self.emit(0, "begin")
+        for _ in range(rnd.randint(1, config.block_statements)):
+            self.statement(1, scope, targets, 0, False)
+        self.emit(1, f"return {self.expr(return_type, scope, config.expr_depth)}")
+        self.emit(0, "end;")
+        self.emit(0, "")
+        funcs.append((name, [type_name for _, type_name in params], return_type, max(self.cost, 1)))
+
+    def generate(self) -> str:
+        config = self.config
+        self.lines = []
+        self.emit(0, f"program {self.fresh('Gen')};")
+        self.emit(0, "var")
+        global_vars = self.declare(1, "g", config.globals_per_type)
+        counters = [self.fresh("w") for _ in range(config.loop_depth)]
+        if counters:
+            self.emit(1, f"{', '.join(counters)}: integer;")
+        self.emit(0, "")
+        funcs = []
+        for _ in range(config.functions):
+            self.function(funcs, global_vars)
+        scope = _Scope(global_vars, funcs, counters)
+        targets = [(name, type_name) for type_name, names in global_vars.items() for name in names]
+        self.emit(0, "begin")
+        for _ in range(config.statements):
+            self.statement(1, scope, targets, 0, False)
+        self.emit(0, "end.")
+        return "\n".join(self.lines) + "\n"
+
+
+def generate_program(seed: int = 0, config: GeneratorConfig | None = None) -> str:
+    return ProgramGenerator(seed, config).generate()
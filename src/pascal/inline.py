@@ -0,0 +1,296 @@
+from __future__ import annotations
+import copy
+from dataclasses import dataclass, field
+
+from src.ast import nodes as ast
+from src.ast.walk import iter_blocks, iter_compounds, iter_expressions, iter_statements, statement_exprs
+from src.pascal.deadcode import cannot_fail
+from src.pascal.semantic import BOOL, DOUBLE, INT, STR
+
+
+MAX_SIZE = 16
+MAX_SITES = 64
+HOT_SIZE = 48
+
+_DEFAULTS = {"integer": (0, INT), "double": (0.0, DOUBLE), "boolean": (False, BOOL), "char": ("", STR)}
+
+
+@dataclass
+class InlineReport:
+    sites: int = 0
+    functions: list[str] = field(default_factory=list)
+
+    def __str__(self):
+        return f"вызовов: {self.sites}, функций: {len(self.functions)}"
+
+
+def _clone(expr, bindings: dict):
+    if isinstance(expr, ast.Ident) and id(expr.node_ident) in bindings:
+        value, move = bindings[id(expr.node_ident)]
+        return value if move else _clone(value, {})
+    node = copy.copy(expr)
+    if isinstance(node, ast.BinOp):
+        node.left = _clone(node.left, bindings)
+        node.right = _clone(node.right, bindings)
+    elif isinstance(node, (ast.UnOp, ast.Cast, ast.TypeConvertNode)):
+        node.expr = _clone(node.expr, bindings)
+    elif isinstance(node, ast.Call):
+        node.args = [_clone(arg, bindings) for arg in node.args]
+    return node
+
+
+def _default_literal(decl: ast.VarDecl):
+    value, type_ = _DEFAULTS[decl.type_name]
+    node = ast.Literal(value=value)
+    node.node_type = type_
+    node.copy_position(decl)
+    return node
+
+
+def _size(expr) -> int:
+    return sum(1 for _ in iter_expressions(expr))
+
+
+class _Template:
+    def __init__(self, func: ast.Func, expr, uses: dict[int, int]):
+        self.func = func
+        self.expr = expr
+        self.params = [param.node_ident for param in func.params]
+        self.uses = uses
+        self.sites = 0
+        self.hot = False
+        self.free = set()
+        self.has_calls = False
+        for node in iter_expressions(expr):
+            if isinstance(node, ast.Call):
+                self.free.add(str(node.func.name))
+                self.has_calls = True
+            elif isinstance(node, ast.Ident) and id(node.node_ident) not in uses:
+                self.free.add(str(node.name))
+
+
+def _template(func: ast.Func, allowed: set[int], max_size: int):
+    block = func.block
+    if block.func_decls or not block.body.statements:
+        return None
+    params = {id(param.node_ident) for param in func.params}
+    local_decls = {id(decl.node_ident): decl for decl in block.var_decls}
+    values = {key: (_default_literal(decl), False) for key, decl in local_decls.items()}
+    *assigns, last = block.body.statements
+    if not isinstance(last, ast.Return) or last.expr is None:
+        return None
+    for stmt in assigns:
+        if not isinstance(stmt, ast.Assign) or id(stmt.ident.node_ident) not in local_decls:
+            return None
+        if not cannot_fail(stmt.expr):
+            return None
+    for stmt in block.body.statements:
+        for node in iter_expressions(stmt.expr):
+            if isinstance(node, ast.Ident):
+                key = id(node.node_ident)
+                if key not in params and key not in local_decls and key not in allowed:
+                    return None
+            elif isinstance(node, ast.Call):
+                desc = node.func.node_ident
+                if desc is None or desc.built_in or id(desc) not in allowed:
+                    return None
+    if any(isinstance(node, ast.Call) for stmt in block.body.statements for node in iter_expressions(stmt.expr)):
+        own = params | local_decls.keys()
+        for stmt in assigns:
+            for node in iter_expressions(stmt.expr):
+                if isinstance(node, ast.Call) or isinstance(node, ast.Ident) and id(node.node_ident) not in own:
+                    return None
+    for stmt in assigns:
+        values[id(stmt.ident.node_ident)] = (_clone(stmt.expr, values), False)
+    expr = _clone(last.expr, values)
+    if _size(expr) > max_size:
+        return None
+    uses = dict.fromkeys(params, 0)
+    for node in iter_expressions(expr):
+        if isinstance(node, ast.Ident) and id(node.node_ident) in uses:
+            uses[id(node.node_ident)] += 1
+    return _Template(func, expr, uses)
+
+
+def _unwrap(arg):
+    while isinstance(arg, ast.TypeConvertNode):
+        arg = arg.expr
+    return arg
+
+
+def _trivial(arg) -> bool:
+    return isinstance(_unwrap(arg), (ast.Literal, ast.Ident))
+
+
+def _literal(arg) -> bool:
+    return isinstance(_unwrap(arg), ast.Literal)
+
+
+def _callees(func: ast.Func) -> set[int]:
+    result = set()
+    for stmt in iter_statements(func.block.body):
+        for expr in statement_exprs(stmt):
+            for node in iter_expressions(expr):
+                if isinstance(node, ast.Call) and node.func.node_ident is not None and node.func.node_ident.func_node:
+                    result.add(id(node.func.node_ident.func_node))
+    return result
+
+
+def _post_order(funcs: list[ast.Func], edges: dict[int, set[int]]) -> list[ast.Func]:
+    by_id = {id(func): func for func in funcs}
+    order, seen = [], set()
+    for root in funcs:
+        if id(root) in seen:
+            continue
+        seen.add(id(root))
+        stack = [(id(root), iter(edges[id(root)]))]
+        while stack:
+            key, pending = stack[-1]
+            child = next(pending, None)
+            if child is None:
+                stack.pop()
+                order.append(by_id[key])
+            elif child not in seen:
+                seen.add(child)
+                stack.append((child, iter(edges[child])))
+    return order
+
+
+def _recursive(func: ast.Func, edges: dict[int, set[int]]) -> bool:
+    start = id(func)
+    seen, stack = set(), list(edges[start])
+    while stack:
+        key = stack.pop()
+        if key == start:
+            return True
+        if key not in seen:
+            seen.add(key)
+            stack.extend(edges[key])
+    return False
+
+
+def _shadowing(func: ast.Func | None, body: ast.CompoundStmt) -> set[str]:
+    names = set()
+    if func is not None:
+        names.update(str(param.ident.name) for param in func.params)
+        names.update(str(decl.ident.name) for decl in func.block.var_decls)
+        names.update(str(nested.name.name) for nested in func.block.func_decls)
+    for stmt in iter_statements(body):
+        if isinstance(stmt, ast.For):
+            names.add(str(stmt.ident.name))
+    return names
+
+
+class _Inliner:
+    def __init__(self, templates: dict[int, _Template], max_sites: int, report: InlineReport, heat=None):
+        self.templates = templates
+        self.max_sites = max_sites
+        self.report = report
+        self.heat = heat
+        self.shadowed = set()
+
+    def expand(self, call: ast.Call):
+        desc = call.func.node_ident
+        template = self.templates.get(id(desc.func_node)) if desc is not None else None
+        if template is None or template.sites >= self.max_sites and not template.hot:
+            return None
+        if template.free & self.shadowed:
+            return None
+        bindings = {}
+        for param, arg in zip(template.params, call.args):
+            if any(isinstance(node, ast.Call) for node in iter_expressions(arg)) or not cannot_fail(arg):
+                return None
+            uses = template.uses[id(param)]
+            if uses != 1 and not _trivial(arg) or template.has_calls and not _literal(arg):
+                return None
+            bindings[id(param)] = (arg, uses == 1)
+        template.sites += 1
+        self.report.sites += 1
+        return _clone(template.expr, bindings)
+
+    def rewrite(self, expr):
+        holder = [expr]
+        stack = [(holder, 0)]
+        while stack:
+            container, key = stack.pop()
+            node = container[key]
+            if isinstance(node, ast.Call):
+                replacement = self.expand(node)
+                if replacement is not None:
+                    container[key] = replacement
+                    continue
+                stack.extend((node.args, index) for index in range(len(node.args)))
+            elif isinstance(node, ast.BinOp):
+                stack.extend(((_Field(node, "left"), 0), (_Field(node, "right"), 0)))
+            elif isinstance(node, (ast.UnOp, ast.Cast, ast.TypeConvertNode)):
+                stack.append((_Field(node, "expr"), 0))
+        return holder[0]
+
+    def statement(self, stmt):
+        if isinstance(stmt, ast.Assign):
+            stmt.expr = self.rewrite(stmt.expr)
+        elif isinstance(stmt, (ast.If, ast.While)):
+            stmt.cond = self.rewrite(stmt.cond)
+        elif isinstance(stmt, ast.For):
+            stmt.start = self.rewrite(stmt.start)
+            stmt.end = self.rewrite(stmt.end)
+        elif isinstance(stmt, ast.Return) and stmt.expr is not None:
+            stmt.expr = self.rewrite(stmt.expr)
+        elif isinstance(stmt, ast.Call):
+            stmt.args = [self.rewrite(arg) for arg in stmt.args]
+
+    def body(self, func: ast.Func | None, body: ast.CompoundStmt, shadowed: set[str]):
+        self.shadowed = shadowed | _shadowing(func, body)
+        for compound in iter_compounds(body):
+            for stmt in compound.statements:
+                if self.heat is None or not self.heat.cold(stmt):
+                    self.statement(stmt)
+
+
+class _Field:
+    __slots__ = ("node", "name")
+
+    def __init__(self, node, name):
+        self.node = node
+        self.name = name
+
+    def __getitem__(self, _):
+        return getattr(self.node, self.name)
+
+    def __setitem__(self, _, value):
+        setattr(self.node, self.name, value)
+
+
+def inline_functions(program: ast.Program, max_size: int = MAX_SIZE, max_sites: int = MAX_SITES,
+                     heat=None) -> InlineReport:
+    report = InlineReport()
+    funcs, shadow_of = [], {}
+    for block, func in iter_blocks(program):
+        if func is None:
+            continue
+        funcs.append(func)
+        inner = shadow_of.setdefault(id(func), set()) | _shadowing(func, block.body)
+        shadow_of.update((id(nested), inner) for nested in block.func_decls)
+    allowed = {id(decl.node_ident) for decl in program.block.var_decls}
+    allowed.update(id(func.node_ident) for func in program.block.func_decls)
+
+    edges = {id(func): _callees(func) for func in funcs}
+
+    templates = {}
+    inliner = _Inliner(templates, max_sites, report, heat)
+    for func in _post_order(funcs, edges):
+        if heat is not None and heat.cold_function(func):
+            continue
+        inliner.body(func, func.block.body, shadow_of[id(func)])
+        if _recursive(func, edges):
+            continue
+        hot = heat is not None and heat.hot_function(func)
+        template = _template(func, allowed, max(max_size, HOT_SIZE) if hot else max_size)
+        if template is None:
+            continue
+        template.hot = hot
+        templates[id(func)] = template
+
+    inliner.body(None, program.block.body, set())
+    report.functions = [template.func.name.name for template in templates.values() if template.sites]
+    return report
@@ -0,0 +1,806 @@
+from __future__ import annotations
+from array import array
+
+from src.ast import nodes as ast
+from src.ast.walk import iter_nodes, trampoline
+from src.pascal.machine import BINARY_FUNCS, UNARY_FUNCS, converter_for, default_value
+from src.pascal.semantic import BOOL, DOUBLE, INT, STR, InputBuffer, SemanticChecker, SemanticException
+
+
+(
+    COPY, UNARY, BINARY, CONVERT, LOAD, STORE, PARAM, ARG, CALL, WRITE, READ, ITEM,
+    JUMP, BRANCH, RETURN, FAIL,
+) = range(16)
+
+OP_NAMES = (
+    "copy", "unary", "binary", "convert", "load", "store", "param", "arg", "call", "write", "read", "item",
+    "jump", "branch", "return", "fail",
+)
+
+TERMINATOR_OPS = (JUMP, BRANCH, RETURN, FAIL)
+
+# Value operands per opcode; the remaining fields hold immediates.
+USES = {
+    COPY: ("a",), UNARY: ("a",), BINARY: ("a", "b"), CONVERT: ("a",), STORE: ("c",),
+    ARG: ("a",), ITEM: ("a", "c"), BRANCH: ("a",), RETURN: ("a",),
+}
+DEFINES = frozenset((COPY, UNARY, BINARY, CONVERT, LOAD, PARAM, CALL, READ, ITEM))
+
+NO_VALUE = -2 ** 31
+
+BINARY_OPS = tuple(ast.BinaryOpKind)
+UNARY_OPS = tuple(ast.UnaryOpKind)
+TYPES = (INT, DOUBLE, BOOL, STR)
+
+
+def is_register(value: int) -> bool:
+    return value >= 0
+
+
+class Instructions:
+    __slots__ = ("op", "dst", "a", "b", "c")
+
+    def __init__(self):
+        self.op = array("b")
+        self.dst = array("i")
+        self.a = array("i")
+        self.b = array("i")
+        self.c = array("i")
+
+    def __len__(self):
+        return len(self.op)
+
+    def append(self, op, dst=NO_VALUE, a=NO_VALUE, b=NO_VALUE, c=NO_VALUE) -> int:
+        self.op.append(op)
+        self.dst.append(dst)
+        self.a.append(a)
+        self.b.append(b)
+        self.c.append(c)
+        return len(self.op) - 1
+
+    def field(self, name: str) -> array:
+        return getattr(self, name)
+
+    def nbytes(self) -> int:
+        return sum(column.itemsize * len(column) for column in (self.op, self.dst, self.a, self.b, self.c))
+
+
+class BasicBlock:
+    __slots__ = ("index", "start", "end", "succs", "preds", "phis")
+
+    def __init__(self, index: int):
+        self.index = index
+        self.start = 0
+        self.end = 0
+        self.succs = []
+        self.preds = []
+        self.phis = []
+
+    def __repr__(self):
+        return f"BasicBlock(b{self.index}, {self.start}:{self.end})"
+
+
+class Phi:
+    __slots__ = ("dst", "var", "args")
+
+    def __init__(self, dst: int, var: int):
+        self.dst = dst
+        self.var = var
+        self.args = {}
+
+
+class IRFunction:
+    def __init__(self, name: str, index: int, depth: int, params: int, parent: int = -1):
+        self.name = name
+        self.index = index
+        self.depth = depth
+        self.params = params
+        self.parent = parent
+        self.registers = []
+        self.variables = set()
+        self.memory_names = []
+        self.memory_defaults = []
+        self.code = Instructions()
+        self.blocks = []
+        self.idom = []
+        self.ssa = False
+
+    def new_register(self, name: str) -> int:
+        self.registers.append(name)
+        return len(self.registers) - 1
+
+    def block_code(self, block: BasicBlock):
+        code = self.code
+        for index in range(block.start, block.end):
+            yield index, code.op[index], code.dst[index], code.a[index], code.b[index], code.c[index]
+
+
+class IRModule:
+    def __init__(self, name: str):
+        self.name = name
+        self.functions = []
+        self.consts = []
+        self.const_index = {}
+        self.aux = []
+
+    @property
+    def main(self) -> IRFunction:
+        return self.functions[0]
+
+    def const(self, value) -> int:
+        key = (type(value), value)
+        index = self.const_index.get(key)
+        if index is None:
+            index = self.const_index[key] = len(self.consts)
+            self.consts.append(value)
+        return -index - 1
+
+    def value(self, operand: int):
+        return self.consts[-operand - 1]
+
+    def instruction_count(self) -> int:
+        return sum(len(func.code) for func in self.functions)
+
+
+def _owned_decls(func: ast.Func | None, block: ast.Block):
+    owned = [param.node_ident for param in func.params] if func is not None else []
+    owned.extend(decl.node_ident for decl in block.var_decls)
+    owned.extend(node.ident.node_ident for node in iter_nodes(block.body) if isinstance(node, ast.For))
+    return owned
+
+
+def _referenced(block: ast.Block) -> set[int]:
+    return {id(node.node_ident) for node in iter_nodes(block.body) if isinstance(node, ast.Ident)}
+
+
+class _Unit:
+    def __init__(self, func: ast.Func | None, block: ast.Block, depth: int, ir: IRFunction):
+        self.func = func
+        self.block = block
+        self.depth = depth
+        self.ir = ir
+        self.owned = _owned_decls(func, block)
+
+
+class _Lowering:
+    def __init__(self, program: ast.Program):
+        self.program = program
+        self.module = IRModule(program.name)
+        self.units = []
+        self.unit_of = {}
+        self.home = {}
+        self._declare(None, program.block, 0, program.name)
+        self._place_variables()
+
+    def _declare(self, func, block, depth, name):
+        stack = [(func, block, depth, name, -1)]
+        while stack:
+            func, block, depth, name, parent = stack.pop()
+            ir = IRFunction(name, len(self.module.functions), depth, len(func.params) if func else 0, parent)
+            self.module.functions.append(ir)
+            unit = _Unit(func, block, depth, ir)
+            self.units.append(unit)
+            if func is not None:
+                self.unit_of[id(func)] = unit
+            for nested in reversed(block.func_decls):
+                if nested.deferred:
+                    continue
+                stack.append((nested, nested.block, depth + 1, nested.name.name, ir.index))
+
+    def _place_variables(self):
+        owner = {}
+        for unit in self.units:
+            for desc in unit.owned:
+                owner[id(desc)] = unit
+        escaped = set()
+        for unit in self.units:
+            for key in _referenced(unit.block):
+                if key in owner and owner[key] is not unit:
+                    escaped.add(key)
+        for unit in self.units:
+            types = {}
+            if unit.func is not None:
+                types.update((id(param.node_ident), param.type_name) for param in unit.func.params)
+            types.update((id(decl.node_ident), decl.type_name) for decl in unit.block.var_decls)
+            for desc in unit.owned:
+                key = id(desc)
+                if key in escaped:
+                    ir = unit.ir
+                    self.home[key] = ("memory", unit, len(ir.memory_names))
+                    ir.memory_names.append(desc.name)
+                    ir.memory_defaults.append(default_value(types.get(key, "")))
+                else:
+                    register = unit.ir.new_register(str(desc.name))
+                    unit.ir.variables.add(register)
+                    self.home[key] = ("register", unit, register)
+
+    def lower(self) -> IRModule:
+        for unit in self.units:
+            _FunctionLowering(self, unit).lower()
+        return self.module
+
+
+class _FunctionLowering:
+    def __init__(self, lowering: _Lowering, unit: _Unit):
+        self.lowering = lowering
+        self.module = lowering.module
+        self.unit = unit
+        self.ir = unit.ir
+        self.blocks = []
+        self.current = self.new_block()
+        self.loops = []
+        self.temps = 0
+
+    def new_block(self) -> int:
+        self.blocks.append([])
+        return len(self.blocks) - 1
+
+    def emit(self, op, dst=NO_VALUE, a=NO_VALUE, b=NO_VALUE, c=NO_VALUE):
+        self.blocks[self.current].append((op, dst, a, b, c))
+
+    def terminate(self, op, a=NO_VALUE, b=NO_VALUE, c=NO_VALUE):
+        self.emit(op, NO_VALUE, a, b, c)
+        self.current = self.new_block()
+
+    def switch(self, target: int, following: int | None = None):
+        code = self.blocks[self.current]
+        if not code or code[-1][0] not in TERMINATOR_OPS:
+            self.emit(JUMP, NO_VALUE, target)
+        self.current = target if following is None else following
+
+    def temp(self) -> int:
+        self.temps += 1
+        return self.ir.new_register(f"t{self.temps}")
+
+    def home(self, ident: ast.Ident):
+        try:
+            kind, owner, where = self.lowering.home[id(ident.node_ident)]
+        except KeyError:
+            raise SemanticException(f"Переменная {ident.name} не объявлена")
+        return kind, where, self.unit.depth - owner.depth
+
+    def load(self, ident: ast.Ident) -> int:
+        kind, where, hops = self.home(ident)
+        if kind == "register":
+            return where
+        dst = self.temp()
+        self.emit(LOAD, dst, where, hops)
+        return dst
+
+    def store(self, ident: ast.Ident, value: int):
+        kind, where, hops = self.home(ident)
+        if kind == "register":
+            self.emit(COPY, where, value)
+        else:
+            self.emit(STORE, NO_VALUE, where, hops, value)
+
+    def lower(self):
+        unit = self.unit
+        if unit.func is not None:
+            for index, param in enumerate(unit.func.params):
+                value = self.temp()
+                self.emit(PARAM, value, index)
+                self.store(param.ident, value)
+        for decl in unit.block.var_decls:
+            kind, where, _ = self.home(decl.ident)
+            if kind == "register":
+                self.emit(COPY, where, self.module.const(default_value(decl.type_name)))
+        trampoline(self.stmt(unit.block.body))
+        self.emit(RETURN, NO_VALUE, NO_VALUE)
+        self._finish()
+
+    def _finish(self):
+        blocks = self.blocks
+        succs = []
+        for code in blocks:
+            last = code[-1] if code else None
+            if last is None or last[0] not in TERMINATOR_OPS:
+                raise SemanticException("Незавершённый базовый блок")
+            if last[0] == JUMP:
+                succs.append([last[2]])
+            elif last[0] == BRANCH:
+                succs.append([last[3], last[4]] if last[3] != last[4] else [last[3]])
+            else:
+                succs.append([])
+        order, seen, stack = [], {0}, [0]
+        while stack:
+            index = stack.pop()
+            order.append(index)
+            for succ in reversed(succs[index]):
+                if succ not in seen:
+                    seen.add(succ)
+                    stack.append(succ)
+        order = [0] + sorted(index for index in order if index != 0)
+        number = {old: new for new, old in enumerate(order)}
+        ir = self.ir
+        code = ir.code
+        for old in order:
+            block = BasicBlock(number[old])
+            block.start = len(code)
+            for op, dst, a, b, c in blocks[old]:
+                if op == JUMP:
+                    a = number[a]
+                elif op == BRANCH:
+                    b, c = number[b], number[c]
+                code.append(op, dst, a, b, c)
+            block.end = len(code)
+            block.succs = [number[succ] for succ in succs[old]]
+            ir.blocks.append(block)
+        for block in ir.blocks:
+            for succ in block.succs:
+                ir.blocks[succ].preds.append(block.index)
+
+    def expr(self, node):
+        if isinstance(node, ast.Literal):
+            return self.module.const(node.value)
+        if isinstance(node, ast.Ident):
+            return self.load(node)
+        if isinstance(node, ast.BinOp):
+            left = yield self.expr(node.left)
+            right = yield self.expr(node.right)
+            dst = self.temp()
+            self.emit(BINARY, dst, left, right, BINARY_OPS.index(node.op))
+            return dst
+        if isinstance(node, ast.UnOp):
+            value = yield self.expr(node.expr)
+            dst = self.temp()
+            self.emit(UNARY, dst, value, NO_VALUE, UNARY_OPS.index(node.op))
+            return dst
+        if isinstance(node, (ast.TypeConvertNode, ast.Cast)):
+            value = yield self.expr(node.expr)
+            target = node.target_type if isinstance(node, ast.TypeConvertNode) \
+                else SemanticChecker._type_from_name(node.type_name)
+            dst = self.temp()
+            self.emit(CONVERT, dst, value, NO_VALUE, TYPES.index(target))
+            return dst
+        if isinstance(node, ast.Call):
+            return (yield self.call(node))
+        raise SemanticException(f"Не умею вычислять {type(node).__name__}")
+
+    def call(self, node: ast.Call):
+        desc = node.func.node_ident
+        name = node.func.name
+        if desc is not None and desc.built_in and name in ("read", "readln"):
+            return self.read(node)
+        args = []
+        for arg in node.args:
+            args.append((yield self.expr(arg)))
+        for value in args:
+            self.emit(ARG, NO_VALUE, value)
+        if desc is not None and desc.built_in:
+            self.emit(WRITE, NO_VALUE, len(args), int(name == "writeln"))
+            return self.module.const(None)
+        func = desc.func_node if desc is not None else None
+        callee = self.lowering.unit_of.get(id(func))
+        if callee is None:
+            raise SemanticException(f"{name} не является функцией")
+        dst = self.temp()
+        self.emit(CALL, dst, callee.ir.index, len(args), self.unit.depth - (callee.depth - 1))
+        return dst
+
+    def read(self, node: ast.Call):
+        if not all(isinstance(arg, ast.Ident) for arg in node.args):
+            self.terminate(FAIL, self.module.const(f"{node.func.name} ожидает переменную"))
+            return self.module.const(None)
+        self.module.aux.append([arg.node_type for arg in node.args])
+        values = self.temp()
+        self.emit(READ, values, len(self.module.aux) - 1, int(node.func.name == "readln"))
+        for index, arg in enumerate(node.args):
+            old = self.load(arg)
+            value = self.temp()
+            self.emit(ITEM, value, values, index, old)
+            self.store(arg, value)
+        return self.module.const(None)
+
+    def stmt(self, node):
+        if isinstance(node, ast.CompoundStmt):
+            for stmt in node.statements:
+                yield self.stmt(stmt)
+        elif isinstance(node, ast.Assign):
+            value = yield self.expr(node.expr)
+            self.store(node.ident, value)
+        elif isinstance(node, ast.If):
+            cond = yield self.expr(node.cond)
+            then_block = self.new_block()
+            else_block = self.new_block() if node.else_branch is not None else None
+            end_block = self.new_block()
+            else_block = end_block if else_block is None else else_block
+            self.emit(BRANCH, NO_VALUE, cond, then_block, else_block)
+            self.current = then_block
+            yield self.stmt(node.then_branch)
+            if node.else_branch is not None:
+                self.switch(end_block, else_block)
+                yield self.stmt(node.else_branch)
+            self.switch(end_block)
+        elif isinstance(node, ast.While):
+            header, body, exit_ = self.new_block(), self.new_block(), self.new_block()
+            self.switch(header)
+            cond = yield self.expr(node.cond)
+            self.emit(BRANCH, NO_VALUE, cond, body, exit_)
+            self.current = body
+            self.loops.append((header, exit_))
+            yield self.stmt(node.body)
+            self.loops.pop()
+            self.switch(header)
+            self.current = exit_
+        elif isinstance(node, ast.For):
+            start = yield self.expr(node.start)
+            self.store(node.ident, start)
+            end = yield self.expr(node.end)
+            limit = self.temp()
+            self.emit(COPY, limit, end)
+            header, body, step, exit_ = self.new_block(), self.new_block(), self.new_block(), self.new_block()
+            self.switch(header)
+            value = self.load(node.ident)
+            cond = self.temp()
+            compare = ast.BinaryOpKind.LE if node.direction == "to" else ast.BinaryOpKind.GE
+            self.emit(BINARY, cond, value, limit, BINARY_OPS.index(compare))
+            self.emit(BRANCH, NO_VALUE, cond, body, exit_)
+            self.current = body
+            self.loops.append((step, exit_))
+            yield self.stmt(node.body)
+            self.loops.pop()
+            self.switch(step)
+            value = self.load(node.ident)
+            following = self.temp()
+            self.emit(BINARY, following, value, self.module.const(1),
+                      BINARY_OPS.index(ast.BinaryOpKind.ADD if node.direction == "to" else ast.BinaryOpKind.SUB))
+            self.store(node.ident, following)
+            self.switch(header)
+            self.current = exit_
+        elif isinstance(node, (ast.Break, ast.Continue)):
+            if not self.loops:
+                word = "break" if isinstance(node, ast.Break) else "continue"
+                self.terminate(FAIL, self.module.const(f"{word} вне цикла"))
+            else:
+                target = self.loops[-1][1] if isinstance(node, ast.Break) else self.loops[-1][0]
+                self.terminate(JUMP, target)
+        elif isinstance(node, ast.Return):
+            value = NO_VALUE
+            if node.expr is not None:
+                value = yield self.expr(node.expr)
+            self.terminate(RETURN, value)
+        elif isinstance(node, ast.Call):
+            yield self.call(node)
+        else:
+            raise SemanticException(f"Не умею выполнять {type(node).__name__}")
+
+
+def reverse_postorder(func: IRFunction) -> list[int]:
+    order, seen = [], {0}
+    stack = [(0, iter(func.blocks[0].succs))]
+    while stack:
+        index, succs = stack[-1]
+        succ = next(succs, None)
+        if succ is None:
+            stack.pop()
+            order.append(index)
+        elif succ not in seen:
+            seen.add(succ)
+            stack.append((succ, iter(func.blocks[succ].succs)))
+    order.reverse()
+    return order
+
+
+def compute_dominators(func: IRFunction) -> list[int]:
+    order = reverse_postorder(func)
+    position = {index: number for number, index in enumerate(order)}
+    idom = [-1] * len(func.blocks)
+    idom[0] = 0
+    changed = True
+    while changed:
+        changed = False
+        for index in order[1:]:
+            new = -1
+            for pred in func.blocks[index].preds:
+                if idom[pred] == -1:
+                    continue
+                if new == -1:
+                    new = pred
+                    continue
+                left, right = pred, new
+                while left != right:
+                    while position[left] > position[right]:
+                        left = idom[left]
+                    while position[right] > position[left]:
+                        right = idom[right]
+                new = left
+            if idom[index] != new:
+                idom[index] = new
+                changed = True
+    func.idom = idom
+    return idom
+
+
+def dominance_frontiers(func: IRFunction) -> list[set[int]]:
+    idom = func.idom or compute_dominators(func)
+    frontiers = [set() for _ in func.blocks]
+    for block in func.blocks:
+        if len(block.preds) < 2:
+            continue
+        for pred in block.preds:
+            runner = pred
+            while runner != idom[block.index]:
+                frontiers[runner].add(block.index)
+                runner = idom[runner]
+    return frontiers
+
+
+def build_ssa(func: IRFunction):
+    if func.ssa:
+        return
+    compute_dominators(func)
+    frontiers = dominance_frontiers(func)
+    code = func.code
+    variables = func.variables
+
+    defsites = {}
+    for block in func.blocks:
+        for index in range(block.start, block.end):
+            if code.op[index] in DEFINES and code.dst[index] in variables:
+                defsites.setdefault(code.dst[index], set()).add(block.index)
+    for var, sites in defsites.items():
+        placed = set()
+        work = list(sites)
+        while work:
+            for frontier in frontiers[work.pop()]:
+                if frontier not in placed:
+                    placed.add(frontier)
+                    func.blocks[frontier].phis.append(Phi(var, var))
+                    if frontier not in sites:
+                        work.append(frontier)
+
+    children = [[] for _ in func.blocks]
+    for index in range(1, len(func.blocks)):
+        children[func.idom[index]].append(index)
+    stacks = {var: [] for var in variables}
+    versions = dict.fromkeys(variables, 0)
+    undefined = NO_VALUE
+
+    def rename(var):
+        versions[var] += 1
+        new = func.new_register(f"{func.registers[var]}.{versions[var]}")
+        stacks[var].append(new)
+        return new
+
+    work = [(0, None)]
+    while work:
+        index, pushed = work.pop()
+        if pushed is not None:
+            for var in pushed:
+                stacks[var].pop()
+            continue
+        block = func.blocks[index]
+        pushed = []
+        for phi in block.phis:
+            phi.dst = rename(phi.var)
+            pushed.append(phi.var)
+        for pos in range(block.start, block.end):
+            op = code.op[pos]
+            for name in USES.get(op, ()):
+                column = code.field(name)
+                value = column[pos]
+                if value in variables:
+                    stack = stacks[value]
+                    column[pos] = stack[-1] if stack else undefined
+            if op in DEFINES and code.dst[pos] in variables:
+                var = code.dst[pos]
+                code.dst[pos] = rename(var)
+                pushed.append(var)
+        for succ in block.succs:
+            for phi in func.blocks[succ].phis:
+                stack = stacks[phi.var]
+                phi.args[index] = stack[-1] if stack else undefined
+        work.append((index, pushed))
+        work.extend((child, None) for child in reversed(children[index]))
+    func.ssa = True
+
+
+def lower_program(program: ast.Program, ssa: bool = True) -> IRModule:
+    module = _Lowering(program).lower()
+    if ssa:
+        for func in module.functions:
+            build_ssa(func)
+    return module
+
+
+def _operand(module: IRModule, func: IRFunction, value: int) -> str:
+    if value == NO_VALUE:
+        return "_"
+    if value >= 0:
+        return func.registers[value]
+    return repr(module.value(value))
+
+
+def _memory(module: IRModule, func: IRFunction, slot: int, hops: int) -> str:
+    for _ in range(hops):
+        func = module.functions[func.parent]
+    return f"{func.memory_names[slot]}@{func.name}"
+
+
+def format_instruction(module: IRModule, func: IRFunction, op, dst, a, b, c) -> str:
+    def value(operand):
+        return _operand(module, func, operand)
+    if op == COPY:
+        return f"{value(dst)} = {value(a)}"
+    if op == UNARY:
+        return f"{value(dst)} = {UNARY_OPS[c].value} {value(a)}"
+    if op == BINARY:
+        return f"{value(dst)} = {value(a)} {BINARY_OPS[c].value} {value(b)}"
+    if op == CONVERT:
+        return f"{value(dst)} = convert {value(a)} -> {TYPES[c]}"
+    if op == LOAD:
+        return f"{value(dst)} = load {_memory(module, func, a, b)}"
+    if op == STORE:
+        return f"store {_memory(module, func, a, b)}, {value(c)}"
+    if op == PARAM:
+        return f"{value(dst)} = param {a}"
+    if op == ARG:
+        return f"arg {value(a)}"
+    if op == CALL:
+        return f"{value(dst)} = call {module.functions[a].name}/{b} ^{c}"
+    if op == WRITE:
+        return f"write{'ln' if b else ''} {a}"
+    if op == READ:
+        return f"{value(dst)} = read{'ln' if b else ''} {', '.join(map(str, module.aux[a]))}"
+    if op == ITEM:
+        return f"{value(dst)} = item {value(a)}[{b}] or {value(c)}"
+    if op == JUMP:
+        return f"jump b{a}"
+    if op == BRANCH:
+        return f"branch {value(a)}, b{b}, b{c}"
+    if op == RETURN:
+        return f"return {value(a)}"
+    return f"fail {value(a)}"
+
+
+def format_function(module: IRModule, func: IRFunction) -> str:
+    lines = [f"function {func.name} depth={func.depth} params={func.params}"]
+    for block in func.blocks:
+        preds = ", ".join(f"b{pred}" for pred in block.preds)
+        lines.append(f"b{block.index}:" + (f"  ; preds {preds}" if preds else ""))
+        for phi in block.phis:
+            args = ", ".join(f"b{pred}: {_operand(module, func, value)}" for pred, value in sorted(phi.args.items()))
+            lines.append(f"  {func.registers[phi.dst]} = phi [{args}]")
+        for _, op, dst, a, b, c in func.block_code(block):
+            lines.append("  " + format_instruction(module, func, op, dst, a, b, c))
+    return "\n".join(lines)
+
+
+def format_module(module: IRModule) -> str:
+    return "\n\n".join(format_function(module, func) for func in module.functions) + "\n"
+
+
+BINARY_TABLE = tuple(BINARY_FUNCS[kind] for kind in BINARY_OPS)
+UNARY_TABLE = tuple(UNARY_FUNCS[kind] for kind in UNARY_OPS)
+CONVERTERS = tuple(converter_for(type_) for type_ in TYPES)
+
+
+class _IRFrame:
+    __slots__ = ("func", "regs", "memory", "link", "args", "pc", "block", "result")
+
+    def __init__(self, func: IRFunction, link, args, result):
+        self.func = func
+        self.regs = [None] * len(func.registers)
+        self.memory = list(func.memory_defaults)
+        self.link = link
+        self.args = args
+        self.pc = func.blocks[0].start
+        self.block = 0
+        self.result = result
+
+
+class IRInterpreter:
+    def __init__(self, module: IRModule, input_buffer: InputBuffer | None = None, echo: bool = False):
+        self.module = module
+        self.input = input_buffer if input_buffer is not None else InputBuffer()
+        self.echo = echo
+        self.output = []
+        self.steps = 0
+
+    def _emit(self, text: str):
+        self.output.append(text)
+        if self.echo:
+            print(text, end='')
+
+    def run(self) -> str:
+        module = self.module
+        consts = module.consts
+        frames = []
+        frame = _IRFrame(module.main, None, [], NO_VALUE)
+        pending = []
+        steps = 0
+
+        def get(value):
+            if value >= 0:
+                return regs[value]
+            if value == NO_VALUE:
+                return None
+            return consts[-value - 1]
+
+        def enter(target, source):
+            phis = blocks[target].phis
+            if phis:
+                values = [get(phi.args.get(source, NO_VALUE)) for phi in phis]
+                for phi, value in zip(phis, values):
+                    regs[phi.dst] = value
+            frame.block = target
+            return blocks[target].start
+
+        while True:
+            func = frame.func
+            code = func.code
+            ops, dsts, col_a, col_b, col_c = code.op, code.dst, code.a, code.b, code.c
+            blocks = func.blocks
+            regs = frame.regs
+            pc = frame.pc
+            switch = False
+            while not switch:
+                op = ops[pc]
+                dst, a, b, c = dsts[pc], col_a[pc], col_b[pc], col_c[pc]
+                pc += 1
+                steps += 1
+                if op == COPY:
+                    regs[dst] = get(a)
+                elif op == BINARY:
+                    regs[dst] = BINARY_TABLE[c](get(a), get(b))
+                elif op == BRANCH:
+                    pc = enter(b if get(a) else c, frame.block)
+                elif op == JUMP:
+                    pc = enter(a, frame.block)
+                elif op == UNARY:
+                    regs[dst] = UNARY_TABLE[c](get(a))
+                elif op == CONVERT:
+                    regs[dst] = CONVERTERS[c](get(a))
+                elif op == LOAD:
+                    target = frame
+                    for _ in range(b):
+                        target = target.link
+                    regs[dst] = target.memory[a]
+                elif op == STORE:
+                    target = frame
+                    for _ in range(b):
+                        target = target.link
+                    target.memory[a] = get(c)
+                elif op == PARAM:
+                    regs[dst] = frame.args[a]
+                elif op == ARG:
+                    pending.append(get(a))
+                elif op == CALL:
+                    link = frame
+                    for _ in range(c):
+                        link = link.link
+                    args = pending[len(pending) - b:]
+                    del pending[len(pending) - b:]
+                    frame.pc = pc
+                    frames.append(frame)
+                    frame = _IRFrame(module.functions[a], link, args, dst)
+                    switch = True
+                elif op == RETURN:
+                    value = get(a)
+                    if not frames:
+                        self.steps = steps
+                        return ''.join(self.output)
+                    result = frame.result
+                    frame = frames.pop()
+                    frame.regs[result] = value
+                    switch = True
+                elif op == WRITE:
+                    args = pending[len(pending) - a:]
+                    del pending[len(pending) - a:]
+                    text = ''.join(str(arg) for arg in args)
+                    self._emit(text + "\n" if b else text)
+                elif op == READ:
+                    values = self.input.read_values(module.aux[a], bool(b))
+                    if values is None:
+                        raise SemanticException("Недостаточно входных данных")
+                    regs[dst] = values
+                elif op == ITEM:
+                    value = get(a)[b]
+                    regs[dst] = value if value is not None else get(c)
+                else:
+                    raise SemanticException(get(a))
+
+
+def run_ir(module: IRModule, input_text: str = "", echo: bool = False) -> str:
+    return IRInterpreter(module, InputBuffer(input_text), echo).run()
@@ -0,0 +1,808 @@
+from __future__ import annotations
+import hashlib
+import json
+import operator
+import os
+import time
+from dataclasses import dataclass
+
+from src.ast import nodes as ast
+from src.ast.walk import iter_nodes, trampoline
+from src.pascal.semantic import (
+    INT, BOOL, STR, DOUBLE, InputBuffer, MemoCache, SemanticChecker, SemanticException, _SCALAR_TYPES, memo_label,
+)
+
+
+(
+    ASSIGN_LOCAL, ASSIGN_OUTER, BRANCH_FALSE, JUMP, FOR_TEST, FOR_TEST_DOWN, FOR_STEP,
+    EVAL, STORE_LOCAL, STORE_OUTER, JUMP_IF_FALSE, UNOP, BINOP, CONVERT,
+    CALL, TAIL_CALL, BUILTIN, READ, POP, RETURN, FAIL, HALT, HIT,
+    BRANCH_TRUE, JUMP_IF_TRUE, FOR_NEXT, FOR_NEXT_DOWN,
+) = range(27)
+
+DONE = "done"
+YIELDED = "yield"
+NEED_INPUT = "input"
+
+
+BINARY_FUNCS = {
+    ast.BinaryOpKind.ADD: operator.add,
+    ast.BinaryOpKind.SUB: operator.sub,
+    ast.BinaryOpKind.MUL: operator.mul,
+    ast.BinaryOpKind.FLOAT_DIV: operator.floordiv,
+    ast.BinaryOpKind.INT_DIV: operator.floordiv,
+    ast.BinaryOpKind.MOD: operator.mod,
+    ast.BinaryOpKind.AND: lambda left, right: left and right,
+    ast.BinaryOpKind.OR: lambda left, right: left or right,
+    ast.BinaryOpKind.EQ: operator.eq,
+    ast.BinaryOpKind.NE: operator.ne,
+    ast.BinaryOpKind.LT: operator.lt,
+    ast.BinaryOpKind.LE: operator.le,
+    ast.BinaryOpKind.GT: operator.gt,
+    ast.BinaryOpKind.GE: operator.ge,
+}
+
+UNARY_FUNCS = {
+    ast.UnaryOpKind.NOT: operator.not_,
+    ast.UnaryOpKind.PLUS: operator.pos,
+    ast.UnaryOpKind.MINUS: operator.neg,
+}
+
+
+def _to_char(value):
+    text = str(value)
+    return text[:1] if text else ''
+
+
+def converter_for(target_type):
+    if target_type == INT:
+        return int
+    if target_type == BOOL:
+        return bool
+    if target_type == DOUBLE:
+        return float
+    if target_type == STR:
+        return _to_char
+    return lambda value: value
+
+
+def default_value(type_name: str):
+    if type_name == "integer":
+        return 0
+    if type_name == "boolean":
+        return False
+    if type_name == "char":
+        return ''
+    if type_name == "double":
+        return 0.0
+    return None
+
+
+MAX_CLOSURE_DEPTH = 64
+
+
+def closure_ok(node, limit: int = MAX_CLOSURE_DEPTH) -> bool:
+    stack = [(node, 1)]
+    while stack:
+        node, depth = stack.pop()
+        if depth > limit or isinstance(node, ast.Call):
+            return False
+        if isinstance(node, ast.BinOp):
+            stack.append((node.left, depth + 1))
+            stack.append((node.right, depth + 1))
+        elif isinstance(node, (ast.UnOp, ast.Cast, ast.TypeConvertNode)):
+            stack.append((node.expr, depth + 1))
+    return True
+
+
+class CodeUnit:
+    def __init__(self, name: str, func: ast.Func | None, block: ast.Block, depth: int):
+        self.name = name
+        self.func = func
+        self.block = block
+        self.depth = depth
+        self.params = func.params if func is not None else []
+        self.code = []
+        self.initial_slots = []
+        self.var_slots = {}
+
+    def __repr__(self):
+        return f"CodeUnit({self.name}, depth={self.depth}, size={len(self.code)})"
+
+
+class _Frame:
+    __slots__ = ("unit", "pc", "slots", "stack", "link", "memo")
+
+    def __init__(self, unit: CodeUnit, slots: list, link):
+        self.unit = unit
+        self.pc = 0
+        self.slots = slots
+        self.stack = []
+        self.link = link
+        self.memo = None
+
+
+class ProgramCode:
+    def __init__(self, program: ast.Program, coverage=None):
+        self.program = program
+        self.coverage = coverage
+        self.units = []
+        self.unit_of = {}
+        self.slot_of = {}
+        self.main = self._declare_unit(program.name, None, program.block, 0)
+        for unit in list(self.units):
+            self._compile_unit(unit)
+        self._fingerprint = None
+
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            from src.ast.serialize import iter_records
+            digest = hashlib.sha256()
+            for record in iter_records(self.program):
+                if record[0] == "N":
+                    record = [record[1], *record[4:]]
+                digest.update(json.dumps(record, ensure_ascii=False).encode("utf-8"))
+            if self.coverage is not None:
+                digest.update(f"coverage:{len(self.coverage.counts)}".encode())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def _declare_unit(self, name, func, block, depth):
+        unit = CodeUnit(name, func, block, depth)
+        self.units.append(unit)
+        if func is not None:
+            self.unit_of[id(func)] = unit
+        slots = unit.initial_slots
+        for param in unit.params:
+            self.slot_of[id(param.node_ident)] = (depth, len(slots))
+            slots.append(None)
+        for decl in block.var_decls:
+            self.slot_of[id(decl.node_ident)] = (depth, len(slots))
+            if not decl.temporary:
+                unit.var_slots[decl.ident.name] = len(slots)
+            slots.append(default_value(decl.type_name))
+        for node in iter_nodes(block.body):
+            if isinstance(node, ast.For):
+                self.slot_of[id(node.ident.node_ident)] = (depth, len(slots))
+                slots.append(None)
+        for func_decl in block.func_decls:
+            if func_decl.deferred:
+                continue
+            self._declare_unit(func_decl.name.name, func_decl, func_decl.block, depth + 1)
+        return unit
+
+    def _compile_unit(self, unit: CodeUnit):
+        _UnitCompiler(self, unit).compile()
+
+
+class _UnitCompiler:
+    def __init__(self, program_code: ProgramCode, unit: CodeUnit):
+        self.program_code = program_code
+        self.unit = unit
+        self.code = unit.code
+        self.loops = []
+        self.coverage = program_code.coverage
+        self.stubs = []
+
+    def compile(self):
+        if self.coverage is not None and self.unit.func is not None:
+            self.hit(self.coverage.function(self.unit.func))
+        trampoline(self.stmt(self.unit.block.body))
+        if self.unit.func is None:
+            self.emit(HALT)
+        else:
+            self.emit(RETURN, 0)
+        for jump, counter, target in self.stubs:
+            self.patch(jump, len(self.code))
+            self.hit(counter, target)
+
+    def emit(self, op, a=None, b=None, c=None):
+        self.code.append((op, a, b, c))
+        return len(self.code) - 1
+
+    def hit(self, counter, target=None):
+        self.emit(HIT, counter, self.coverage.counts, target)
+
+    def patch(self, index, target):
+        op, a, b, c = self.code[index]
+        if op in (JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE):
+            self.code[index] = (op, target, b, c)
+        elif op in (BRANCH_FALSE, BRANCH_TRUE):
+            self.code[index] = (op, a, target, c)
+        elif op in (FOR_TEST, FOR_TEST_DOWN, FOR_NEXT, FOR_NEXT_DOWN):
+            self.code[index] = (op, a, b, target)
+
+    def hidden_slot(self):
+        self.unit.initial_slots.append(None)
+        return len(self.unit.initial_slots) - 1
+
+    def resolve(self, ident: ast.Ident):
+        desc = ident.node_ident
+        try:
+            depth, slot = self.program_code.slot_of[id(desc)]
+        except KeyError:
+            raise SemanticException(f"Переменная {ident.name} не объявлена")
+        return self.unit.depth - depth, slot
+
+    def callee(self, node: ast.Call):
+        desc = node.func.node_ident
+        func = desc.func_node if desc is not None else None
+        unit = self.program_code.unit_of.get(id(func))
+        if unit is None:
+            raise SemanticException(f"{node.func.name} не является функцией")
+        return unit, self.unit.depth - (unit.depth - 1)
+
+    def fn(self, node):
+        if isinstance(node, ast.Literal):
+            value = node.value
+            return lambda frame: value
+        if isinstance(node, ast.Ident):
+            hops, slot = self.resolve(node)
+            if hops == 0:
+                return lambda frame: frame.slots[slot]
+            if hops == 1:
+                return lambda frame: frame.link.slots[slot]
+
+            def load_outer(frame):
+                for _ in range(hops):
+                    frame = frame.link
+                return frame.slots[slot]
+            return load_outer
+        if isinstance(node, ast.BinOp):
+            func = BINARY_FUNCS[node.op]
+            left = self.fn(node.left)
+            if isinstance(node.right, ast.Literal):
+                const = node.right.value
+                return lambda frame: func(left(frame), const)
+            right = self.fn(node.right)
+            return lambda frame: func(left(frame), right(frame))
+        if isinstance(node, ast.UnOp):
+            func = UNARY_FUNCS[node.op]
+            inner = self.fn(node.expr)
+            return lambda frame: func(inner(frame))
+        if isinstance(node, ast.TypeConvertNode):
+            convert = converter_for(node.target_type)
+            inner = self.fn(node.expr)
+            return lambda frame: convert(inner(frame))
+        if isinstance(node, ast.Cast):
+            convert = converter_for(SemanticChecker._type_from_name(node.type_name))
+            inner = self.fn(node.expr)
+            return lambda frame: convert(inner(frame))
+        raise SemanticException(f"Не умею вычислять {type(node).__name__}")
+
+    def expr(self, node):
+        if closure_ok(node):
+            self.emit(EVAL, self.fn(node))
+        elif isinstance(node, ast.BinOp):
+            yield self.expr(node.left)
+            yield self.expr(node.right)
+            self.emit(BINOP, BINARY_FUNCS[node.op])
+        elif isinstance(node, ast.UnOp):
+            yield self.expr(node.expr)
+            self.emit(UNOP, UNARY_FUNCS[node.op])
+        elif isinstance(node, ast.TypeConvertNode):
+            yield self.expr(node.expr)
+            self.emit(CONVERT, converter_for(node.target_type))
+        elif isinstance(node, ast.Cast):
+            yield self.expr(node.expr)
+            self.emit(CONVERT, converter_for(SemanticChecker._type_from_name(node.type_name)))
+        elif isinstance(node, ast.Call):
+            yield self.call(node)
+        else:
+            raise SemanticException(f"Не умею вычислять {type(node).__name__}")
+
+    def read(self, node: ast.Call):
+        targets = []
+        for arg in node.args:
+            if not isinstance(arg, ast.Ident):
+                self.emit(FAIL, f"{node.func.name} ожидает переменную")
+                return
+            hops, slot = self.resolve(arg)
+            targets.append((hops, slot))
+        types = [arg.node_type for arg in node.args]
+        self.emit(READ, targets, types, node.func.name == "readln")
+
+    def call(self, node: ast.Call, tail: bool = False):
+        desc = node.func.node_ident
+        if desc is not None and desc.built_in and node.func.name in ("read", "readln"):
+            return self.read(node)
+        for arg in node.args:
+            yield self.expr(arg)
+        if desc is not None and desc.built_in:
+            self.emit(BUILTIN, node.func.name, len(node.args))
+            return
+        unit, hops = self.callee(node)
+        self.emit(TAIL_CALL if tail and hops else CALL, unit, len(node.args), hops)
+
+    def branch_false(self, cond):
+        if not closure_ok(cond):
+            yield self.expr(cond)
+            return self.emit(JUMP_IF_FALSE)
+        return self.emit(BRANCH_FALSE, self.fn(cond))
+
+    def branch_true(self, cond, target=None):
+        if not closure_ok(cond):
+            yield self.expr(cond)
+            return self.emit(JUMP_IF_TRUE, target)
+        return self.emit(BRANCH_TRUE, self.fn(cond), target)
+
+    def stmt(self, node):
+        if isinstance(node, ast.CompoundStmt):
+            for stmt in node.statements:
+                yield self.stmt(stmt)
+            return
+        taken = skipped = None
+        if self.coverage is not None:
+            self.hit(self.coverage.statement(node))
+            if isinstance(node, (ast.If, ast.While, ast.For)):
+                taken, skipped = self.coverage.branch_counters(node)
+        if isinstance(node, ast.Assign):
+            hops, slot = self.resolve(node.ident)
+            if closure_ok(node.expr):
+                if hops == 0:
+                    self.emit(ASSIGN_LOCAL, slot, self.fn(node.expr))
+                else:
+                    self.emit(ASSIGN_OUTER, slot, self.fn(node.expr), hops)
+            else:
+                yield self.expr(node.expr)
+                if hops == 0:
+                    self.emit(STORE_LOCAL, slot)
+                else:
+                    self.emit(STORE_OUTER, slot, None, hops)
+        elif isinstance(node, ast.If) and node.likely_then and node.else_branch is not None:
+            jump_then = yield self.branch_true(node.cond)
+            if skipped is not None:
+                self.hit(skipped)
+            yield self.stmt(node.else_branch)
+            jump_end = self.emit(JUMP)
+            self.patch(jump_then, len(self.code))
+            if taken is not None:
+                self.hit(taken)
+            yield self.stmt(node.then_branch)
+            self.patch(jump_end, len(self.code))
+        elif isinstance(node, ast.If):
+            jump_else = yield self.branch_false(node.cond)
+            if taken is not None:
+                self.hit(taken)
+            yield self.stmt(node.then_branch)
+            if node.else_branch is not None:
+                jump_end = self.emit(JUMP)
+                self.patch(jump_else, len(self.code))
+                if skipped is not None:
+                    self.hit(skipped)
+                yield self.stmt(node.else_branch)
+                self.patch(jump_end, len(self.code))
+            elif skipped is not None:
+                self.stubs.append((jump_else, skipped, len(self.code)))
+            else:
+                self.patch(jump_else, len(self.code))
+        elif isinstance(node, ast.While) and node.hot:
+            jump_end = yield self.branch_false(node.cond)
+            body = len(self.code)
+            if taken is not None:
+                self.hit(taken)
+            continues = []
+            self.loops.append(([], continues))
+            yield self.stmt(node.body)
+            breaks, _ = self.loops.pop()
+            test_at = len(self.code)
+            yield self.branch_true(node.cond, body)
+            self.patch(jump_end, len(self.code))
+            if skipped is not None:
+                self.hit(skipped)
+            for index in continues:
+                self.patch(index, test_at)
+            for index in breaks:
+                self.patch(index, len(self.code))
+        elif isinstance(node, ast.While):
+            top = len(self.code)
+            jump_end = yield self.branch_false(node.cond)
+            if taken is not None:
+                self.hit(taken)
+            self.loops.append(([], top))
+            yield self.stmt(node.body)
+            breaks, _ = self.loops.pop()
+            self.emit(JUMP, top)
+            self.patch(jump_end, len(self.code))
+            if skipped is not None:
+                self.hit(skipped)
+            for index in breaks:
+                self.patch(index, len(self.code))
+        elif isinstance(node, ast.For):
+            _, var_slot = self.resolve(node.ident)
+            end_slot = self.hidden_slot()
+            step = 1 if node.direction == "to" else -1
+            yield self.expr(node.start)
+            self.emit(STORE_LOCAL, var_slot)
+            yield self.expr(node.end)
+            self.emit(STORE_LOCAL, end_slot)
+            top = self.emit(FOR_TEST if step == 1 else FOR_TEST_DOWN, var_slot, end_slot)
+            body = len(self.code)
+            if taken is not None:
+                self.hit(taken)
+            continues = []
+            self.loops.append(([], continues))
+            yield self.stmt(node.body)
+            breaks, _ = self.loops.pop()
+            if node.hot:
+                step_at = self.emit(FOR_NEXT if step == 1 else FOR_NEXT_DOWN, var_slot, end_slot, body)
+            else:
+                step_at = self.emit(FOR_STEP, var_slot, step)
+                self.emit(JUMP, top)
+            self.patch(top, len(self.code))
+            if skipped is not None:
+                self.hit(skipped)
+            for index in continues:
+                self.patch(index, step_at)
+            for index in breaks:
+                self.patch(index, len(self.code))
+        elif isinstance(node, ast.Break):
+            if not self.loops:
+                self.emit(FAIL, "break вне цикла")
+            else:
+                self.loops[-1][0].append(self.emit(JUMP))
+        elif isinstance(node, ast.Continue):
+            if not self.loops:
+                self.emit(FAIL, "continue вне цикла")
+            elif isinstance(self.loops[-1][1], list):
+                self.loops[-1][1].append(self.emit(JUMP))
+            else:
+                self.emit(JUMP, self.loops[-1][1])
+        elif isinstance(node, ast.Return):
+            if isinstance(node.expr, ast.Call) and not node.expr.func.node_ident.built_in:
+                yield self.call(node.expr, tail=True)
+                self.emit(RETURN, 1)
+            elif node.expr is not None:
+                yield self.expr(node.expr)
+                self.emit(RETURN, 1)
+            else:
+                self.emit(RETURN, 0)
+        elif isinstance(node, ast.Call):
+            yield self.call(node)
+            self.emit(POP)
+        else:
+            raise SemanticException(f"Не умею выполнять {type(node).__name__}")
+
+
+CHECK_INTERVAL = 4096
+
+
+@dataclass
+class ExecutionLimits:
+    max_steps: int | None = None
+    timeout: float | None = None
+    max_call_depth: int | None = None
+    max_output_bytes: int | None = None
+
+
+class LimitExceeded(SemanticException):
+    def __init__(self, limit: str, message: str, output: str, stats: dict):
+        super().__init__(message)
+        self.limit = limit
+        self.output = output
+        self.stats = stats
+
+
+class Machine:
+    def __init__(self, program_code: ProgramCode, output=None, memoize: bool = False,
+                 memo_size: int = 1024, memo_caches=None, limits: ExecutionLimits | None = None,
+                 input_buffer: InputBuffer | None = None, echo: bool = True, checkpoint=None):
+        self.program_code = program_code
+        self.output = output if output is not None else []
+        self.input = input_buffer if input_buffer is not None else InputBuffer()
+        self.echo = echo
+        self.memoize = memoize
+        self.memo_size = memo_size
+        self.memo_caches = memo_caches if memo_caches is not None else {}
+        self.limits = limits or ExecutionLimits()
+        main = program_code.main
+        self.frame = _Frame(main, list(main.initial_slots), None)
+        self.frames = []
+        self.max_depth = 0
+        self.steps = 0
+        self.output_bytes = 0
+        self.started = None
+        self.deadline = None
+        self._budget = 0
+        self._chunk = 0
+        self._slice = None
+        self.checkpoint = checkpoint
+        self.checkpoints = 0
+        self.resumed = False
+        self.next_checkpoint = None
+
+    def stats(self):
+        elapsed = time.monotonic() - self.started if self.started is not None else 0.0
+        stats = {
+            "steps": self.steps + self._chunk - self._budget,
+            "elapsed": elapsed,
+            "max_depth": self.max_depth,
+            "output_bytes": self.output_bytes,
+        }
+        if self.checkpoint is not None:
+            stats["checkpoints"] = self.checkpoints
+            stats["resumed"] = self.resumed
+        return stats
+
+    def _start_checkpoints(self):
+        from src.pascal.checkpoint import Checkpoint
+        policy = self.checkpoint
+        if policy.resume and os.path.exists(policy.path):
+            Checkpoint.load(policy.path).restore(self)
+            self.resumed = True
+        self.next_checkpoint = time.monotonic() + policy.interval
+
+    def save_checkpoint(self):
+        from src.pascal.checkpoint import Checkpoint
+        Checkpoint.capture(self).save(self.checkpoint.path)
+        self.checkpoints += 1
+        self.next_checkpoint = time.monotonic() + self.checkpoint.interval
+
+    def _limit_exceeded(self, limit: str, message: str):
+        return LimitExceeded(limit, message, ''.join(self.output), self.stats())
+
+    def _refill(self):
+        self.steps += self._chunk
+        self._chunk = self._budget = 0
+        max_steps = self.limits.max_steps
+        if max_steps is not None and self.steps >= max_steps:
+            raise self._limit_exceeded("steps", f"Превышен лимит шагов ({max_steps})")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise self._limit_exceeded("timeout", f"Превышен лимит времени ({self.limits.timeout} с)")
+        if self.next_checkpoint is not None and time.monotonic() >= self.next_checkpoint:
+            self.save_checkpoint()
+        chunk = CHECK_INTERVAL if max_steps is None else min(CHECK_INTERVAL, max_steps - self.steps)
+        if self._slice is not None:
+            chunk = min(chunk, self._slice)
+            self._slice -= chunk
+        self._chunk = chunk
+        return chunk
+
+    def _emit_output(self, text: str):
+        size = len(text.encode("utf-8"))
+        max_bytes = self.limits.max_output_bytes
+        if max_bytes is not None and self.output_bytes + size > max_bytes:
+            raise self._limit_exceeded("output", f"Превышен лимит вывода ({max_bytes} байт)")
+        self.output_bytes += size
+        self.output.append(text)
+
+    def _memo_cache(self, unit: CodeUnit, args):
+        if not self.memoize or not unit.func.is_pure:
+            return None
+        if not all(isinstance(arg, _SCALAR_TYPES) for arg in args):
+            return None
+        cache = self.memo_caches.get(id(unit.func))
+        if cache is None:
+            cache = self.memo_caches[id(unit.func)] = MemoCache(self.memo_size, memo_label(unit.func))
+        return cache
+
+    def _builtin(self, name, args):
+        if name == "write":
+            text = ''.join(str(arg) for arg in args)
+            self._emit_output(text)
+            if self.echo:
+                print(text, end='')
+        elif name == "writeln":
+            text = ''.join(str(arg) for arg in args)
+            self._emit_output(text + "\n")
+            if self.echo:
+                print(text)
+        else:
+            raise SemanticException(f"{name} не является функцией")
+        return None
+
+    def run(self):
+        while self.resume() != DONE:
+            self.input.close()
+        return self.globals()
+
+    async def run_async(self, reader=None, writer=None, yield_every: int = 1000):
+        import asyncio
+        import codecs
+        self.echo = False
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        flushed = 0
+        while True:
+            status = self.resume(yield_every)
+            if writer is not None and flushed < len(self.output):
+                writer.write(''.join(self.output[flushed:]).encode("utf-8"))
+                flushed = len(self.output)
+                await writer.drain()
+            if status == DONE:
+                return self.globals()
+            if status == NEED_INPUT:
+                chunk = await reader.read(4096) if reader is not None else b""
+                if chunk:
+                    self.input.feed(decoder.decode(chunk))
+                else:
+                    self.input.feed(decoder.decode(b"", final=True))
+                    self.input.close()
+            else:
+                await asyncio.sleep(0)
+
+    def resume(self, steps: int | None = None):
+        self._slice = steps
+        if self.started is None:
+            self.started = time.monotonic()
+            if self.limits.timeout is not None:
+                self.deadline = self.started + self.limits.timeout
+            if self.checkpoint is not None:
+                self._start_checkpoints()
+        max_depth = self.limits.max_call_depth
+        frames = self.frames
+        frame = self.frame
+        unit = frame.unit
+        code = unit.code
+        pc = frame.pc
+        slots = frame.slots
+        stack = frame.stack
+        budget = self._budget
+        try:
+            while True:
+                if not budget:
+                    frame.pc = pc
+                    self.frame = frame
+                    budget = self._refill()
+                    if not budget:
+                        return YIELDED
+                budget -= 1
+                op, a, b, c = code[pc]
+                pc += 1
+                if op == ASSIGN_LOCAL:
+                    slots[a] = b(frame)
+                elif op == BRANCH_FALSE:
+                    if not a(frame):
+                        pc = b
+                elif op == JUMP:
+                    pc = a
+                elif op == FOR_TEST:
+                    if not slots[a] <= slots[b]:
+                        pc = c
+                elif op == FOR_TEST_DOWN:
+                    if not slots[a] >= slots[b]:
+                        pc = c
+                elif op == FOR_STEP:
+                    slots[a] += b
+                elif op == FOR_NEXT:
+                    slots[a] += 1
+                    if slots[a] <= slots[b]:
+                        pc = c
+                elif op == FOR_NEXT_DOWN:
+                    slots[a] -= 1
+                    if slots[a] >= slots[b]:
+                        pc = c
+                elif op == BRANCH_TRUE:
+                    if a(frame):
+                        pc = b
+                elif op == ASSIGN_OUTER:
+                    target = frame
+                    for _ in range(c):
+                        target = target.link
+                    target.slots[a] = b(frame)
+                elif op == EVAL:
+                    stack.append(a(frame))
+                elif op == STORE_LOCAL:
+                    slots[a] = stack.pop()
+                elif op == STORE_OUTER:
+                    target = frame
+                    for _ in range(c):
+                        target = target.link
+                    target.slots[a] = stack.pop()
+                elif op == JUMP_IF_FALSE:
+                    if not stack.pop():
+                        pc = a
+                elif op == JUMP_IF_TRUE:
+                    if stack.pop():
+                        pc = a
+                elif op == BINOP:
+                    right = stack.pop()
+                    stack[-1] = a(stack[-1], right)
+                elif op == UNOP or op == CONVERT:
+                    stack[-1] = a(stack[-1])
+                elif op == CALL or op == TAIL_CALL:
+                    if b:
+                        args = stack[-b:]
+                        del stack[-b:]
+                    else:
+                        args = []
+                    cache = self._memo_cache(a, args)
+                    key = None
+                    if cache is not None:
+                        key = tuple(args)
+                        try:
+                            stack.append(cache.get(key))
+                            continue
+                        except KeyError:
+                            pass
+                    link = frame
+                    for _ in range(c):
+                        link = link.link
+                    new_slots = list(a.initial_slots)
+                    new_slots[:b] = args
+                    if op == TAIL_CALL:
+                        if key is not None:
+                            if frame.memo is None:
+                                frame.memo = []
+                            frame.memo.append((cache, key))
+                        frame.unit = unit = a
+                        frame.slots = slots = new_slots
+                        frame.link = link
+                        code = unit.code
+                        stack.clear()
+                        pc = 0
+                        continue
+                    if max_depth is not None and len(frames) >= max_depth:
+                        self._budget = budget
+                        raise self._limit_exceeded("depth", f"Превышена глубина вызовов ({max_depth})")
+                    frame.pc = pc
+                    frames.append(frame)
+                    if len(frames) > self.max_depth:
+                        self.max_depth = len(frames)
+                    frame = _Frame(a, new_slots, link)
+                    frame.memo = [(cache, key)] if cache is not None else None
+                    unit = a
+                    code = unit.code
+                    slots = new_slots
+                    stack = frame.stack
+                    pc = 0
+                elif op == RETURN:
+                    value = stack.pop() if a else None
+                    if frame.memo is not None:
+                        for cache, key in reversed(frame.memo):
+                            cache.put(key, value)
+                    frame = frames.pop()
+                    unit = frame.unit
+                    code = unit.code
+                    pc = frame.pc
+                    slots = frame.slots
+                    stack = frame.stack
+                    stack.append(value)
+                elif op == BUILTIN:
+                    if b:
+                        args = stack[-b:]
+                        del stack[-b:]
+                    else:
+                        args = []
+                    self._budget = budget
+                    stack.append(self._builtin(a, args))
+                elif op == READ:
+                    values = self.input.read_values(b, c)
+                    if values is None:
+                        budget += 1
+                        frame.pc = pc - 1
+                        self.frame = frame
+                        return NEED_INPUT
+                    for (hops, slot), value in zip(a, values):
+                        if value is not None:
+                            target = frame
+                            for _ in range(hops):
+                                target = target.link
+                            target.slots[slot] = value
+                    stack.append(None)
+                elif op == POP:
+                    stack.pop()
+                elif op == FAIL:
+                    raise SemanticException(a)
+                elif op == HALT:
+                    frame.pc = pc - 1
+                    self.frame = frame
+                    if self.checkpoint is not None and os.path.exists(self.checkpoint.path):
+                        os.remove(self.checkpoint.path)
+                    return DONE
+                elif op == HIT:
+                    b[a] += 1
+                    budget += 1
+                    if c is not None:
+                        pc = c
+        finally:
+            self._budget = budget
+
+    def globals(self):
+        main = self.program_code.main
+        slots = self.frame.slots if not self.frames else self.frames[0].slots
+        env = {"__parent__": None}
+        for name, slot in main.var_slots.items():
+            env[name] = slots[slot]
+        for func in main.block.func_decls:
+            env[func.name.name] = func
+        return env
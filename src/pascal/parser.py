@@ -1,15 +1,22 @@
 from __future__ import annotations
-from pathlib import Path
-from lark import Lark, Transformer, UnexpectedInput, Token
+import os
+import sys
+import lark
+from lark import Lark, Transformer_NonRecursive, UnexpectedInput, Token
 
 from src.ast import nodes as ast
+from src.ast.positions import SourceMap
 
 
+GRAMMAR_PATH = os.path.join(os.path.dirname(__file__), "pascal.lark")
+
+_parsers = {}
+
 class PascalParserError(Exception):
     pass
 
 
-class ASTBuilder(Transformer):
+class ASTBuilder(Transformer_NonRecursive):
     binary_ops = {
         "bin_or": ast.BinaryOpKind.OR,
         "bin_and": ast.BinaryOpKind.AND,
@@ -32,20 +39,45 @@ class ASTBuilder(Transformer):
         "un_minus": ast.UnaryOpKind.MINUS,
     }
 
-    @staticmethod
-    def _line_from(item):
-        if isinstance(item, Token):
-            return item.line, item.column
-        return getattr(item, 'row', None), getattr(item, 'col', None)
+    def __init__(self, source=None):
+        super().__init__()
+        self.source = source
 
     def _set_pos_from(self, node, item):
-        row, col = self._line_from(item)
-        node.row = row
-        node.col = col
+        if isinstance(item, Token):
+            source = self.source or getattr(item, "source", None)
+            if source is None:
+                node._row, node._col = item.line, item.column
+            else:
+                node._source, node._offset = source, item.start_pos
+        elif isinstance(item, ast.ASTNode):
+            node.copy_position(item)
         return node
 
     def program(self, items):
-        node = ast.Program(name=str(items[0]), block=items[1])
+        uses = items[1] if len(items) == 3 else []
+        node = ast.Program(name=str(items[0]), block=items[-1], uses=uses)
+        return self._set_pos_from(node, items[0])
+
+    def uses_clause(self, items):
+        result = []
+        for token in items[0]:
+            result.append(self._set_pos_from(ast.Ident(name=str(token)), token))
+        return result
+
+    def unit(self, items):
+        uses = []
+        interface = []
+        funcs = []
+        for item in items[1:]:
+            if isinstance(item, list):
+                uses = item
+            elif item.block is None:
+                interface.append(item)
+            else:
+                funcs.append(item)
+        block = ast.Block(var_decls=[], func_decls=funcs)
+        node = ast.Unit(name=str(items[0]), uses=uses, interface=interface, block=block)
         return self._set_pos_from(node, items[0])
 
     def block(self, items):
@@ -76,12 +108,10 @@ class ASTBuilder(Transformer):
         type_name = str(items[1])
         result = []
         for name in names:
-            ident = ast.Ident(name=name)
-            ident.row = getattr(name, 'line', None)
-            ident.col = getattr(name, 'column', None)
+            ident = ast.Ident(name=str(name))
+            self._set_pos_from(ident, name)
             node = ast.VarDecl(ident=ident, type_name=type_name)
-            node.row = ident.row
-            node.col = ident.col
+            node.copy_position(ident)
             result.append(node)
         return result
 
@@ -91,8 +121,7 @@ class ASTBuilder(Transformer):
     def func_decl(self, items):
         name_token = items[0]
         name = ast.Ident(name=str(name_token))
-        name.row = getattr(name_token, 'line', None)
-        name.col = getattr(name_token, 'column', None)
+        self._set_pos_from(name, name_token)
         if len(items) == 4:
             params, return_type, block = items[1], str(items[2]), items[3]
         else:
@@ -100,6 +129,9 @@ class ASTBuilder(Transformer):
         node = ast.Func(name=name, params=params, return_type=return_type, block=block)
         return self._set_pos_from(node, name_token)
 
+    def func_header(self, items):
+        return self.func_decl([*items, None])
+
     def params(self, items):
         params = []
         for item in items:
@@ -115,20 +147,16 @@ class ASTBuilder(Transformer):
         result = []
         for name in names:
             ident = ast.Ident(name=str(name))
-            ident.row = getattr(name, 'line', None)
-            ident.col = getattr(name, 'column', None)
+            self._set_pos_from(ident, name)
             node = ast.VarDecl(ident=ident, type_name=type_name)
-            node.row = ident.row
-            node.col = ident.col
+            node.copy_position(ident)
             result.append(node)
         return result
 
     def compound_stmt(self, items):
         if items:
             return items[0]
-        node = ast.CompoundStmt(statements=[])
-        node.row = node.col = None
-        return node
+        return ast.CompoundStmt(statements=[])
 
     def stmt_list(self, items):
         node = ast.CompoundStmt(statements=items)
@@ -146,8 +174,7 @@ class ASTBuilder(Transformer):
     def for_stmt(self, items):
         ident_token = items[0]
         ident = ast.Ident(name=str(ident_token))
-        ident.row = getattr(ident_token, 'line', None)
-        ident.col = getattr(ident_token, 'column', None)
+        self._set_pos_from(ident, ident_token)
         node = ast.For(ident=ident, start=items[1], direction=str(items[2]), end=items[3], body=self._to_compound(items[4]))
         return self._set_pos_from(node, ident)
 
@@ -164,8 +191,7 @@ class ASTBuilder(Transformer):
     def assign_stmt(self, items):
         ident_token = items[0]
         ident = ast.Ident(name=str(ident_token))
-        ident.row = getattr(ident_token, 'line', None)
-        ident.col = getattr(ident_token, 'column', None)
+        self._set_pos_from(ident, ident_token)
         node = ast.Assign(ident=ident, expr=items[1])
         return self._set_pos_from(node, ident)
 
@@ -175,8 +201,7 @@ class ASTBuilder(Transformer):
     def call(self, items):
         token = items[0]
         func = ast.Ident(name=str(token))
-        func.row = getattr(token, 'line', None)
-        func.col = getattr(token, 'column', None)
+        self._set_pos_from(func, token)
         node = ast.Call(func=func, args=items[1] if len(items) == 2 else [])
         return self._set_pos_from(node, func)
 
@@ -258,16 +283,42 @@ class ASTBuilder(Transformer):
         return ast.CompoundStmt(statements=[stmt])
 
 
+def tables_path() -> str | None:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    directory = os.path.join(base, "pascal")
+    path = os.path.join(directory, f"pascal-lark{lark.__version__}-py{sys.version_info[0]}{sys.version_info[1]}.cache")
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError:
+        return None
+    return path
+
+
+def load_parser(reuse: bool = True, build_ast: bool = False) -> Lark:
+    parser = _parsers.get(build_ast)
+    if parser is None or not reuse:
+        with open(GRAMMAR_PATH, encoding="utf-8") as fp:
+            grammar = fp.read()
+        options = {"transformer": ASTBuilder()} if build_ast else {}
+        parser = _parsers[build_ast] = Lark(grammar, start=["program", "unit"], parser="lalr",
+                                            cache=tables_path() or False, **options)
+    return parser
+
+
 class PascalParser:
     def __init__(self, text: str):
         self.text = text
-        grammar_path = Path(__file__).with_name("pascal.lark")
-        grammar = grammar_path.read_text(encoding="utf-8")
-        self.parser = Lark(grammar, start="program", parser="lalr", propagate_positions=True)
+        self.parser = load_parser()
 
-    def parse_program(self) -> ast.Program:
+    def parse(self, start: str = "program"):
         try:
-            tree = self.parser.parse(self.text)
-            return ASTBuilder().transform(tree)
+            tree = self.parser.parse(self.text, start=start)
+            return ASTBuilder(SourceMap(self.text)).transform(tree)
         except UnexpectedInput as error:
             raise PascalParserError(str(error)) from error
+
+    def parse_program(self) -> ast.Program:
+        return self.parse("program")
+
+    def parse_unit(self) -> ast.Unit:
+        return self.parse("unit")
@@ -0,0 +1,187 @@
+from __future__ import annotations
+import json
+import os
+from dataclasses import dataclass, field
+
+from src.ast import nodes as ast
+from src.ast.walk import iter_blocks, iter_statements
+
+
+VERSION = 1
+HOT_COUNT = 64
+
+
+@dataclass
+class PGOReport:
+    branches: int = 0
+    loops: int = 0
+    hot: list[str] = field(default_factory=list)
+    cold: list[str] = field(default_factory=list)
+    stale: bool = False
+
+    def __str__(self):
+        if self.stale:
+            return "профиль не соответствует программе"
+        return (f"ветвлений: {self.branches}, циклов: {self.loops}, "
+                f"горячих функций: {len(self.hot)}, холодных: {len(self.cold)}")
+
+
+def _key(kind: str, row, col) -> str | None:
+    if row is None:
+        return None
+    return f"{kind}@{row}:{col}"
+
+
+def _add(target: dict, key, value):
+    if key is None:
+        return
+    if isinstance(value, list):
+        current = target.setdefault(key, [0] * len(value))
+        for index, item in enumerate(value):
+            current[index] += item
+    else:
+        target[key] = target.get(key, 0) + value
+
+
+class Profile:
+    def __init__(self, source_hash: str = "", runs: int = 0, statements=None, branches=None, functions=None):
+        self.source_hash = source_hash
+        self.runs = runs
+        self.statements = statements if statements is not None else {}
+        self.branches = branches if branches is not None else {}
+        self.functions = functions if functions is not None else {}
+
+    @classmethod
+    def from_coverage(cls, coverage, source_hash: str = "") -> "Profile":
+        profile = cls(source_hash, 1)
+        counts = coverage.counts
+        for site in coverage.statements:
+            _add(profile.statements, _key(site.kind, site.row, site.col), counts[site.counter])
+        for site in coverage.branches:
+            _add(profile.branches, _key(site.kind, site.row, site.col),
+                 [counts[site.branch], counts[site.branch + 1]])
+        for site in coverage.functions:
+            _add(profile.functions, _key("Func", site.row, site.col), counts[site.counter])
+        return profile
+
+    def merge(self, other: "Profile"):
+        if other.source_hash != self.source_hash:
+            raise ValueError("Профили записаны для разных программ")
+        self.runs += other.runs
+        for mine, theirs in ((self.statements, other.statements), (self.branches, other.branches),
+                             (self.functions, other.functions)):
+            for key, value in theirs.items():
+                _add(mine, key, value)
+
+    def probability(self, key: str) -> float | None:
+        taken = self.branches.get(key)
+        if not taken or not sum(taken):
+            return None
+        return taken[0] / sum(taken)
+
+    def to_json(self) -> dict:
+        return {"version": VERSION, "source_hash": self.source_hash, "runs": self.runs,
+                "statements": self.statements, "branches": self.branches, "functions": self.functions}
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Profile":
+        if data.get("version") != VERSION:
+            raise ValueError(f"Неподдерживаемая версия профиля {data.get('version')!r}")
+        return cls(data["source_hash"], data["runs"], data["statements"], data["branches"], data["functions"])
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as fp:
+            json.dump(self.to_json(), fp, ensure_ascii=False, indent=1, sort_keys=True)
+            fp.write("\n")
+
+    @classmethod
+    def load(cls, path: str) -> "Profile":
+        with open(path, encoding="utf-8") as fp:
+            return cls.from_json(json.load(fp))
+
+    def accumulate(self, path: str) -> "Profile":
+        profile = self
+        if os.path.exists(path):
+            previous = Profile.load(path)
+            if previous.source_hash == self.source_hash:
+                previous.merge(self)
+                profile = previous
+        profile.save(path)
+        return profile
+
+    def average(self, table: dict, key) -> float:
+        value = table.get(key, 0)
+        return value / self.runs if self.runs else 0.0
+
+
+class Heat:
+    def __init__(self):
+        self.calls = {}
+        self.hits = {}
+
+    @staticmethod
+    def _count(table: dict, node):
+        entry = table.get(id(node))
+        return entry[1] if entry is not None and entry[0] is node else None
+
+    def cold_function(self, func: ast.Func | None) -> bool:
+        return func is not None and self._count(self.calls, func) == 0
+
+    def hot_function(self, func: ast.Func) -> bool:
+        return (self._count(self.calls, func) or 0) >= HOT_COUNT
+
+    def cold(self, stmt) -> bool:
+        return self._count(self.hits, stmt) == 0
+
+
+def apply_profile(program: ast.Program, profile: Profile, source_hash: str) -> tuple[Heat, PGOReport]:
+    heat = Heat()
+    report = PGOReport()
+    if profile.source_hash != source_hash or not profile.runs:
+        report.stale = True
+        return heat, report
+    bodies = [program.block.body]
+    for block, func in iter_blocks(program):
+        if func is None:
+            continue
+        key = _key("Func", func.row, func.col)
+        if key in profile.functions:
+            calls = profile.average(profile.functions, key)
+            heat.calls[id(func)] = (func, calls)
+            if calls == 0:
+                report.cold.append(str(func.name.name))
+            elif calls >= HOT_COUNT:
+                report.hot.append(str(func.name.name))
+        if not func.deferred:
+            bodies.append(block.body)
+    for body in bodies:
+        for stmt in iter_statements(body):
+            if isinstance(stmt, ast.CompoundStmt):
+                continue
+            key = _key(type(stmt).__name__, stmt.row, stmt.col)
+            if key not in profile.statements:
+                continue
+            heat.hits[id(stmt)] = (stmt, profile.average(profile.statements, key))
+            taken = profile.branches.get(key)
+            if taken is None:
+                continue
+            if isinstance(stmt, ast.If) and stmt.else_branch is not None and taken[0] > taken[1]:
+                stmt.likely_then = True
+                report.branches += 1
+            elif isinstance(stmt, (ast.While, ast.For)) and taken[0] >= HOT_COUNT * profile.runs:
+                stmt.hot = True
+                report.loops += 1
+    return heat, report
+
+
+def record_profile(text: str, input_text: str = "", path: str | None = None, limits=None) -> Profile:
+    from src.pascal.compiled import compile_program
+    from src.pascal.coverage import Coverage
+
+    coverage = Coverage()
+    compiled = compile_program(text)
+    compiled.run(input_text, limits, coverage=coverage)
+    profile = Profile.from_coverage(coverage, compiled.source_hash)
+    if path is not None:
+        profile = profile.accumulate(path)
+    return profile
@@ -0,0 +1,73 @@
+from __future__ import annotations
+from src.ast import nodes as ast
+from src.ast.walk import iter_nodes
+
+
+IO_BUILTINS = {"write", "writeln", "read", "readln"}
+
+
+def _owned_idents(func: ast.Func) -> set[int]:
+    owned = {id(param.node_ident) for param in func.params}
+    owned.update(id(decl.node_ident) for decl in func.block.var_decls)
+    for node in iter_nodes(func.block.body):
+        if isinstance(node, ast.For):
+            owned.add(id(node.ident.node_ident))
+    return owned
+
+
+def _collect_funcs(program: ast.Program) -> list[ast.Func]:
+    result = []
+    stack = [program.block]
+    while stack:
+        block = stack.pop()
+        for func in block.func_decls:
+            if func.deferred:
+                continue
+            result.append(func)
+            stack.append(func.block)
+    return result
+
+
+def _local_facts(func: ast.Func):
+    owned = _owned_idents(func)
+    callees = []
+    for node in iter_nodes(func.block.body):
+        if isinstance(node, ast.Call):
+            ident = node.func.node_ident
+            if ident is None or ident.built_in:
+                if node.func.name in IO_BUILTINS:
+                    return False, []
+                continue
+            callees.append(ident.func_node)
+        elif isinstance(node, ast.Ident):
+            ident = node.node_ident
+            if ident is None or ident.func_node is not None:
+                continue
+            if id(ident) not in owned:
+                return False, []
+    return True, callees
+
+
+def mark_pure_functions(program: ast.Program) -> list[ast.Func]:
+    funcs = _collect_funcs(program)
+    callees = {}
+    pure = set()
+    for func in funcs:
+        ok, calls = _local_facts(func)
+        func.is_pure = False
+        if ok:
+            pure.add(id(func))
+            callees[id(func)] = calls
+    changed = True
+    while changed:
+        changed = False
+        for func in funcs:
+            if id(func) in pure and any(id(callee) not in pure for callee in callees[id(func)]):
+                pure.discard(id(func))
+                changed = True
+    result = []
+    for func in funcs:
+        if id(func) in pure:
+            func.is_pure = True
+            result.append(func)
+    return result
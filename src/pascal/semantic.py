@@ -1,6 +1,10 @@
 from __future__ import annotations
+import sys
+import threading
+from collections import OrderedDict
 from enum import Enum
 from src.ast import nodes as ast
+from src.ast.walk import trampoline
 
 
 class BaseType(Enum):
@@ -47,25 +51,45 @@ DOUBLE = TypeDesc(BaseType.DOUBLE)
 
 
 class IdentDesc:
-    _counters: dict = {}
+    _local = threading.local()
+
+    @classmethod
+    def _counters(cls) -> dict:
+        counters = getattr(cls._local, "counters", None)
+        if counters is None:
+            counters = cls._local.counters = {}
+        return counters
 
     @classmethod
     def _next_num(cls, category: str) -> int:
-        cls._counters[category] = cls._counters.get(category, 0) + 1
-        return cls._counters[category]
+        counters = cls._counters()
+        counters[category] = counters.get(category, 0) + 1
+        return counters[category]
 
     @classmethod
     def reset_counters(cls):
-        cls._counters.clear()
+        cls._counters().clear()
+
+    @classmethod
+    def save_counters(cls) -> dict:
+        return dict(cls._counters())
 
-    def __init__(self, name, type_, scope_type="global"):
+    @classmethod
+    def restore_counters(cls, saved: dict):
+        counters = cls._counters()
+        counters.clear()
+        counters.update(saved)
+
+    def __init__(self, name, type_, scope_type="global", num: int | None = None):
         self.name = name
         self.type = type_
         self.scope_type = scope_type
         self.built_in = False
         self.value = None
         self.func_node = None
-        self.num = IdentDesc._next_num(scope_type) if not self.built_in else 0
+        if num is None:
+            num = IdentDesc._next_num(scope_type) if not self.built_in else 0
+        self.num = num
 
     def __str__(self):
         if self.built_in:
@@ -100,6 +124,71 @@ class IdentScope:
         return None
 
 
+class SymbolTable:
+    def __init__(self, root: IdentScope | None = None):
+        self.root = root if root is not None else IdentScope()
+        self.bindings = {}
+        self.declared = []
+        self.depth = 0
+        self.current_func = None
+        chain = []
+        scope = self.root
+        while scope:
+            chain.append(scope)
+            scope = scope.parent
+        for scope in reversed(chain):
+            for name, ident in scope.idents.items():
+                self.bindings.setdefault(sys.intern(str(name)), []).append((0, ident))
+
+    def enter(self):
+        self.depth += 1
+
+    def exit(self):
+        declared = self.declared
+        bindings = self.bindings
+        depth = self.depth
+        while declared and declared[-1][0] == depth:
+            name = declared.pop()[1]
+            stack = bindings[name]
+            stack.pop()
+            if not stack:
+                del bindings[name]
+        self.depth = depth - 1
+
+    def add_ident(self, ident: IdentDesc, name: str | None = None):
+        name = sys.intern(str(ident.name if name is None else name))
+        stack = self.bindings.get(name)
+        if stack and stack[-1][0] == self.depth:
+            raise SemanticException(f"Повторное объявление {ident.name}")
+        if stack is None:
+            stack = self.bindings[name] = []
+        stack.append((self.depth, ident))
+        if self.depth:
+            self.declared.append((self.depth, name))
+        else:
+            self.root.idents[name] = ident
+        return ident
+
+    def get_ident(self, name: str):
+        stack = self.bindings.get(name)
+        return stack[-1][1] if stack else None
+
+    def snapshot(self) -> tuple:
+        visible = {name: stack[-1] for name, stack in self.bindings.items()}
+        return self.root, visible, self.depth, self.current_func
+
+    @classmethod
+    def from_snapshot(cls, snapshot: tuple) -> "SymbolTable":
+        root, visible, depth, current_func = snapshot
+        table = cls.__new__(cls)
+        table.root = root
+        table.bindings = {name: [binding] for name, binding in visible.items()}
+        table.declared = []
+        table.depth = depth
+        table.current_func = current_func
+        return table
+
+
 class SemanticException(Exception):
     pass
 
@@ -117,17 +206,143 @@ class _SignalReturn(Exception):
         self.value = value
 
 
+_SCALAR_TYPES = (int, float, bool, str)
+
+
+class InputBuffer:
+    def __init__(self, text: str = "", eof: bool = True):
+        self.data = text
+        self.pos = 0
+        self.eof = eof
+
+    def feed(self, text: str):
+        self.data = self.data[self.pos:] + text
+        self.pos = 0
+
+    def close(self):
+        self.eof = True
+
+    def _skip_spaces(self, pos):
+        data = self.data
+        while pos < len(data) and data[pos].isspace():
+            pos += 1
+        return pos
+
+    def _convert(self, token: str, type_):
+        try:
+            if type_ == INT:
+                return int(token)
+            if type_ == DOUBLE:
+                return float(token)
+            if type_ == BOOL:
+                lowered = token.lower()
+                if lowered not in ("true", "false"):
+                    raise ValueError(token)
+                return lowered == "true"
+        except ValueError:
+            raise SemanticException(f"Некорректный ввод {token!r} для типа {type_}")
+        return token[:1]
+
+    def read_values(self, types, line: bool = False):
+        data = self.data
+        pos = self.pos
+        values = []
+        for type_ in types:
+            pos = self._skip_spaces(pos)
+            if pos >= len(data):
+                if not self.eof:
+                    return None
+                values.append(None)
+                continue
+            if type_ == STR:
+                values.append(data[pos])
+                pos += 1
+                continue
+            end = pos
+            while end < len(data) and not data[end].isspace():
+                end += 1
+            if end >= len(data) and not self.eof:
+                return None
+            values.append(self._convert(data[pos:end], type_))
+            pos = end
+        if line:
+            newline = data.find("\n", pos)
+            if newline < 0:
+                if not self.eof:
+                    return None
+                pos = len(data)
+            else:
+                pos = newline + 1
+        self.pos = pos
+        return values
+
+
+def memo_label(func: ast.Func) -> str:
+    return f"{func.name.name}#{func.node_ident.num}"
+
+
+class MemoCache:
+    def __init__(self, maxsize: int = 1024, name: str = ""):
+        self.maxsize = maxsize
+        self.name = name
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            raise
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries), "maxsize": self.maxsize}
+
+
 class SemanticChecker:
-    def __init__(self):
+    def __init__(self, memoize: bool = False, memo_size: int = 1024, lazy: bool = False, units=None):
         self.global_scope = None
+        self.lazy = lazy
+        self.units = units
+        self.linkage = None
+        self.deferred = {}
         self.call_stack = []
         self.output = []
-
-    def check(self, node, scope: IdentScope):
+        self.memoize = memoize
+        self.memo_size = memo_size
+        self.memo_caches = {}
+        self.exec_stats = None
+        self.input = InputBuffer()
+
+    def check(self, node, scope: IdentScope | SymbolTable | None = None):
+        table = scope if isinstance(scope, SymbolTable) else SymbolTable(scope)
         if self.global_scope is None:
-            self.global_scope = scope
+            self.global_scope = table
             IdentDesc.reset_counters()
-            self._add_builtins(scope)
+            self._add_builtins(table)
+        return trampoline(self._dispatch(node, table))
+
+    def check_deferred(self):
+        while self.deferred:
+            func = next(iter(self.deferred.values()))[0]
+            trampoline(self._check_body(func))
+
+    def _check_body(self, func: ast.Func):
+        _, snapshot = self.deferred.pop(id(func))
+        func.deferred = False
+        yield self._dispatch(func, SymbolTable.from_snapshot(snapshot))
+
+    def _dispatch(self, node, scope):
         method = f"visit_{type(node).__name__}"
         visitor = getattr(self, method, self.generic_visit)
         return visitor(node, scope)
@@ -137,9 +352,9 @@ class SemanticChecker:
             if isinstance(attr, list):
                 for item in attr:
                     if hasattr(item, "__dict__"):
-                        self.check(item, scope)
+                        yield self._dispatch(item, scope)
             elif hasattr(attr, "__dict__"):
-                self.check(attr, scope)
+                yield self._dispatch(attr, scope)
 
     @staticmethod
     def _type_from_name(name: str):
@@ -153,7 +368,7 @@ class SemanticChecker:
             return DOUBLE
         raise SemanticException(f"Неизвестный тип {name}")
 
-    def _add_builtins(self, scope: IdentScope):
+    def _add_builtins(self, scope: SymbolTable):
         for name in ("write", "writeln"):
             ident = IdentDesc.__new__(IdentDesc)
             ident.name = name
@@ -176,9 +391,60 @@ class SemanticChecker:
             scope.add_ident(ident)
 
     def visit_Program(self, node: ast.Program, scope):
-        self.check(node.block, scope)
+        units = self._use_units(node.uses, scope)
+        yield self._dispatch(node.block, scope)
+        for _ in range(units):
+            scope.exit()
+        if units:
+            self.linkage.link(node.block)
+        node.node_type = VOID
+
+    def visit_Unit(self, node: ast.Unit, scope):
+        if self.lazy:
+            raise SemanticException("Модули проверяются только полностью")
+        units = self._use_units(node.uses, scope)
+        yield self._dispatch(node.block, scope)
+        for _ in range(units):
+            scope.exit()
+        funcs = {func.name.name: func for func in node.block.func_decls}
+        exported = set()
+        for header in node.interface:
+            name = header.name.name
+            if name in exported:
+                raise SemanticException(f"Повторное объявление {name}")
+            exported.add(name)
+            func = funcs.get(name)
+            if func is None:
+                raise SemanticException(f"Функция {name} из интерфейса модуля {node.name} не реализована")
+            type_ = TypeDesc(return_type=self._type_from_name(header.return_type),
+                             params=[self._type_from_name(param.type_name) for param in header.params])
+            if type_ != func.node_type:
+                raise SemanticException(f"Функция {name} не совпадает с объявлением в интерфейсе модуля {node.name}")
+            header.node_ident = header.name.node_ident = func.node_ident
+            header.node_type = header.name.node_type = func.node_type
+        for func in node.block.func_decls:
+            func.name.name = func.node_ident.name = f"{node.name}.{func.name.name}"
         node.node_type = VOID
 
+    def _use_units(self, uses: list[ast.Ident], scope) -> int:
+        if not uses:
+            return 0
+        from src.pascal.units import Linkage, UnitLoader
+        if self.units is None:
+            self.units = UnitLoader()
+        if self.linkage is None:
+            self.linkage = Linkage(self.units)
+        names = [str(ident.name) for ident in uses]
+        for index, name in enumerate(names):
+            if name in names[:index]:
+                raise SemanticException(f"Модуль {name} подключён повторно")
+        exports = [self.linkage.exports(name) for name in names]
+        for unit in exports:
+            scope.enter()
+            for name, ident in unit:
+                scope.add_ident(ident, name)
+        return len(exports)
+
     def visit_Literal(self, node: ast.Literal, scope):
         if isinstance(node.value, bool):
             node.node_type = BOOL
@@ -206,16 +472,15 @@ class SemanticChecker:
         node.ident.node_ident = desc
 
     def visit_Assign(self, node: ast.Assign, scope):
-        self.check(node.ident, scope)
-        self.check(node.expr, scope)
+        yield self._dispatch(node.ident, scope)
+        yield self._dispatch(node.expr, scope)
         if node.ident.node_type != node.expr.node_type:
             node.expr = ast.TypeConvertNode(node.expr, node.ident.node_type, node.ident.node_type)
-            node.expr.row = getattr(node.expr.expr, 'row', None)
-            node.expr.col = getattr(node.expr.expr, 'col', None)
+            node.expr.copy_position(node.expr.expr)
         node.node_type = node.ident.node_type
 
     def visit_UnOp(self, node: ast.UnOp, scope):
-        self.check(node.expr, scope)
+        yield self._dispatch(node.expr, scope)
         expr_type = node.expr.node_type
         if node.op == ast.UnaryOpKind.NOT:
             if expr_type != BOOL:
@@ -227,8 +492,8 @@ class SemanticChecker:
             node.node_type = INT
 
     def visit_BinOp(self, node: ast.BinOp, scope):
-        self.check(node.left, scope)
-        self.check(node.right, scope)
+        yield self._dispatch(node.left, scope)
+        yield self._dispatch(node.right, scope)
         left = node.left.node_type
         right = node.right.node_type
         op = node.op
@@ -237,7 +502,7 @@ class SemanticChecker:
                 node.node_type = INT
             elif left == right and left == DOUBLE:
                 node.node_type = DOUBLE
-            elif op == ast.BinaryOpKind.FLOAT_DIV and {left, right} <= {INT, DOUBLE}:
+            elif op == ast.BinaryOpKind.FLOAT_DIV and left in (INT, DOUBLE) and right in (INT, DOUBLE):
                 node.node_type = DOUBLE
             else:
                 raise SemanticException("Арифметика требует integer или double")
@@ -255,47 +520,62 @@ class SemanticChecker:
             raise SemanticException(f"Неизвестная операция {op}")
 
     def visit_If(self, node: ast.If, scope):
-        self.check(node.cond, scope)
+        yield self._dispatch(node.cond, scope)
         if node.cond.node_type != BOOL:
             raise SemanticException("Условие должно быть bool")
-        self.check(node.then_branch, IdentScope(scope, current_func=scope.current_func))
+        scope.enter()
+        yield self._dispatch(node.then_branch, scope)
+        scope.exit()
         if node.else_branch:
-            self.check(node.else_branch, IdentScope(scope, current_func=scope.current_func))
+            scope.enter()
+            yield self._dispatch(node.else_branch, scope)
+            scope.exit()
 
     def visit_While(self, node: ast.While, scope):
-        self.check(node.cond, scope)
+        yield self._dispatch(node.cond, scope)
         if node.cond.node_type != BOOL:
             raise SemanticException("Условие должно быть bool")
-        self.check(node.body, IdentScope(scope, current_func=scope.current_func))
+        scope.enter()
+        yield self._dispatch(node.body, scope)
+        scope.exit()
 
     def visit_For(self, node: ast.For, scope):
-        loop_scope = IdentScope(scope, current_func=scope.current_func)
-        ident = loop_scope.add_ident(IdentDesc(node.ident.name, INT, "local"))
+        scope.enter()
+        ident = scope.add_ident(IdentDesc(node.ident.name, INT, "local"))
         node.ident.node_type = INT
         node.ident.node_ident = ident
-        self.check(node.start, loop_scope)
-        self.check(node.end, loop_scope)
+        yield self._dispatch(node.start, scope)
+        yield self._dispatch(node.end, scope)
         if node.start.node_type != INT or node.end.node_type != INT:
             raise SemanticException("Границы for должны быть integer")
-        self.check(node.body, loop_scope)
+        yield self._dispatch(node.body, scope)
+        scope.exit()
 
     def visit_Block(self, node: ast.Block, scope):
-        block_scope = IdentScope(scope, current_func=scope.current_func)
+        scope.enter()
         for decl in node.var_decls:
-            self.check(decl, block_scope)
+            yield self._dispatch(decl, scope)
         for func in node.func_decls:
-            self._register_func(func, block_scope)
-        for func in node.func_decls:
-            self.check(func, block_scope)
-        self.check(node.body, block_scope)
+            self._register_func(func, scope)
+        if self.lazy and node.func_decls:
+            snapshot = scope.snapshot()
+            for func in node.func_decls:
+                func.deferred = True
+                self.deferred[id(func)] = (func, snapshot)
+        else:
+            for func in node.func_decls:
+                yield self._dispatch(func, scope)
+        yield self._dispatch(node.body, scope)
+        scope.exit()
 
     def visit_CompoundStmt(self, node: ast.CompoundStmt, scope):
-        local_scope = IdentScope(scope, current_func=scope.current_func)
+        scope.enter()
         for stmt in node.statements:
-            self.check(stmt, local_scope)
+            yield self._dispatch(stmt, scope)
+        scope.exit()
         node.node_type = VOID
 
-    def _register_func(self, node: ast.Func, scope: IdentScope):
+    def _register_func(self, node: ast.Func, scope: SymbolTable):
         ret_type = self._type_from_name(node.return_type)
         param_types = [self._type_from_name(param.type_name) for param in node.params]
         ident = IdentDesc(node.name.name, TypeDesc(return_type=ret_type, params=param_types), "func")
@@ -308,16 +588,20 @@ class SemanticChecker:
 
     def visit_Func(self, node: ast.Func, scope):
         ret_type = self._type_from_name(node.return_type)
-        func_scope = IdentScope(scope, current_func=node)
+        outer_func = scope.current_func
+        scope.current_func = node
+        scope.enter()
         for param in node.params:
             type_ = self._type_from_name(param.type_name)
             desc = IdentDesc(param.ident.name, type_, "param")
-            func_scope.add_ident(desc)
+            scope.add_ident(desc)
             param.node_type = type_
             param.node_ident = desc
             param.ident.node_type = type_
             param.ident.node_ident = desc
-        self.check(node.block, func_scope)
+        yield self._dispatch(node.block, scope)
+        scope.exit()
+        scope.current_func = outer_func
         has_return = self._block_has_return(node.block)
         if ret_type != VOID and not has_return:
             raise SemanticException(f"В функции {node.name.name} нет return")
@@ -326,20 +610,21 @@ class SemanticChecker:
         return self._compound_has_return(block.body)
 
     def _compound_has_return(self, compound: ast.CompoundStmt):
-        for stmt in compound.statements:
-            if isinstance(stmt, ast.Return):
-                return True
-            if isinstance(stmt, ast.If):
-                if self._compound_has_return(stmt.then_branch):
-                    return True
-                if stmt.else_branch and self._compound_has_return(stmt.else_branch):
+        pending = [compound]
+        while pending:
+            for stmt in pending.pop().statements:
+                if isinstance(stmt, ast.Return):
                     return True
-            if isinstance(stmt, (ast.While, ast.For)) and self._compound_has_return(stmt.body):
-                return True
+                if isinstance(stmt, ast.If):
+                    pending.append(stmt.then_branch)
+                    if stmt.else_branch:
+                        pending.append(stmt.else_branch)
+                if isinstance(stmt, (ast.While, ast.For)):
+                    pending.append(stmt.body)
         return False
 
     def visit_Cast(self, node: ast.Cast, scope):
-        self.check(node.expr, scope)
+        yield self._dispatch(node.expr, scope)
         target = self._type_from_name(node.type_name)
         node.node_type = target
 
@@ -352,11 +637,10 @@ class SemanticChecker:
                 raise SemanticException("Функция должна возвращать значение")
             node.node_type = VOID
             return
-        self.check(node.expr, scope)
+        yield self._dispatch(node.expr, scope)
         if node.expr.node_type != expected_type:
             node.expr = ast.TypeConvertNode(node.expr, expected_type, expected_type)
-            node.expr.row = getattr(node.expr.expr, 'row', None)
-            node.expr.col = getattr(node.expr.expr, 'col', None)
+            node.expr.copy_position(node.expr.expr)
         node.node_type = expected_type
 
     def visit_Call(self, node: ast.Call, scope):
@@ -366,28 +650,69 @@ class SemanticChecker:
         if not ident.type.is_func:
             raise SemanticException(f"{node.func.name} не является функцией")
         for arg in node.args:
-            self.check(arg, scope)
+            yield self._dispatch(arg, scope)
         if not ident.built_in and len(node.args) != len(ident.type.params):
             raise SemanticException("Неверное количество аргументов")
         if not ident.built_in:
             for i, (arg, expected_type) in enumerate(zip(node.args, ident.type.params)):
                 if arg.node_type != expected_type:
-                    node.args[i] = ast.TypeConvertNode(arg, expected_type, expected_type)
-                    node.args[i].row = getattr(arg, 'row', None)
-                    node.args[i].col = getattr(arg, 'col', None)
+                    node.args[i] = ast.TypeConvertNode(arg, expected_type, expected_type).copy_position(arg)
         node.func.node_ident = ident
         node.func.node_type = ident.type
         node.node_ident = ident
         node.node_type = ident.type.return_type
+        if ident.func_node is None and self.linkage is not None:
+            self.linkage.require(ident)
+        elif ident.func_node is not None and ident.func_node.deferred:
+            yield self._check_body(ident.func_node)
 
-    def execute(self, program: ast.Program):
+    def execute(self, program: ast.Program, engine: str = "machine", limits=None, input_text: str = "",
+                coverage=None, checkpoint=None):
         if self.global_scope is None:
             scope = IdentScope()
             self.check(program, scope)
+        if self.memoize:
+            from src.pascal.purity import mark_pure_functions
+            mark_pure_functions(program)
+        self.input = InputBuffer(input_text)
+        if engine == "machine":
+            machine = self._make_machine(program, limits, coverage, checkpoint)
+            try:
+                return machine.run()
+            finally:
+                self.exec_stats = machine.stats()
+        if engine != "tree":
+            raise SemanticException(f"Неизвестный режим выполнения {engine}")
+        if limits is not None:
+            raise SemanticException("Ограничения выполнения поддерживаются только машиной")
+        if coverage is not None:
+            raise SemanticException("Покрытие поддерживается только машиной")
+        if checkpoint is not None:
+            raise SemanticException("Контрольные точки поддерживаются только машиной")
         env = self._make_frame(None)
         self._exec_block(program.block, env)
         return env
 
+    def _make_machine(self, program: ast.Program, limits=None, coverage=None, checkpoint=None):
+        from src.pascal.machine import Machine, ProgramCode
+        return Machine(ProgramCode(program, coverage), output=self.output, memoize=self.memoize,
+                       memo_size=self.memo_size, memo_caches=self.memo_caches, limits=limits,
+                       input_buffer=self.input, checkpoint=checkpoint)
+
+    async def execute_async(self, program: ast.Program, reader=None, writer=None,
+                            yield_every: int = 1000, limits=None):
+        if self.global_scope is None:
+            self.check(program, IdentScope())
+        if self.memoize:
+            from src.pascal.purity import mark_pure_functions
+            mark_pure_functions(program)
+        self.input = InputBuffer(eof=reader is None)
+        machine = self._make_machine(program, limits)
+        try:
+            return await machine.run_async(reader, writer, yield_every)
+        finally:
+            self.exec_stats = machine.stats()
+
     def _make_frame(self, parent):
         return {"__parent__": parent}
 
@@ -555,6 +880,9 @@ class SemanticChecker:
 
     def _eval_call(self, node: ast.Call, frame):
         name = node.func.name
+        if name in ("read", "readln"):
+            self._exec_read(node, frame)
+            return None
         args = [self._eval_expr(arg, frame) for arg in node.args]
         if name == "write":
             text = ''.join(str(arg) for arg in args)
@@ -566,21 +894,56 @@ class SemanticChecker:
             self.output.append(text + "\n")
             print(text)
             return None
-        if name in ("read", "readln"):
-            return None
+        if node.func.node_ident is not None:
+            name = node.func.node_ident.name
         func_node = self._get_var(frame, name)
         if not isinstance(func_node, ast.Func):
             raise SemanticException(f"{name} не является функцией")
         if len(args) != len(func_node.params):
             raise SemanticException("Неверное количество аргументов")
-        call_frame = self._make_frame(frame)
+        if func_node.deferred and id(func_node) in self.deferred:
+            trampoline(self._check_body(func_node))
+        cache = self._memo_cache(func_node, args)
+        if cache is not None:
+            key = tuple(args)
+            try:
+                return cache.get(key)
+            except KeyError:
+                pass
+        call_frame = self._make_frame(self._lookup_frame(frame, name))
         for param, arg_value in zip(func_node.params, args):
             self._declare_var(call_frame, param.ident.name, arg_value)
         self.call_stack.append(name)
+        result = None
         try:
             self._exec_block(func_node.block, call_frame)
         except _SignalReturn as signal:
-            self.call_stack.pop()
-            return signal.value
+            result = signal.value
         self.call_stack.pop()
-        return None
\ No newline at end of file
+        if cache is not None:
+            cache.put(key, result)
+        return result
+
+    def _exec_read(self, node: ast.Call, frame):
+        for arg in node.args:
+            if not isinstance(arg, ast.Ident):
+                raise SemanticException(f"{node.func.name} ожидает переменную")
+        values = self.input.read_values([arg.node_type for arg in node.args], node.func.name == "readln")
+        if values is None:
+            raise SemanticException("Недостаточно входных данных")
+        for arg, value in zip(node.args, values):
+            if value is not None:
+                self._set_var(frame, arg.name, value)
+
+    def _memo_cache(self, func_node: ast.Func, args):
+        if not self.memoize or not func_node.is_pure:
+            return None
+        if not all(isinstance(arg, _SCALAR_TYPES) for arg in args):
+            return None
+        cache = self.memo_caches.get(id(func_node))
+        if cache is None:
+            cache = self.memo_caches[id(func_node)] = MemoCache(self.memo_size, memo_label(func_node))
+        return cache
+
+    def memo_stats(self):
+        return {cache.name: cache.stats() for cache in self.memo_caches.values()}
\ No newline at end of file
@@ -0,0 +1,255 @@
+from __future__ import annotations
+import asyncio
+import io
+import json
+import os
+import signal
+import socket
+import stat
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from src.ast.printer import dump_ast
+from src.ast.serialize import dump_jsonl
+from src.pascal.compiled import CompiledProgram, source_hash
+from src.pascal.machine import ExecutionLimits, LimitExceeded
+from src.pascal.parser import PascalParser, PascalParserError, load_parser
+from src.pascal.semantic import MemoCache, SemanticException
+
+
+DEFAULT_SOCKET = "/tmp/pascal-compile.sock"
+OPERATIONS = ("parse", "check", "run")
+CACHE_SIZE = 256
+MAX_REQUEST = 1 << 26
+DEFAULT_LIMITS = {"max_steps": 100_000_000, "timeout": 10.0}
+MAX_LIMITS = {"max_steps": 1_000_000_000, "timeout": 60.0}
+LIMIT_FIELDS = ("max_steps", "timeout", "max_call_depth", "max_output_bytes")
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class ServerError(Exception):
+    pass
+
+
+def remove_stale_socket(path: str):
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise ServerError(f"{path} существует и не является сокетом")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    raise ServerError(f"Сокет {path} занят работающим сервером")
+
+
+def _limits(options) -> ExecutionLimits:
+    if options is None:
+        options = {}
+    if not isinstance(options, dict) or set(options) - set(LIMIT_FIELDS):
+        raise ProtocolError(f"limits: допустимы поля {', '.join(LIMIT_FIELDS)}")
+    limits = dict(DEFAULT_LIMITS)
+    for name, value in options.items():
+        if value is None and name not in MAX_LIMITS:
+            continue
+        number = (int, float) if name == "timeout" else int
+        if isinstance(value, bool) or not isinstance(value, number) or value <= 0:
+            raise ProtocolError(f"limits.{name}: ожидается положительное число")
+        limits[name] = min(value, MAX_LIMITS.get(name, value))
+    return ExecutionLimits(**limits)
+
+
+class CompileService:
+    def __init__(self, cache_size: int = CACHE_SIZE):
+        self.programs = MemoCache(cache_size)
+        load_parser()
+
+    def compile(self, text: str, optimize: bool, memoize: bool) -> CompiledProgram:
+        key = (source_hash(text), optimize, memoize)
+        try:
+            entry = self.programs.get(key)
+        except KeyError:
+            try:
+                entry = CompiledProgram.from_source(text, memoize, optimize)
+            except (PascalParserError, SemanticException) as error:
+                entry = error
+            self.programs.put(key, entry)
+        if isinstance(entry, Exception):
+            raise entry
+        return entry
+
+    def handle(self, request: dict) -> dict:
+        op = request.get("op")
+        text = request.get("source")
+        if op not in OPERATIONS:
+            raise ProtocolError(f"Неизвестная операция {op!r}")
+        if not isinstance(text, str):
+            raise ProtocolError("Поле source должно быть строкой")
+        if op == "parse":
+            program = PascalParser(text).parse_program()
+            buffer = io.StringIO()
+            dump_jsonl(program, buffer)
+            return {"program": program.name, "ast": buffer.getvalue()}
+        compiled = self.compile(text, bool(request.get("optimize")), bool(request.get("memoize")))
+        if op == "check":
+            result = {"hash": compiled.source_hash,
+                      "optimizations": {name: str(report) for name, report in compiled.optimizations.items()}}
+            if request.get("dump"):
+                result["dump"] = dump_ast(compiled.program)
+            return result
+        run = compiled.run(str(request.get("input", "")), _limits(request.get("limits")))
+        return {"output": run.output, "globals": run.globals, "stats": run.stats}
+
+
+def respond(service: CompileService, request: dict) -> dict:
+    try:
+        return {"ok": True, "result": service.handle(request)}
+    except LimitExceeded as error:
+        return {"ok": False, "error": {"type": "LimitExceeded", "message": str(error), "limit": error.limit,
+                                       "output": error.output, "stats": error.stats}}
+    except Exception as error:
+        return {"ok": False, "error": {"type": type(error).__name__, "message": str(error)}}
+
+
+def cache_key(request: dict) -> str | None:
+    if request.get("op") not in OPERATIONS or not isinstance(request.get("source"), str):
+        return None
+    options = {name: value for name, value in request.items() if name not in ("id", "source")}
+    return source_hash(request["source"]) + json.dumps(options, sort_keys=True)
+
+
+_service = None
+
+
+def _init_worker(cache_size: int):
+    global _service
+    _service = CompileService(cache_size)
+
+
+def _handle(request: dict) -> dict:
+    return respond(_service, request)
+
+
+def _ready() -> bool:
+    return _service is not None
+
+
+class CompileServer:
+    def __init__(self, path: str = DEFAULT_SOCKET, workers: int | None = None, cache_size: int = CACHE_SIZE):
+        self.path = path
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.cache_size = cache_size
+        self.responses = MemoCache(cache_size)
+        self.requests = 0
+        self.pool = None
+        self.server = None
+
+    def _executor(self):
+        if self.workers > 0:
+            return ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.cache_size,))
+        _init_worker(self.cache_size)
+        return ThreadPoolExecutor(1)
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "workers": self.workers, "cache": self.responses.stats()}
+
+    async def _respond(self, request: dict) -> dict:
+        self.requests += 1
+        if request.get("op") == "stats":
+            return {"ok": True, "result": self.stats()}
+        key = cache_key(request)
+        if key is not None:
+            try:
+                return {**self.responses.get(key), "cached": True}
+            except KeyError:
+                pass
+        response = await asyncio.get_running_loop().run_in_executor(self.pool, _handle, request)
+        if key is not None and (response["ok"] or response["error"]["type"] != "LimitExceeded"):
+            self.responses.put(key, response)
+        return response
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("Ожидался объект JSON")
+                except ValueError as error:
+                    response = {"ok": False, "error": {"type": "ProtocolError", "message": str(error)}}
+                else:
+                    response = await self._respond(request)
+                    if "id" in request:
+                        response = {"id": request["id"], **response}
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        remove_stale_socket(self.path)
+        self.pool = self._executor()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _ready) for _ in range(max(self.workers, 1))))
+        self.server = await asyncio.start_unix_server(self._serve_client, self.path, limit=MAX_REQUEST)
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+        if self.server is not None and os.path.exists(self.path):
+            os.unlink(self.path)
+
+    async def serve_forever(self):
+        await self.start()
+        loop = asyncio.get_running_loop()
+        stopped = asyncio.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stopped.set)
+        try:
+            await stopped.wait()
+        finally:
+            await self.close()
+
+
+class CompileClient:
+    def __init__(self, path: str = DEFAULT_SOCKET, timeout: float | None = None):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(path)
+        self.file = self.sock.makefile("rwb")
+        self.next_id = 0
+
+    def request(self, op: str, source: str | None = None, **options) -> dict:
+        self.next_id += 1
+        payload = {"id": self.next_id, "op": op, **options}
+        if source is not None:
+            payload["source"] = source
+        self.file.write(json.dumps(payload).encode("utf-8") + b"\n")
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("Сервер закрыл соединение")
+        return json.loads(line)
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,150 @@
+from __future__ import annotations
+import mmap
+import os
+import re
+
+from lark import Lark, Token, UnexpectedInput
+
+from src.ast import nodes as ast
+from src.ast.positions import SourceMap
+from src.pascal.parser import PascalParserError, load_parser
+
+
+SKIP = re.compile(rb"(?:[ \t\f\r\n]+|\{[^}]*\}|//[^\n]*|\(\*[\s\S]*?\*\))*")
+
+
+class MappedSource:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        if os.fstat(self._file.fileno()).st_size:
+            self.buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.buffer = b""
+        self.positions = SourceMap(self.buffer)
+
+    def position(self, offset: int) -> tuple[int, int]:
+        return self.positions.position(offset)
+
+    def close(self):
+        self.positions.detach()
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class _Position:
+    def __init__(self, field: int, end: bool):
+        self.field = field
+        self.end = end
+
+    def __get__(self, token, owner=None):
+        if token is None:
+            return self
+        offset = token.end_pos if self.end else token.start_pos
+        return token.source.position(offset)[self.field]
+
+    def __set__(self, token, value):
+        pass
+
+
+class StreamToken(Token):
+    __slots__ = ("source",)
+
+    line = _Position(0, False)
+    column = _Position(1, False)
+    end_line = _Position(0, True)
+    end_column = _Position(1, True)
+
+
+class _Lexicon:
+    def __init__(self, parser: Lark):
+        strings = {term.pattern.value: term.name for term in parser.terminals if term.pattern.type == "str"}
+        self.keywords = {value: name for value, name in strings.items() if value.isidentifier()}
+        symbols = sorted((value for value in strings if not value.isidentifier()), key=len, reverse=True)
+        self.symbols = {value: strings[value] for value in symbols}
+        self.pattern = re.compile(
+            rb"(?P<REAL>[0-9]+\.[0-9]+)"
+            rb"|(?P<INT>[0-9]+)"
+            rb"|(?P<CHAR>'(?:[^'\\\x80-\xff]|[\xc0-\xff][\x80-\xbf]+|\\.)')"
+            rb"|(?P<WORD>[A-Za-z_][A-Za-z0-9_]*)"
+            rb"|(?P<SYMBOL>" + b"|".join(re.escape(value.encode("ascii")) for value in symbols) + rb")")
+        patterns = sorted((term for term in parser.terminals if term.pattern.type == "re"),
+                          key=lambda term: (-term.priority, -term.pattern.max_width,
+                                            -len(term.pattern.value), term.name))
+        self.word_patterns = [(term.name, re.compile(term.pattern.to_regexp())) for term in patterns]
+        self.candidates = {}
+
+    def classify(self, word: str) -> tuple[str, ...]:
+        names = self.candidates.get(word)
+        if names is None:
+            found = [self.keywords[word]] if word in self.keywords else []
+            found.extend(name for name, pattern in self.word_patterns if pattern.fullmatch(word))
+            names = self.candidates[word] = tuple(found)
+        return names
+
+
+_lexicons = {}
+
+
+def _lexicon(parser: Lark) -> _Lexicon:
+    lexicon = _lexicons.get(id(parser))
+    if lexicon is None:
+        lexicon = _lexicons[id(parser)] = _Lexicon(parser)
+    return lexicon
+
+
+def tokenize(source: MappedSource, choices=None, parser: Lark | None = None):
+    lexicon = _lexicon(parser or load_parser(build_ast=True))
+    buffer = source.buffer
+    size = len(buffer)
+    skip = SKIP.match
+    lexeme = lexicon.pattern.match
+    positions = source.positions
+    pos = 0
+    while True:
+        pos = skip(buffer, pos).end()
+        if pos >= size:
+            return
+        match = lexeme(buffer, pos)
+        if match is None:
+            line, column = source.position(pos)
+            raise PascalParserError(f"Неожиданный символ в строке {line}, столбце {column}")
+        kind = match.lastgroup
+        text = match.group().decode("utf-8")
+        if kind == "WORD":
+            names = lexicon.classify(text)
+            kind = names[0]
+            if len(names) > 1 and choices is not None:
+                accepted = choices()
+                kind = next((name for name in names if name in accepted), kind)
+        elif kind == "SYMBOL":
+            kind = lexicon.symbols[text]
+        end = match.end()
+        token = StreamToken(kind, text, pos, None, None, None, None, end)
+        token.source = positions
+        yield token
+        pos = end
+
+
+def parse_source(source: MappedSource, start: str = "program") -> ast.Program | ast.Unit:
+    parser = load_parser(build_ast=True)
+    interactive = parser.parse_interactive(start=start)
+    token = None
+    try:
+        for token in tokenize(source, interactive.choices, parser):
+            interactive.feed_token(token)
+        return interactive.feed_eof(token)
+    except UnexpectedInput as error:
+        raise PascalParserError(str(error)) from error
+
+
+def parse_file(path: str, start: str = "program") -> ast.Program | ast.Unit:
+    with MappedSource(path) as source:
+        return parse_source(source, start)
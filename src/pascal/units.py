@@ -0,0 +1,221 @@
+from __future__ import annotations
+import io
+import json
+import os
+from dataclasses import dataclass, field
+
+from src.ast import nodes as ast
+from src.ast.serialize import SerializeError, build_tree, dump_binary, iter_binary, type_from_str, type_to_str
+from src.pascal.semantic import IdentDesc, IdentScope, SemanticChecker, SemanticException
+
+
+FORMAT = "pascal-unit"
+VERSION = 1
+SOURCE_SUFFIX = ".pas"
+ARTIFACT_SUFFIX = ".pasu"
+
+
+@dataclass
+class CompiledUnit:
+    name: str
+    source_hash: str
+    uses: dict[str, str] = field(default_factory=dict)
+    exports: dict[str, str] = field(default_factory=dict)
+    functions: dict[str, dict] = field(default_factory=dict)
+    data: bytes = b""
+
+    def write(self, fp):
+        header = {"format": FORMAT, "version": VERSION, "name": self.name, "source_hash": self.source_hash,
+                  "uses": self.uses, "exports": self.exports, "functions": self.functions}
+        fp.write(json.dumps(header, ensure_ascii=False, sort_keys=True).encode("utf-8") + b"\n")
+        fp.write(self.data)
+
+    @classmethod
+    def read(cls, fp) -> "CompiledUnit":
+        try:
+            header = json.loads(fp.readline())
+        except ValueError as error:
+            raise SerializeError("Повреждённый заголовок модуля") from error
+        if not isinstance(header, dict) or header.get("format") != FORMAT or header.get("version") != VERSION:
+            raise SerializeError("Неподдерживаемый формат модуля")
+        return cls(header["name"], header["source_hash"], header["uses"], header["exports"], header["functions"],
+                   fp.read())
+
+    def save(self, path: str):
+        with open(path, "wb") as fp:
+            self.write(fp)
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledUnit":
+        with open(path, "rb") as fp:
+            return cls.read(fp)
+
+    def instantiate(self, qualified: str, resolve=None) -> ast.Func:
+        entry = self.functions[qualified]
+        offset = entry["offset"]
+        return build_tree(iter_binary(io.BytesIO(self.data[offset:offset + entry["size"]])), resolve)
+
+
+class Linkage:
+    def __init__(self, loader: "UnitLoader"):
+        self.loader = loader
+        self.descs = {}
+        self.required = []
+        self.functions = []
+        self.block = None
+        self.linked = 0
+
+    def exports(self, name: str) -> list[tuple[str, IdentDesc]]:
+        compiled = self.loader.unit(name)
+        return [(short, self.desc(qualified)) for short, qualified in compiled.exports.items()]
+
+    def desc(self, qualified: str) -> IdentDesc:
+        desc = self.descs.get(qualified)
+        if desc is not None:
+            return desc
+        name = qualified.partition(".")[0]
+        entry = self.loader.unit(name).functions.get(qualified)
+        if entry is None:
+            raise SemanticException(f"Модуль {name} не содержит функцию {qualified}")
+        desc = self.descs[qualified] = IdentDesc(qualified, type_from_str(entry["type"]), "func", entry["num"])
+        return desc
+
+    def require(self, desc: IdentDesc):
+        if desc.func_node is not None or self.descs.get(desc.name) is not desc:
+            return
+        self.required.append(desc)
+        if self.block is not None:
+            self.link(self.block)
+
+    def link(self, block: ast.Block):
+        self.block = block
+        functions = self.materialize()
+        block.func_decls[self.linked:self.linked] = functions
+        self.linked += len(functions)
+
+    def materialize(self) -> list[ast.Func]:
+        start = len(self.functions)
+        pending, self.required = self.required, []
+
+        def resolve(found: IdentDesc):
+            if "." not in found.name:
+                return None
+            target = self.desc(found.name)
+            if target.func_node is None:
+                pending.append(target)
+            return target
+
+        while pending:
+            desc = pending.pop()
+            if desc.func_node is not None:
+                continue
+            desc.func_node = self.loader.unit(desc.name.partition(".")[0]).instantiate(desc.name, resolve)
+            self.functions.append(desc.func_node)
+        return self.functions[start:]
+
+
+class UnitLoader:
+    def __init__(self, search_path=(".",), output_dir: str | None = None):
+        self.search_path = [str(path) for path in search_path]
+        self.output_dir = output_dir
+        self.units = {}
+        self.compiled = 0
+        self.loaded = 0
+        self._active = []
+
+    def _find(self, name: str, suffix: str) -> str | None:
+        for directory in self.search_path:
+            path = os.path.join(directory, name + suffix)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def _artifact_path(self, name: str, source: str | None) -> str | None:
+        if source is None:
+            return self._find(name, ARTIFACT_SUFFIX)
+        directory = self.output_dir if self.output_dir is not None else os.path.dirname(source)
+        return os.path.join(directory, name + ARTIFACT_SUFFIX)
+
+    def unit(self, name: str) -> CompiledUnit:
+        compiled = self.units.get(name)
+        if compiled is not None:
+            return compiled
+        if name in self._active:
+            chain = " -> ".join((*self._active[self._active.index(name):], name))
+            raise SemanticException(f"Циклическая зависимость модулей: {chain}")
+        self._active.append(name)
+        try:
+            compiled = self._resolve(name)
+        finally:
+            self._active.pop()
+        self.units[name] = compiled
+        return compiled
+
+    def _resolve(self, name: str) -> CompiledUnit:
+        from src.pascal.compiled import source_hash
+        source = self._find(name, SOURCE_SUFFIX)
+        artifact = self._artifact_path(name, source)
+        text = None
+        if source is not None:
+            with open(source, encoding="utf-8") as fp:
+                text = fp.read()
+        compiled = None
+        if artifact is not None and os.path.isfile(artifact):
+            try:
+                compiled = CompiledUnit.load(artifact)
+            except (OSError, SerializeError, KeyError):
+                if source is None:
+                    raise
+        if compiled is not None and text is not None and compiled.source_hash != source_hash(text):
+            compiled = None
+        if compiled is not None:
+            for dependency, digest in compiled.uses.items():
+                if self.unit(dependency).source_hash != digest:
+                    if source is None:
+                        raise SemanticException(f"Модуль {name} устарел: изменился модуль {dependency}")
+                    compiled = None
+                    break
+        if compiled is not None:
+            self.loaded += 1
+            return compiled
+        if source is None:
+            raise SemanticException(f"Модуль {name} не найден")
+        compiled = self._compile(name, text, source)
+        try:
+            compiled.save(artifact)
+        except OSError:
+            pass
+        return compiled
+
+    def _compile(self, name: str, text: str, path: str) -> CompiledUnit:
+        from src.pascal.compiled import source_hash
+        from src.pascal.parser import PascalParser
+        unit = PascalParser(text).parse_unit()
+        if unit.name != name:
+            raise SemanticException(f"Файл {path} содержит модуль {unit.name}, а не {name}")
+        counters = IdentDesc.save_counters()
+        try:
+            SemanticChecker(units=self).check(unit, IdentScope())
+        finally:
+            IdentDesc.restore_counters(counters)
+        buffer = io.BytesIO()
+        functions = {}
+        for func in unit.block.func_decls:
+            offset = buffer.tell()
+            dump_binary(func, buffer)
+            functions[func.node_ident.name] = {"type": type_to_str(func.node_type), "num": func.node_ident.num,
+                                               "offset": offset, "size": buffer.tell() - offset}
+        exports = {header.name.name: header.node_ident.name for header in unit.interface}
+        uses = {str(ident.name): self.units[str(ident.name)].source_hash for ident in unit.uses}
+        self.compiled += 1
+        return CompiledUnit(name, source_hash(text), uses, exports, functions, buffer.getvalue())
+
+    def compile_file(self, path: str) -> CompiledUnit:
+        name = os.path.splitext(os.path.basename(path))[0]
+        directory = os.path.dirname(path) or "."
+        if directory not in self.search_path:
+            self.search_path.insert(0, directory)
+        return self.unit(name)
+
+    def stats(self) -> dict:
+        return {"compiled": self.compiled, "loaded": self.loaded, "units": sorted(self.units)}